@@ -5,6 +5,7 @@ import (
 	"encoding/json"
 	"fmt"
 	"net/http"
+	"net/url"
 	"strconv"
 	"strings"
 
@@ -148,16 +149,20 @@ func (app *application) uploadBook(w http.ResponseWriter, r *http.Request) {
 
 	// --- Enqueue background processing job ---
 	enqueueURL := fmt.Sprintf(
-		"http://worker-api:8000/enqueue/book?book_id=%s&filename=%s",
+		"http://worker-api:8000/enqueue/book?book_id=%s&filename=%s&language=%s&version=%s",
 		bookId.String(),
-		objectName,
+		url.QueryEscape(objectName),
+		url.QueryEscape(language),
+		url.QueryEscape(uploadInfo.ETag),
 	)
 	resp, err := http.Post(enqueueURL, "application/json", nil)
 	if err != nil {
 		app.errorLog.Printf("❌ Failed to enqueue book job: %v", err)
 	} else {
 		defer resp.Body.Close()
-		if resp.StatusCode != http.StatusOK {
+		if resp.StatusCode == http.StatusTooManyRequests {
+			app.errorLog.Printf("⚠️ Worker queue is full, retry enqueueing after %ss", resp.Header.Get("Retry-After"))
+		} else if resp.StatusCode != http.StatusOK {
 			app.errorLog.Printf("⚠️ Enqueue request returned status %d", resp.StatusCode)
 		} else {
 			app.infoLog.Printf("✅ Book %s successfully enqueued for processing", bookId.String())
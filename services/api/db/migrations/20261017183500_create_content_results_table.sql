@@ -0,0 +1,15 @@
+-- migrate:up
+CREATE TABLE content_results (
+    content_hash TEXT NOT NULL,
+    pipeline TEXT NOT NULL,
+    language TEXT NOT NULL,
+    book_id UUID NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    cpu_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    created TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (content_hash, pipeline)
+);
+
+CREATE INDEX content_results_book_id_idx ON content_results (book_id);
+
+-- migrate:down
+DROP TABLE IF EXISTS content_results;
@@ -0,0 +1,27 @@
+-- migrate:up
+CREATE TABLE book_profiles (
+    book_id UUID PRIMARY KEY REFERENCES books(id) ON DELETE CASCADE,
+    language TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    total_tokens BIGINT NOT NULL,
+    unique_lemmas INTEGER NOT NULL,
+    tokens_unrated BIGINT NOT NULL DEFAULT 0,
+    tokens_a1 BIGINT NOT NULL DEFAULT 0,
+    tokens_a2 BIGINT NOT NULL DEFAULT 0,
+    tokens_b1 BIGINT NOT NULL DEFAULT 0,
+    tokens_b2 BIGINT NOT NULL DEFAULT 0,
+    tokens_c1 BIGINT NOT NULL DEFAULT 0,
+    tokens_c2 BIGINT NOT NULL DEFAULT 0,
+    difficulty DOUBLE PRECISION,
+    avg_zipf DOUBLE PRECISION NOT NULL,
+    zipf_p10 DOUBLE PRECISION NOT NULL,
+    zipf_p50 DOUBLE PRECISION NOT NULL,
+    zipf_p90 DOUBLE PRECISION NOT NULL,
+    coverage_curve REAL[] NOT NULL,
+    updated TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX book_profiles_language_difficulty_idx ON book_profiles (language, difficulty);
+
+-- migrate:down
+DROP TABLE IF EXISTS book_profiles;
@@ -0,0 +1,5 @@
+-- migrate:up
+ALTER TABLE words ADD COLUMN gloss TEXT;
+
+-- migrate:down
+ALTER TABLE words DROP COLUMN IF EXISTS gloss;
@@ -28,6 +28,33 @@ SET default_tablespace = '';
 
 SET default_table_access_method = heap;
 
+--
+-- Name: book_profiles; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.book_profiles (
+    book_id uuid NOT NULL,
+    language text NOT NULL,
+    version integer NOT NULL,
+    total_tokens bigint NOT NULL,
+    unique_lemmas integer NOT NULL,
+    tokens_unrated bigint DEFAULT 0 NOT NULL,
+    tokens_a1 bigint DEFAULT 0 NOT NULL,
+    tokens_a2 bigint DEFAULT 0 NOT NULL,
+    tokens_b1 bigint DEFAULT 0 NOT NULL,
+    tokens_b2 bigint DEFAULT 0 NOT NULL,
+    tokens_c1 bigint DEFAULT 0 NOT NULL,
+    tokens_c2 bigint DEFAULT 0 NOT NULL,
+    difficulty double precision,
+    avg_zipf double precision NOT NULL,
+    zipf_p10 double precision NOT NULL,
+    zipf_p50 double precision NOT NULL,
+    zipf_p90 double precision NOT NULL,
+    coverage_curve real[] NOT NULL,
+    updated timestamp without time zone DEFAULT now() NOT NULL
+);
+
+
 --
 -- Name: book_words; Type: TABLE; Schema: public; Owner: -
 --
@@ -56,6 +83,20 @@ CREATE TABLE public.books (
 );
 
 
+--
+-- Name: content_results; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.content_results (
+    content_hash text NOT NULL,
+    pipeline text NOT NULL,
+    language text NOT NULL,
+    book_id uuid NOT NULL,
+    cpu_seconds double precision DEFAULT 0 NOT NULL,
+    created timestamp without time zone DEFAULT now() NOT NULL
+);
+
+
 --
 -- Name: schema_migrations; Type: TABLE; Schema: public; Owner: -
 --
@@ -75,7 +116,8 @@ CREATE TABLE public.words (
     language text NOT NULL,
     difficulty integer,
     zipf_score double precision DEFAULT 0,
-    created timestamp without time zone DEFAULT now() NOT NULL
+    created timestamp without time zone DEFAULT now() NOT NULL,
+    gloss text
 );
 
 
@@ -106,6 +148,14 @@ ALTER SEQUENCE public.words_id_seq OWNED BY public.words.id;
 ALTER TABLE ONLY public.words ALTER COLUMN id SET DEFAULT nextval('public.words_id_seq'::regclass);
 
 
+--
+-- Name: book_profiles book_profiles_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.book_profiles
+    ADD CONSTRAINT book_profiles_pkey PRIMARY KEY (book_id);
+
+
 --
 -- Name: book_words book_words_pkey; Type: CONSTRAINT; Schema: public; Owner: -
 --
@@ -122,6 +172,14 @@ ALTER TABLE ONLY public.books
     ADD CONSTRAINT books_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: content_results content_results_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.content_results
+    ADD CONSTRAINT content_results_pkey PRIMARY KEY (content_hash, pipeline);
+
+
 --
 -- Name: schema_migrations schema_migrations_pkey; Type: CONSTRAINT; Schema: public; Owner: -
 --
@@ -146,6 +204,28 @@ ALTER TABLE ONLY public.words
     ADD CONSTRAINT words_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: book_profiles_language_difficulty_idx; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX book_profiles_language_difficulty_idx ON public.book_profiles USING btree (language, difficulty);
+
+
+--
+-- Name: content_results_book_id_idx; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX content_results_book_id_idx ON public.content_results USING btree (book_id);
+
+
+--
+-- Name: book_profiles book_profiles_book_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.book_profiles
+    ADD CONSTRAINT book_profiles_book_id_fkey FOREIGN KEY (book_id) REFERENCES public.books(id) ON DELETE CASCADE;
+
+
 --
 -- Name: book_words book_words_book_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
 --
@@ -162,6 +242,14 @@ ALTER TABLE ONLY public.book_words
     ADD CONSTRAINT book_words_word_id_fkey FOREIGN KEY (word_id) REFERENCES public.words(id) ON DELETE CASCADE;
 
 
+--
+-- Name: content_results content_results_book_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.content_results
+    ADD CONSTRAINT content_results_book_id_fkey FOREIGN KEY (book_id) REFERENCES public.books(id) ON DELETE CASCADE;
+
+
 --
 -- PostgreSQL database dump complete
 --
@@ -175,4 +263,7 @@ INSERT INTO public.schema_migrations (version) VALUES
     ('20251015181202'),
     ('20251015182847'),
     ('20251015184415'),
-    ('20251020041727');
+    ('20251020041727'),
+    ('20261017183500'),
+    ('20261017190000'),
+    ('20261017200000');
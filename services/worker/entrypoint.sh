@@ -5,12 +5,16 @@ cd /app
 case "$1" in
   "worker")
     echo "🚀 Starting RQ Worker..."
-    python -m worker.main
+    python -m worker.main "${@:2}"
     ;;
   "api")
     echo "🌐 Starting FastAPI enqueue service..."
     uvicorn worker.api.enqueue_api:app --host 0.0.0.0 --port 8000
     ;;
+  "coverage-api")
+    echo "📊 Starting known-words coverage service..."
+    uvicorn worker.api.coverage_api:app --host 0.0.0.0 --port 8000
+    ;;
   *)
     exec "$@"
     ;;
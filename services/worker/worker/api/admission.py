@@ -0,0 +1,115 @@
+"""
+Admission control for the enqueue API.
+
+Job ids are derived from the book and its content version, so a retried or
+double-clicked enqueue finds the job it already created instead of queueing
+another Tika + spaCy run. A short-lived claim key (SET NX, holding a
+per-request token) settles two identical requests arriving at the same
+time; it is released only by the request whose token it still holds.
+
+Before a new job is queued, the jobs ahead of it and their estimated wait
+(jobs ahead × mean book seconds from the worker metrics ÷ workers listening)
+are checked against ENQUEUE_MAX_DEPTH and ENQUEUE_MAX_WAIT_SECONDS. Past
+either limit the request is refused with QueueFull, which carries a
+Retry-After estimate of how long the workers need to drain the excess.
+
+Everything here runs on the API's pooled asyncio Redis client.
+"""
+
+import hashlib
+import math
+import uuid
+from typing import Iterable, Optional
+
+from redis.asyncio import Redis
+from worker.config.settings import ENQUEUE_DEFAULT_BOOK_SECONDS, ENQUEUE_MAX_DEPTH, ENQUEUE_MAX_WAIT_SECONDS
+from worker.task_queue import PRIORITIES, queue_name
+from worker.utils.metrics import STAGES_KEY
+
+CLAIM_KEY = "palabra:enqueue:claim:%s"
+CLAIM_SECONDS = 30
+
+# Delete the claim only if it still holds this request's token: a request
+# that outlived CLAIM_SECONDS must not release a claim another one took since
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# An existing job in one of these states is returned instead of enqueueing again
+LIVE_STATUSES = {"queued", "started", "deferred", "scheduled", "finished"}
+
+MAX_RETRY_AFTER = 3600
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int, jobs_ahead: int, wait_seconds: float):
+        super().__init__(f"Queue is full: {jobs_ahead} jobs ahead, ~{wait_seconds:.0f}s estimated wait")
+        self.retry_after = retry_after
+        self.jobs_ahead = jobs_ahead
+        self.wait_seconds = wait_seconds
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def book_job_id(book_id, filename: str, version: Optional[str] = None) -> str:
+    """Job id for one book at one content version (the filename when no version is given)."""
+    return f"book-{book_id}-{_digest(filename, version or '')}"
+
+
+def batch_job_id(books: Iterable[tuple]) -> str:
+    """Job id for a batch of (book_id, filename, version) tuples, independent of their order."""
+    return f"batch-{_digest(*sorted(book_job_id(*book) for book in books))}"
+
+
+async def claim(client: Redis, job_id: str) -> Optional[str]:
+    """Reserve job_id for this request: the token to release it with, or None while another request holds it."""
+    token = uuid.uuid4().hex
+    if await client.set(CLAIM_KEY % job_id, token, nx=True, ex=CLAIM_SECONDS):
+        return token
+    return None
+
+
+async def release(client: Redis, job_id: str, token: str):
+    await client.eval(RELEASE_SCRIPT, 1, CLAIM_KEY % job_id, token)
+
+
+async def live_job(client: Redis, job_id: str) -> Optional[tuple[str, str]]:
+    """(status, queue) of job_id if it is queued, running or done; None if it may be enqueued (again)."""
+    status, origin = await client.hmget(f"rq:job:{job_id}", "status", "origin")
+    status = status.decode("utf-8") if status else None
+    if status not in LIVE_STATUSES:
+        return None
+    return status, origin.decode("utf-8") if origin else None
+
+
+async def check_backpressure(client: Redis, language: Optional[str], priority: str,
+                             jobs: int = 1, books_per_job: int = 1):
+    """Raise QueueFull if `jobs` more jobs would push their queue past the configured limits."""
+    if not ENQUEUE_MAX_DEPTH and not ENQUEUE_MAX_WAIT_SECONDS:
+        return
+    # A worker empties the higher-priority queue of the language first
+    names = [queue_name(language, p) for p in PRIORITIES[:PRIORITIES.index(priority) + 1]]
+    async with client.pipeline(transaction=False) as pipe:
+        for name in names:
+            pipe.llen(f"rq:queue:{name}")
+        pipe.scard(f"rq:workers:{names[-1]}")
+        pipe.hmget(STAGES_KEY, "process_book|total|sum", "process_book|total|count")
+        *depths, workers, (seconds, count) = await pipe.execute()
+
+    jobs_ahead = sum(depths)
+    book_seconds = float(seconds) / int(count) if count and int(count) else ENQUEUE_DEFAULT_BOOK_SECONDS
+    # Jobs per second the listening workers get through (assume one is coming if none are up)
+    drain_rate = max(int(workers), 1) / (book_seconds * books_per_job)
+    wait_seconds = (jobs_ahead + jobs) / drain_rate
+
+    excess_jobs = jobs_ahead + jobs - ENQUEUE_MAX_DEPTH if ENQUEUE_MAX_DEPTH else 0
+    excess_seconds = wait_seconds - ENQUEUE_MAX_WAIT_SECONDS if ENQUEUE_MAX_WAIT_SECONDS else 0
+    if excess_jobs <= 0 and excess_seconds <= 0:
+        return
+    retry_after = max(excess_jobs / drain_rate, excess_seconds, 1)
+    raise QueueFull(min(math.ceil(retry_after), MAX_RETRY_AFTER), jobs_ahead, wait_seconds)
@@ -0,0 +1,81 @@
+"""
+Known-words coverage service.
+
+Runs separately from the enqueue API (it holds book_words in memory and
+imports numpy/pandas/SQLAlchemy). The engine is loaded at startup and
+picks up books written by the workers before each request.
+
+Also lists the per-book difficulty profiles (book_profiles), which need
+no learner and are read straight from Postgres.
+"""
+
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel
+from worker.coverage import CoverageEngine
+from worker.db.connection import engine
+from worker.db.profiles import list_profiles
+from worker.task_queue import redis_conn
+
+coverage_engine = CoverageEngine(engine, redis_conn)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    coverage_engine.load()
+    yield
+
+
+app = FastAPI(title="Palabra Coverage API", version="1.0", lifespan=lifespan)
+
+
+class CoverageRequest(BaseModel):
+    known_word_ids: list[int]
+    book_ids: list[UUID] | None = None
+    limit: int | None = None
+
+
+@app.post("/coverage")
+def book_coverage(req: CoverageRequest):
+    """
+    Token-weighted share of each book the learner already knows, with a
+    per-CEFR breakdown. Books are sorted by coverage, best first; without
+    book_ids every loaded book is scored.
+    """
+    try:
+        coverage_engine.refresh()
+        book_ids = [str(b) for b in req.book_ids] if req.book_ids is not None else None
+        result = coverage_engine.coverage(req.known_word_ids, book_ids)
+        books = sorted(result.to_dicts(), key=lambda b: b["coverage"], reverse=True)
+        return {"books": books[:req.limit] if req.limit else books}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/coverage/stats")
+def coverage_stats():
+    """Size of the in-memory index."""
+    return {
+        "books": len(coverage_engine),
+        "entries": coverage_engine.entries,
+        "segments": len(coverage_engine.segments),
+    }
+
+
+@app.get("/profiles")
+def book_profiles(
+    language: str | None = None,
+    order_by: str = "difficulty",
+    descending: bool = False,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Books with their difficulty profiles, sorted by a profile column (easiest first by default)."""
+    try:
+        with engine.connect() as conn:
+            profiles = list_profiles(conn, language, order_by, descending, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"books": profiles}
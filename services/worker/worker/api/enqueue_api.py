@@ -1,35 +1,176 @@
+from typing import Literal
+
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
+from redis.asyncio import BlockingConnectionPool, Redis
+from rq import Queue
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
 from uuid import UUID
-from worker.task_queue import queue
-from worker.tasks.process_book import process_book
+from worker.api.admission import (
+    QueueFull,
+    batch_job_id,
+    book_job_id,
+    check_backpressure,
+    claim,
+    live_job,
+    release,
+)
+from worker.task_queue import queue_for, redis_conn, PROCESS_BOOK, PROCESS_BOOKS_BATCH
+from worker.config.settings import BATCH_MAX_BOOKS, REDIS_URL, REDIS_POOL_SIZE
+from worker.nlp.languages import normalize_language
+from worker.utils.metrics import render_metrics
 
 app = FastAPI(title="Palabra Worker API", version="1.0")
 
+# Dedupe and backpressure checks use this pooled asyncio client; RQ's
+# (synchronous) enqueue runs in the threadpool on redis_conn's pool
+async_redis = Redis(connection_pool=BlockingConnectionPool.from_url(REDIS_URL, max_connections=REDIS_POOL_SIZE))
+
+# Interactive uploads are served before bulk imports
+Priority = Literal["interactive", "bulk"]
+
+
 class EnqueueRequest(BaseModel):
     book_id: UUID
     filename: str
+    language: str | None = None
+    # Content version (e.g. the object's ETag); the filename stands in when omitted
+    version: str | None = None
+    priority: Priority = "interactive"
+    profile: bool = False
 
 
-@app.post("/enqueue")
-def enqueue_book_task(req: EnqueueRequest):
-    """Accepts a book_id (UUID) and filename, and enqueues a processing job."""
+class EnqueueBatchRequest(BaseModel):
+    books: list[EnqueueRequest]
+    priority: Priority = "bulk"
+
+
+def queue_full(e: QueueFull) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(e.retry_after)},
+        content={"detail": str(e), "jobs_ahead": e.jobs_ahead, "estimated_wait_seconds": round(e.wait_seconds)},
+    )
+
+
+def replace_job(queue: Queue, job_id: str, func: str, *args, meta: dict = None) -> Job:
+    """Enqueue under job_id, first deleting a failed or stopped job with that id (and its registry entries)."""
+    try:
+        Job.fetch(job_id, connection=queue.connection).delete()
+    except NoSuchJobError:
+        pass
+    return queue.enqueue(func, *args, job_id=job_id, meta=meta or {})
+
+
+async def enqueue_once(queue: Queue, job_id: str, func: str, *args, meta: dict = None) -> dict:
+    """Enqueue func as job_id unless that job is already queued, running or done."""
+    token = await claim(async_redis, job_id)
+    if token is None:
+        # An identical request is enqueueing it right now
+        live = await live_job(async_redis, job_id)
+        status, origin = live or ("queued", queue.name)
+        return {"job_id": job_id, "queue": origin, "status": status, "duplicate": True}
+    try:
+        # Checked again under the claim: a request that just released it has enqueued the job
+        live = await live_job(async_redis, job_id)
+        if live:
+            return {"job_id": job_id, "queue": live[1], "status": live[0], "duplicate": True}
+        job = await run_in_threadpool(replace_job, queue, job_id, func, *args, meta=meta)
+    finally:
+        await release(async_redis, job_id, token)
+    return {"job_id": job.id, "queue": job.origin, "status": "queued", "duplicate": False}
+
+
+async def enqueue_book(book_id: UUID, filename: str, language: str | None, version: str | None,
+                       priority: str, profile: bool):
     try:
-        job = queue.enqueue(process_book, str(req.book_id), req.filename)
-        return {"job_id": job.id, "status": "queued"}
+        language = normalize_language(language)
+        job_id = book_job_id(book_id, filename, version)
+        live = await live_job(async_redis, job_id)
+        if live:
+            return {"job_id": job_id, "queue": live[1], "status": live[0], "duplicate": True}
+        await check_backpressure(async_redis, language, priority)
+        return await enqueue_once(
+            queue_for(language, priority), job_id,
+            PROCESS_BOOK, str(book_id), filename, language, meta={"profile": profile},
+        )
+    except QueueFull as e:
+        return queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/enqueue")
+async def enqueue_book_task(req: EnqueueRequest):
+    """
+    Accepts a book_id (UUID) and filename, and enqueues a processing job.
+    Enqueuing the same book and version again returns the existing job.
+    """
+    return await enqueue_book(req.book_id, req.filename, req.language, req.version, req.priority, req.profile)
+
+
 # support GET-based enqueues (for quick manual testing)
 @app.post("/enqueue/book")
-def enqueue_book_query(
+async def enqueue_book_query(
     book_id: UUID = Query(..., description="UUID of the book"),
-    filename: str = Query(..., description="File name in MinIO")
+    filename: str = Query(..., description="File name in MinIO"),
+    language: str | None = Query(None, description="Book language (ISO code); detected if omitted"),
+    version: str | None = Query(None, description="Content version, e.g. the object's ETag"),
+    priority: Priority = Query("interactive", description="interactive (uploads) or bulk (imports)"),
+    profile: bool = Query(False, description="Run the job under cProfile")
 ):
     """Alternate endpoint that enqueues using query params."""
+    return await enqueue_book(book_id, filename, language, version, priority, profile)
+
+
+@app.post("/enqueue/batch")
+async def enqueue_batch_task(req: EnqueueBatchRequest):
+    """
+    Enqueues books for bulk processing, BATCH_MAX_BOOKS per job and language.
+    Either every new job is accepted or the request gets a 429.
+    """
+    try:
+        by_language = {}
+        for book in req.books:
+            by_language.setdefault(normalize_language(book.language), []).append(book)
+
+        chunks = []
+        for language, books in by_language.items():
+            for i in range(0, len(books), BATCH_MAX_BOOKS):
+                chunk = books[i:i + BATCH_MAX_BOOKS]
+                job_id = batch_job_id((b.book_id, b.filename, b.version) for b in chunk)
+                chunks.append((language, chunk, job_id))
+
+        new = [c for c in chunks if not await live_job(async_redis, c[2])]
+        for language in {language for language, _, _ in new}:
+            jobs = sum(1 for c in new if c[0] == language)
+            await check_backpressure(async_redis, language, req.priority, jobs, BATCH_MAX_BOOKS)
+
+        job_ids, duplicates = [], 0
+        for language, chunk, job_id in chunks:
+            result = await enqueue_once(
+                queue_for(language, req.priority), job_id,
+                PROCESS_BOOKS_BATCH,
+                [str(b.book_id) for b in chunk],
+                [b.filename for b in chunk],
+                language,
+            )
+            job_ids.append(result["job_id"])
+            duplicates += result["duplicate"]
+        return {"job_ids": job_ids, "books": len(req.books), "duplicates": duplicates, "status": "queued"}
+    except QueueFull as e:
+        return queue_full(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms and counts of worker jobs."""
     try:
-        job = queue.enqueue(process_book, str(book_id), filename)
-        return {"job_id": job.id, "status": "queued"}
+        return await run_in_threadpool(render_metrics, redis_conn)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,192 @@
+"""
+Benchmark the coverage engine against the equivalent SQL join.
+
+Fills a throwaway schema with synthetic books (Zipf-distributed lemmas over
+a vocabulary with A1–C2 difficulty tiers), growing it to each size in
+SIZES. At every size it:
+- checks that the engine's per-book, per-level token and known counts
+  match the SQL join exactly,
+- times coverage of every book for a learner who knows the KNOWN most
+  frequent words: the SQL join (book_words ⋈ words ⟕ known_words, grouped
+  by book and level) against CoverageEngine.coverage(),
+- times a 1,000-book subset query, and an incremental refresh of 100
+  rewritten books.
+
+Postgres comes from BENCH_DATABASE_URL, or an embedded pgserver (see
+worker.benchmarks.pipeline).
+
+Usage:
+    python -m worker.benchmarks.coverage
+    SIZES=1000,10000 LEMMAS_PER_BOOK=400 python -m worker.benchmarks.coverage
+"""
+
+import os
+import time
+import uuid
+
+import numpy as np
+
+from worker.benchmarks.pipeline import apply_migrations, database_url, with_search_path
+
+SIZES = [int(s) for s in os.getenv("SIZES", "1000,10000,100000").split(",")]
+LEMMAS_PER_BOOK = int(os.getenv("LEMMAS_PER_BOOK", 200))
+VOCAB_SIZE = int(os.getenv("VOCAB_SIZE", 50_000))
+KNOWN = int(os.getenv("KNOWN", 3_000))
+SUBSET = 1_000
+ROUNDS = 3
+
+SQL_COVERAGE = """
+    SELECT bw.book_id, COALESCE(w.difficulty, 0) AS level,
+           SUM(bw.count) AS tokens,
+           COALESCE(SUM(bw.count) FILTER (WHERE k.word_id IS NOT NULL), 0) AS known
+    FROM book_words bw
+    JOIN words w ON w.id = bw.word_id
+    LEFT JOIN known_words k ON k.word_id = bw.word_id
+    GROUP BY bw.book_id, level
+"""
+
+
+def best_of(fn, rounds: int = ROUNDS):
+    best, result = float("inf"), None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def copy_rows(conn, table: str, columns: list[str], rows):
+    from worker.db.bulk import copy_rows as copy
+    copy(conn, table, columns, rows)
+
+
+def seed_words(conn, rng: np.random.Generator) -> np.ndarray:
+    """VOCAB_SIZE words ranked by frequency, tiered A1–C2 by rank; returns their ids in rank order."""
+    ranks = np.arange(VOCAB_SIZE)
+    cuts = np.array([0.01, 0.03, 0.07, 0.15, 0.30]) * VOCAB_SIZE
+    difficulty = np.searchsorted(cuts, ranks, side="right") + 1
+    # A few words without a tier, like words created by process_book
+    difficulty = np.where(rng.random(VOCAB_SIZE) < 0.02, 0, difficulty)
+    copy_rows(conn, "words", ["word", "language", "difficulty"],
+              ((f"w{r}", "es", int(d) if d else None) for r, d in zip(ranks, difficulty)))
+    ids = conn.exec_driver_sql("SELECT id FROM words ORDER BY id").scalars().all()
+    return np.array(ids, dtype=np.int64)
+
+
+def add_books(conn, word_ids: np.ndarray, n_books: int, rng: np.random.Generator) -> list[str]:
+    weights = 1.0 / np.arange(1, len(word_ids) + 1)
+    weights /= weights.sum()
+    book_ids = [str(uuid.UUID(int=int(rng.integers(0, 2**63)) << 64 | i)) for i in range(n_books)]
+    copy_rows(conn, "books", ["id", "title", "filename", "language"],
+              ((b, b, f"{b}.epub", "es") for b in book_ids))
+
+    def rows():
+        for book_id in book_ids:
+            size = max(10, int(rng.normal(LEMMAS_PER_BOOK, LEMMAS_PER_BOOK / 4)))
+            lemmas = np.unique(rng.choice(word_ids, size=size, p=weights))
+            counts = rng.zipf(1.8, size=len(lemmas)).clip(max=5_000)
+            for word_id, count in zip(lemmas.tolist(), counts.tolist()):
+                yield book_id, word_id, count
+
+    copy_rows(conn, "book_words", ["book_id", "word_id", "count"], rows())
+    return book_ids
+
+
+def sql_coverage(engine, book_ids=None) -> dict:
+    """{book_id: {level: (tokens, known)}} from the SQL join."""
+    from sqlalchemy import text
+
+    query = SQL_COVERAGE
+    params = {}
+    if book_ids is not None:
+        query = query.replace("GROUP BY", "WHERE bw.book_id = ANY(CAST(:ids AS uuid[])) GROUP BY")
+        params["ids"] = list(book_ids)
+    result = {}
+    with engine.connect() as conn:
+        for book_id, level, tokens, known in conn.execute(text(query), params):
+            result.setdefault(str(book_id), {})[int(level)] = (int(tokens), int(known))
+    return result
+
+
+def engine_rows(result) -> dict:
+    rows = {}
+    for i, book_id in enumerate(result.book_ids):
+        rows[book_id] = {
+            level: (int(result.level_tokens[i, level]), int(result.level_known[i, level]))
+            for level in range(result.level_tokens.shape[1]) if result.level_tokens[i, level]
+        }
+    return rows
+
+
+def main():
+    base_url = database_url()
+    schema = f"bench_{uuid.uuid4().hex[:8]}"
+    db_url = with_search_path(base_url, schema)
+    # Settings are read at import time
+    os.environ["DATABASE_URL"] = db_url
+
+    from sqlalchemy import create_engine, text
+    from worker.coverage import CoverageEngine
+
+    admin = create_engine(base_url)
+    with admin.begin() as conn:
+        conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+
+    rng = np.random.default_rng(0)
+    engine = create_engine(db_url)
+    try:
+        apply_migrations(db_url)
+        with engine.begin() as conn:
+            word_ids = seed_words(conn, rng)
+            known = word_ids[:KNOWN]
+            conn.exec_driver_sql("CREATE TABLE known_words (word_id integer PRIMARY KEY)")
+            copy_rows(conn, "known_words", ["word_id"], ((int(w),) for w in known))
+
+        print(f"📚 {VOCAB_SIZE:,} words, ~{LEMMAS_PER_BOOK} lemmas per book, learner knows {KNOWN:,} words")
+        all_books = []
+        for size in SIZES:
+            start = time.perf_counter()
+            with engine.begin() as conn:
+                all_books += add_books(conn, word_ids, size - len(all_books), rng)
+            with engine.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("VACUUM ANALYZE")
+                rows = conn.execute(text("SELECT count(*) FROM book_words")).scalar()
+            print(f"\n📦 {size:,} books, {rows:,} book_words rows (seeded in {time.perf_counter() - start:.1f}s)")
+
+            coverage = CoverageEngine(engine)
+            load_seconds, _ = best_of(coverage.load, rounds=1)
+
+            # --- Correctness ---
+            sql_seconds, expected = best_of(lambda: sql_coverage(engine))
+            engine_seconds, result = best_of(lambda: coverage.coverage(known))
+            assert engine_rows(result) == expected, "engine and SQL coverage differ"
+
+            subset = [all_books[i] for i in rng.choice(len(all_books), size=min(SUBSET, size), replace=False)]
+            sql_subset, expected_subset = best_of(lambda: sql_coverage(engine, subset))
+            engine_subset, subset_result = best_of(lambda: coverage.coverage(known, subset))
+            assert engine_rows(subset_result) == expected_subset, "engine and SQL subset coverage differ"
+
+            # --- Incremental refresh: rewrite 100 books' counts ---
+            changed = subset[:100]
+            with engine.begin() as conn:
+                conn.execute(text("UPDATE book_words SET count = count + 1 WHERE book_id = ANY(CAST(:ids AS uuid[]))"),
+                             {"ids": changed})
+            refresh_seconds, _ = best_of(lambda: coverage.update_books(changed), rounds=1)
+            assert engine_rows(coverage.coverage(known, changed)) == sql_coverage(engine, changed)
+
+            print("  ✅ per-book, per-level counts identical to the SQL join")
+            print(f"  ⏱️  SQL join, all books:        {sql_seconds * 1000:9.1f} ms")
+            print(f"  ⚡ engine, all books:          {engine_seconds * 1000:9.1f} ms ({sql_seconds / engine_seconds:,.0f}x)")
+            print(f"  ⏱️  SQL join, {len(subset):,} books:      {sql_subset * 1000:9.1f} ms")
+            print(f"  ⚡ engine, {len(subset):,} books:        {engine_subset * 1000:9.1f} ms ({sql_subset / engine_subset:,.0f}x)")
+            print(f"  🔄 full load {load_seconds:.2f}s, refresh of 100 books {refresh_seconds * 1000:.0f} ms, "
+                  f"{coverage.entries * 13 / 2**20:,.0f} MiB of arrays")
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        admin.dispose()
+
+
+if __name__ == "__main__":
+    main()
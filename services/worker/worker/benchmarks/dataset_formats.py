@@ -0,0 +1,73 @@
+"""
+Load time and peak memory: gzip CSV vs memory-mapped Parquet datasets.
+
+Builds 30k- and 500k-row datasets by tiling the vocab base dataset, writes
+both formats to a temp directory and reads each in a fresh interpreter, so
+peak RSS reflects just that load.
+
+Usage:
+    python -m worker.benchmarks.dataset_formats
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from worker.utils.dataset_io import parquet_path, read_dataset, write_parquet
+from worker.utils.memory import process_memory
+
+PROJECT_ROOT = Path(__file__).resolve().parents[4]  # palabra/
+DATASET = Path(os.getenv("DATASET", PROJECT_ROOT / "language_datasets" / "es_to_en_vocab_base.csv.gz"))
+SIZES = [int(n) for n in os.getenv("SIZES", "30000,500000").split(",")]
+
+
+def synthetic_dataset(base: pd.DataFrame, rows: int) -> pd.DataFrame:
+    copies = -(-rows // len(base))
+    df = pd.concat([base] * copies, ignore_index=True).head(rows)
+    df["word"] = df["word"] + [f"_{i // len(base)}" if i >= len(base) else "" for i in range(rows)]
+    return df
+
+
+def measure(path: str, fmt: str):
+    """Child process: read one file, print load seconds and peak RSS delta."""
+    baseline = process_memory(os.getpid()).get("rss_mb", 0)
+    start = time.perf_counter()
+    if fmt == "parquet":
+        df = read_dataset(Path(path).with_suffix(".csv.gz"))
+    else:
+        df = pd.read_csv(path, keep_default_na=False, na_values=[""])
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - baseline
+    print(json.dumps({"rows": len(df), "seconds": elapsed, "peak_mb": peak}))
+
+
+def main():
+    base = pd.read_csv(DATASET, keep_default_na=False, na_values=[""])
+    print(f"{'rows':>9}{'format':>10}{'bytes':>13}{'load s':>9}{'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in SIZES:
+            df = synthetic_dataset(base, rows)
+            csv_gz = Path(tmp) / f"bench_{rows}.csv.gz"
+            df.to_csv(csv_gz, index=False, encoding="utf-8", compression="gzip")
+            write_parquet(df, parquet_path(csv_gz))
+
+            for fmt, path in (("csv.gz", csv_gz), ("parquet", parquet_path(csv_gz))):
+                out = subprocess.run(
+                    [sys.executable, "-m", "worker.benchmarks.dataset_formats", "--measure", str(path), fmt],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{rows:>9,}{fmt:>10}{path.stat().st_size:>13,}{r['seconds']:>9.3f}{r['peak_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,111 @@
+"""
+Per-book extraction latency: in-process EPUB/HTML/text path vs Tika.
+
+Builds a fixture corpus of EPUB, HTML and plain-text books at a few sizes
+(or uses the files in BENCH_CORPUS), then times text extraction for each
+book through both paths. The Tika path is skipped if the server at
+TIKA_SERVER_ENDPOINT isn't reachable.
+
+Usage:
+    python -m worker.benchmarks.extraction
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import requests
+from ebooklib import epub
+from tika import parser
+from worker.config.settings import TIKA_SERVER_ENDPOINT
+from worker.nlp.extractor import sniff_format, extract_text_locally
+
+BENCH_CORPUS = os.getenv("BENCH_CORPUS")
+ROUNDS = int(os.getenv("ROUNDS", 3))
+SIZES = {"small": 5_000, "medium": 50_000, "large": 250_000}  # words per book
+
+VOCAB = (
+    "casa perro gato libro tiempo vida mundo ciudad noche día agua tierra "
+    "hablaba comía vivía dormiré tendremos quisiera árbol niño canción"
+).split()
+
+
+def _paragraphs(n_words: int, rng: random.Random) -> list[str]:
+    words = [rng.choice(VOCAB) for _ in range(n_words)]
+    return [" ".join(words[i:i + 120]) + "." for i in range(0, n_words, 120)]
+
+
+def _epub_bytes(paragraphs: list[str]) -> bytes:
+    book = epub.EpubBook()
+    book.set_identifier("bench")
+    book.set_title("Benchmark")
+    book.set_language("es")
+    chapters = []
+    for i in range(0, len(paragraphs), 50):
+        chapter = epub.EpubHtml(title=f"Capítulo {i}", file_name=f"chap_{i}.xhtml", lang="es")
+        chapter.content = "".join(f"<p>{p}</p>" for p in paragraphs[i:i + 50])
+        book.add_item(chapter)
+        chapters.append(chapter)
+    book.toc = chapters
+    book.spine = chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    with tempfile.NamedTemporaryFile(suffix=".epub") as tmp:
+        epub.write_epub(tmp.name, book)
+        return Path(tmp.name).read_bytes()
+
+
+def build_corpus() -> dict[str, bytes]:
+    if BENCH_CORPUS:
+        return {p.name: p.read_bytes() for p in sorted(Path(BENCH_CORPUS).iterdir()) if p.is_file()}
+
+    rng = random.Random(42)
+    corpus = {}
+    for label, n_words in SIZES.items():
+        paragraphs = _paragraphs(n_words, rng)
+        corpus[f"{label}.txt"] = "\n\n".join(paragraphs).encode("utf-8")
+        body = "".join(f"<p>{p}</p>" for p in paragraphs)
+        corpus[f"{label}.html"] = f"<!DOCTYPE html><html><body>{body}</body></html>".encode("utf-8")
+        corpus[f"{label}.epub"] = _epub_bytes(paragraphs)
+    return corpus
+
+
+def tika_available() -> bool:
+    try:
+        return requests.get(f"{TIKA_SERVER_ENDPOINT.rstrip('/')}/tika", timeout=2).ok
+    except (requests.RequestException, AttributeError):
+        return False
+
+
+def median_latency(fn) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    corpus = build_corpus()
+    use_tika = tika_available()
+    if not use_tika:
+        print(f"⚠️ Tika not reachable at {TIKA_SERVER_ENDPOINT}; timing the local path only")
+
+    print(f"{'book':<16}{'bytes':>12}{'format':>8}{'local ms':>12}{'tika ms':>12}")
+    for name, data in corpus.items():
+        fmt = sniff_format(data)
+        local = median_latency(lambda: extract_text_locally(data, fmt)) if fmt else float("nan")
+        tika = (
+            median_latency(lambda: parser.from_buffer(BytesIO(data), serverEndpoint=TIKA_SERVER_ENDPOINT))
+            if use_tika else float("nan")
+        )
+        print(f"{name:<16}{len(data):>12,}{fmt or 'tika':>8}{local:>12.1f}{tika:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
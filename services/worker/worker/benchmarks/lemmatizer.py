@@ -0,0 +1,90 @@
+"""
+Startup time, RSS, words/sec and lemma agreement for lemmatizer configs.
+
+Compares the old process_book pipeline (full model, NER disabled) against
+the trimmed pipeline, the vectorless variant and, when LEMMA_LOOKUP_PATH is
+set, the lookup fast path. Each config runs in a fresh interpreter so load
+time and RSS aren't skewed by previously loaded models. Agreement is
+measured on the vocab base word list against the old pipeline.
+
+Usage:
+    python -m worker.benchmarks.lemmatizer
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from worker.utils.dataset_io import read_dataset
+
+PROJECT_ROOT = Path(__file__).resolve().parents[4]  # palabra/
+DATASET = Path(os.getenv("DATASET", PROJECT_ROOT / "language_datasets" / "es_to_en_vocab_base.csv.gz"))
+CONFIGS = ["full", "trimmed", "trimmed-no-vectors"] + (["trimmed+lookup"] if os.getenv("LEMMA_LOOKUP_PATH") else [])
+
+
+def load_words() -> list[str]:
+    return read_dataset(DATASET, columns=["word"]).word.tolist()
+
+
+def run_config(config: str):
+    """Child process: load one config, lemmatize the word list, print JSON."""
+    import spacy
+    from worker.config.settings import SPACY_MODEL
+    from worker.nlp.lemmatizer import SingleTokenLemmatizer, load_pipeline, load_lookup
+    from worker.utils.memory import process_memory
+
+    words = load_words()
+    start = time.perf_counter()
+    if config == "full":
+        lemmatizer = SingleTokenLemmatizer(spacy.load(SPACY_MODEL, disable=["ner"]), lookup={})
+    elif config == "trimmed":
+        lemmatizer = SingleTokenLemmatizer(load_pipeline(vectors=True), lookup={})
+    elif config == "trimmed-no-vectors":
+        lemmatizer = SingleTokenLemmatizer(load_pipeline(vectors=False), lookup={})
+    else:
+        lemmatizer = SingleTokenLemmatizer(load_pipeline(vectors=True), lookup=load_lookup())
+    startup = time.perf_counter() - start
+    rss = process_memory(os.getpid()).get("rss_mb", 0)
+
+    start = time.perf_counter()
+    results = lemmatizer.lemmatize(words)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "config": config,
+        "startup_s": startup,
+        "rss_mb": rss,
+        "words_per_sec": len(words) / elapsed,
+        "lemmas": [r.lemma for r in results],
+        "pos": [r.pos for r in results],
+    }))
+
+
+def main():
+    runs = {}
+    for config in CONFIGS:
+        out = subprocess.run(
+            [sys.executable, "-m", "worker.benchmarks.lemmatizer", "--config", config],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        runs[config] = json.loads(out.strip().splitlines()[-1])
+
+    base = runs["full"]
+    print(f"{'config':<22}{'startup s':>10}{'RSS MB':>9}{'words/s':>10}{'lemma agree':>13}{'POS agree':>11}")
+    for config, r in runs.items():
+        n = len(base["lemmas"])
+        lemma_agree = sum(a == b for a, b in zip(r["lemmas"], base["lemmas"])) / n
+        pos_agree = sum(a == b for a, b in zip(r["pos"], base["pos"])) / n
+        print(
+            f"{config:<22}{r['startup_s']:>10.2f}{r['rss_mb']:>9.0f}{r['words_per_sec']:>10,.0f}"
+            f"{lemma_agree:>12.1%}{pos_agree:>11.1%}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--config":
+        run_config(sys.argv[2])
+    else:
+        main()
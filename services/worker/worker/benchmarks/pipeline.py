@@ -0,0 +1,430 @@
+"""
+End-to-end benchmark of the book ingestion pipeline against local stand-ins.
+
+Covers the full path a book takes in production:
+    POST /enqueue (enqueue_api over HTTP) → RQ → MinIO → text extraction
+    (local or Tika) → lemmatization → Postgres writes
+
+Stand-ins, all started in-process on free ports:
+- Redis: BENCH_REDIS_URL (a throwaway Redis; it is flushed). Without it,
+  an in-process fakeredis instance is used and jobs run in-process with a
+  single RQ SimpleWorker, so --workers needs a real Redis
+- MinIO: the fake S3 server from worker.benchmarks.storage
+- Tika: a stub that "parses" fixture PDFs (a %PDF header line + UTF-8 text)
+- Postgres: BENCH_DATABASE_URL (a throwaway database; the migrations are
+  applied into a temporary schema that is dropped afterwards). Without it,
+  an embedded server is started if the `pgserver` package is installed.
+
+The fixture corpus mixes txt/html/epub/pdf books of three sizes, generated
+from the vocab base dataset with a fixed seed; every book has distinct
+content. Reports books/min, p50/p95 job latency, per-stage means from
+job.meta["metrics"] and peak RSS, and saves them as JSON for comparing runs.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python -m worker.benchmarks.pipeline
+    BENCH_REDIS_URL=redis://localhost:6379/15 python -m worker.benchmarks.pipeline --workers 4
+    python -m worker.benchmarks.pipeline --books 48 --workers 2 --output run.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+from worker.benchmarks.storage import FakeS3Handler
+
+PROJECT_ROOT = Path(__file__).resolve().parents[4]  # palabra/
+DATASET = Path(os.getenv("DATASET", PROJECT_ROOT / "language_datasets" / "es_to_en_vocab_base.csv.gz"))
+MIGRATIONS_DIR = PROJECT_ROOT / "services" / "api" / "db" / "migrations"
+BUCKET = "books"
+
+# Fixture book sizes in bytes of text, and their share of the corpus
+BOOK_SIZES = {"small": 20_000, "medium": 400_000, "large": 6_000_000}
+SIZE_MIX = {"small": 0.5, "medium": 0.35, "large": 0.15}
+FORMATS = ["txt", "html", "epub", "pdf"]
+# Lowered from the production default so large fixtures take the streaming path
+STREAM_THRESHOLD_BYTES = int(os.getenv("BENCH_STREAM_THRESHOLD_BYTES", 4 * 1024 * 1024))
+
+
+class TikaStubHandler(BaseHTTPRequestHandler):
+    """Answers /rmeta/text (tika-python's from_buffer) and /tika (streaming) for fixture files."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(chunks)
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_PUT(self):
+        body = self._read_body()
+        if body.startswith(b"%PDF"):
+            body = body.split(b"\n", 1)[1]
+        text = body.decode("utf-8", errors="replace")
+
+        if self.path.startswith("/rmeta"):
+            payload = json.dumps([{"Content-Type": "application/pdf", "X-TIKA:content": text}]).encode("utf-8")
+            content_type = "application/json"
+        else:
+            payload = text.encode("utf-8")
+            content_type = "text/plain; charset=UTF-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(handler) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def database_url() -> str:
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return url
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("💥 Set BENCH_DATABASE_URL to a throwaway Postgres (or pip install pgserver)")
+    print("🐘 Starting an embedded Postgres (pgserver)...")
+    return pgserver.get_server(tempfile.mkdtemp(prefix="palabra-bench-pg-"), cleanup_mode="stop").get_uri()
+
+
+def with_search_path(url: str, schema: str) -> str:
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}options=-csearch_path%3D{schema},public"
+
+
+def apply_migrations(url: str):
+    """Run the `migrate:up` section of every dbmate migration, in order."""
+    from sqlalchemy import create_engine
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            up = path.read_text().split("-- migrate:up", 1)[1].split("-- migrate:down", 1)[0]
+            statements = up.splitlines()
+            for extension in [line for line in statements if line.startswith("CREATE EXTENSION")]:
+                # gen_random_uuid() is built in since Postgres 13, so a missing contrib package is fine
+                try:
+                    with conn.begin_nested():
+                        conn.exec_driver_sql(extension)
+                except Exception as e:
+                    print(f"⚠️ Skipping '{extension}': {str(e).splitlines()[0]}")
+            conn.exec_driver_sql("\n".join(line for line in statements if not line.startswith("CREATE EXTENSION")))
+    engine.dispose()
+
+
+def make_text(vocab: list[str], weights: np.ndarray, size: int, rng: np.random.Generator) -> str:
+    """Roughly `size` bytes of Zipf-weighted words, in sentences and paragraphs."""
+    words = rng.choice(len(vocab), size=max(size // 7, 1), p=weights)
+    out = []
+    for i in range(0, len(words), 12):
+        sentence = " ".join(vocab[j] for j in words[i:i + 12])
+        out.append(sentence.capitalize() + (".\n\n" if i % 120 == 0 else ". "))
+    return "".join(out)
+
+
+def render_book(text: str, fmt: str, title: str) -> bytes:
+    if fmt == "txt":
+        return text.encode("utf-8")
+    if fmt == "pdf":
+        return b"%PDF-1.7\n" + text.encode("utf-8")
+    paragraphs = "".join(f"<p>{p}</p>" for p in text.split("\n\n"))
+    html = f"<!DOCTYPE html><html><head><title>{title}</title></head><body>{paragraphs}</body></html>"
+    if fmt == "html":
+        return html.encode("utf-8")
+
+    from ebooklib import epub
+
+    book = epub.EpubBook()
+    book.set_identifier(title)
+    book.set_title(title)
+    book.set_language("es")
+    chapter = epub.EpubHtml(title=title, file_name="chapter.xhtml", lang="es")
+    chapter.content = f"<html><body>{paragraphs}</body></html>"
+    book.add_item(chapter)
+    book.toc = [chapter]
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = ["nav", chapter]
+    with tempfile.NamedTemporaryFile(suffix=".epub") as f:
+        epub.write_epub(f.name, book)
+        return Path(f.name).read_bytes()
+
+
+def build_corpus(n_books: int, seed: int = 0) -> list[dict]:
+    from worker.utils.dataset_io import read_dataset
+
+    df = read_dataset(DATASET, columns=["word", "zipf_score"])
+    vocab = df.word.tolist()
+    weights = np.power(10.0, df.zipf_score.to_numpy(dtype=np.float64))
+    weights /= weights.sum()
+
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    kinds = [kind for kind, share in SIZE_MIX.items() for _ in range(max(1, round(share * n_books)))][:n_books]
+    random.shuffle(kinds)
+
+    corpus = []
+    for i, kind in enumerate(kinds):
+        fmt = FORMATS[i % len(FORMATS)]
+        book_id = str(uuid.UUID(int=random.getrandbits(128)))
+        data = render_book(make_text(vocab, weights, BOOK_SIZES[kind], rng), fmt, f"Libro {i}")
+        corpus.append({"book_id": book_id, "filename": f"{book_id}.{fmt}", "size": kind,
+                       "format": fmt, "bytes": len(data), "data": data})
+    return corpus
+
+
+def run_simple_worker(connection) -> float:
+    """Drain the queue in this process (fakeredis cannot be shared with forks)."""
+    from rq import SimpleWorker
+
+    start = time.perf_counter()
+    SimpleWorker(["books"], connection=connection).work(burst=True)
+    return time.perf_counter() - start
+
+
+def run_workers(redis_url: str, n_workers: int) -> float:
+    """Fork n burst-mode RQ workers and wait until they have drained the queue."""
+    import redis
+    from rq import Worker
+
+    start = time.perf_counter()
+    pids = []
+    for _ in range(n_workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                Worker(["books"], connection=redis.from_url(redis_url)).work(burst=True)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return time.perf_counter() - start
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "mean": None}
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p95": round(float(np.percentile(values, 95)), 4),
+        "mean": round(float(values.mean()), 4),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=PROJECT_ROOT).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ingestion benchmark")
+    parser.add_argument("--books", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON results path")
+    args = parser.parse_args()
+
+    # --- Stand-ins ---
+    redis_url = os.getenv("BENCH_REDIS_URL")
+    if not redis_url and args.workers > 1:
+        raise SystemExit("💥 --workers > 1 needs a real Redis: set BENCH_REDIS_URL")
+    s3 = serve(FakeS3Handler)
+    tika = serve(TikaStubHandler)
+
+    base_url = database_url()
+    schema = f"bench_{uuid.uuid4().hex[:8]}"
+    db_url = with_search_path(base_url, schema)
+    api_port = free_port()
+
+    # Settings are read at import time, so configure everything first
+    os.environ.update({
+        "REDIS_URL": redis_url or "redis://127.0.0.1:6379/0",
+        "MINIO_ENDPOINT": f"127.0.0.1:{s3.server_address[1]}",
+        "MINIO_ACCESS_KEY": "minioadmin",
+        "MINIO_SECRET_KEY": "minioadmin",
+        "MINIO_SSL": "false",
+        "MINIO_BUCKET": BUCKET,
+        "TIKA_SERVER_ENDPOINT": f"http://127.0.0.1:{tika.server_address[1]}",
+        "TIKA_CLIENT_ONLY": "True",
+        "DATABASE_URL": db_url,
+        "STREAM_THRESHOLD_BYTES": str(STREAM_THRESHOLD_BYTES),
+        "PREFETCH_DIR": tempfile.mkdtemp(prefix="palabra-bench-prefetch-"),
+    })
+
+    from sqlalchemy import create_engine, text
+    admin = create_engine(base_url)
+    with admin.begin() as conn:
+        conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+
+    try:
+        apply_migrations(db_url)
+
+        print(f"📚 Building a {args.books}-book fixture corpus...")
+        corpus = build_corpus(args.books, args.seed)
+        FakeS3Handler.objects = {f"{BUCKET}/{b['filename']}": b["data"] for b in corpus}
+        FakeS3Handler.etags = {f"{BUCKET}/{b['filename']}": hashlib.md5(b["data"]).hexdigest() for b in corpus}
+
+        engine = create_engine(db_url)
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO books (id, title, filename, language) VALUES (:id, :title, :filename, 'es')"),
+                [{"id": b["book_id"], "title": b["filename"], "filename": b["filename"]} for b in corpus],
+            )
+
+        # --- Load the model and API once, before forking workers ---
+        import requests
+        import uvicorn
+        from rq import Queue
+        from rq.job import Job
+        import worker.task_queue as task_queue
+
+        if redis_url:
+            task_queue.redis_conn.flushdb()
+        else:
+            import fakeredis
+            # Swap the queue's connection before enqueue_api imports it
+            fake_server = fakeredis.FakeServer()
+            task_queue.redis_conn = fakeredis.FakeRedis(server=fake_server)
+            task_queue.queue = Queue("books", connection=task_queue.redis_conn)
+        redis_conn = task_queue.redis_conn
+        from worker.api import enqueue_api
+        from worker.api.enqueue_api import app
+        if not redis_url:
+            # The API's asyncio client must see the same fake server
+            enqueue_api.async_redis = fakeredis.FakeAsyncRedis(server=fake_server)
+
+        api = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=api_port, log_level="warning"))
+        api_thread = threading.Thread(target=api.run, daemon=True)
+        api_thread.start()
+        while not api.started:
+            time.sleep(0.05)
+
+        # --- Enqueue through the HTTP API ---
+        job_ids = {}
+        enqueue_start = time.perf_counter()
+        for book in corpus:
+            response = requests.post(f"http://127.0.0.1:{api_port}/enqueue",
+                                     json={"book_id": book["book_id"], "filename": book["filename"]})
+            response.raise_for_status()
+            job_ids[book["book_id"]] = response.json()["job_id"]
+        enqueue_seconds = time.perf_counter() - enqueue_start
+        print(f"📨 Enqueued {len(corpus)} books in {enqueue_seconds:.2f}s; running {args.workers} worker(s)...")
+
+        # Stop the API before forking so workers don't inherit its event loop thread
+        api.should_exit = True
+        api_thread.join()
+        if redis_url:
+            drain_seconds = run_workers(redis_url, args.workers)
+        else:
+            drain_seconds = run_simple_worker(redis_conn)
+
+        # --- Collect results ---
+        latencies, service, stages, by_size = [], [], {}, {}
+        failed = 0
+        for book in corpus:
+            job = Job.fetch(job_ids[book["book_id"]], connection=redis_conn)
+            if job.get_status() != "finished":
+                failed += 1
+                print(f"  ❌ {book['filename']}: {job.get_status()} {(job.exc_info or '').strip()[-300:]}")
+                continue
+            latencies.append((job.ended_at - job.enqueued_at).total_seconds())
+            service.append((job.ended_at - job.started_at).total_seconds())
+            by_size.setdefault(book["size"], []).append(service[-1])
+            for name, seconds in job.meta.get("metrics", {}).get("stages", {}).items():
+                stages.setdefault(name, []).append(seconds)
+
+        with engine.connect() as conn:
+            books_with_words = conn.execute(text("SELECT count(DISTINCT book_id) FROM book_words")).scalar()
+            rows = conn.execute(text("SELECT count(*) FROM book_words")).scalar()
+        engine.dispose()
+
+        results = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "config": {
+                "books": len(corpus),
+                "workers": args.workers,
+                "redis": "redis" if redis_url else "fakeredis",
+                "seed": args.seed,
+                "corpus_bytes": sum(b["bytes"] for b in corpus),
+                "sizes": {kind: sum(1 for b in corpus if b["size"] == kind) for kind in BOOK_SIZES},
+                "stream_threshold_bytes": STREAM_THRESHOLD_BYTES,
+            },
+            "books_per_min": round(60 * (len(corpus) - failed) / drain_seconds, 2),
+            "drain_seconds": round(drain_seconds, 3),
+            "enqueue_seconds": round(enqueue_seconds, 3),
+            "failed": failed,
+            "books_with_words": books_with_words,
+            "book_words_rows": rows,
+            "job_latency_seconds": percentiles(latencies),
+            "job_service_seconds": percentiles(service),
+            "service_seconds_by_size": {kind: percentiles(v) for kind, v in sorted(by_size.items())},
+            "stage_seconds": {name: percentiles(v) for name, v in sorted(stages.items())},
+            # Without BENCH_REDIS_URL jobs run in the harness process, so look at "harness"
+            "peak_rss_mb": {
+                "workers": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+                "harness": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            },
+        }
+    finally:
+        with admin.begin() as conn:
+            conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        admin.dispose()
+        for server in (s3, tika):
+            server.shutdown()
+
+    output = Path(args.output or f"pipeline-benchmark-{results['timestamp'].replace(':', '')}.json")
+    output.write_text(json.dumps(results, indent=2))
+
+    print(f"\n⚡ {results['books_per_min']} books/min with {args.workers} worker(s)")
+    print(f"⏱️  job latency p50 {results['job_latency_seconds']['p50']}s / p95 {results['job_latency_seconds']['p95']}s"
+          f" (service p50 {results['job_service_seconds']['p50']}s / p95 {results['job_service_seconds']['p95']}s)")
+    print(f"🧠 peak RSS: workers {results['peak_rss_mb']['workers']} MB, harness {results['peak_rss_mb']['harness']} MB")
+    print(f"💾 Results saved to {output}")
+    if failed:
+        raise SystemExit(f"💥 {failed} jobs failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Throughput and per-process memory of the prefork pool at 1, 2, 4 and 8 children.
+
+Loads the spaCy model once in the parent (as `worker.main --concurrency N`
+does), forks N children that each lemmatize their share of the vocab base
+word list, and samples every child's RSS and PSS from /proc while they
+run. PSS divides shared pages between the processes sharing them, so it
+shows how much of the model stays shared copy-on-write.
+
+Usage:
+    python -m worker.benchmarks.pool
+"""
+
+import gc
+import os
+import time
+from pathlib import Path
+
+import spacy
+from worker.utils.memory import process_memory
+from worker.utils.dataset_io import read_dataset
+
+PROJECT_ROOT = Path(__file__).resolve().parents[4]  # palabra/
+DATASET = Path(os.getenv("DATASET", PROJECT_ROOT / "language_datasets" / "es_to_en_vocab_base.csv.gz"))
+MODEL = os.getenv("SPACY_MODEL", "es_core_news_lg")
+CHILDREN = [int(n) for n in os.getenv("CHILDREN", "1,2,4,8").split(",")]
+REPEAT = int(os.getenv("REPEAT", 4))  # passes over the word list per run
+
+
+def run(nlp, words: list[str], n_children: int) -> dict:
+    shards = [words[i::n_children] for i in range(n_children)]
+    start = time.perf_counter()
+    pids = []
+    for shard in shards:
+        pid = os.fork()
+        if pid == 0:
+            for _ in range(REPEAT):
+                for doc in nlp.pipe(shard, batch_size=1000):
+                    doc[0].lemma_
+            os._exit(0)
+        pids.append(pid)
+
+    peak = {pid: {"rss_mb": 0.0, "pss_mb": 0.0} for pid in pids}
+    running = set(pids)
+    while running:
+        for pid in list(running):
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                running.discard(pid)
+                continue
+            for key, value in process_memory(pid).items():
+                peak[pid][key] = max(peak[pid][key], value)
+        time.sleep(0.1)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "children": n_children,
+        "words_per_sec": len(words) * REPEAT / elapsed,
+        "rss_mb": max(p["rss_mb"] for p in peak.values()),
+        "pss_mb": max(p["pss_mb"] for p in peak.values()),
+    }
+
+
+def main():
+    words = read_dataset(DATASET, columns=["word"]).word.tolist()
+
+    print(f"🧠 Loading {MODEL} once in the parent...")
+    nlp = spacy.load(MODEL, disable=["ner"])
+    gc.freeze()
+    parent = process_memory(os.getpid())
+    print(f"👪 Parent: {parent.get('rss_mb', 0):.0f} MB RSS")
+
+    print(f"{'children':>9}{'words/sec':>12}{'child RSS MB':>14}{'child PSS MB':>14}")
+    for n in CHILDREN:
+        r = run(nlp, words, n)
+        print(f"{r['children']:>9}{r['words_per_sec']:>12,.0f}{r['rss_mb']:>14.0f}{r['pss_mb']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
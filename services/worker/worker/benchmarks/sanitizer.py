@@ -0,0 +1,124 @@
+"""
+Micro-benchmark and equivalence check for the Spanish lemma sanitizer.
+
+Runs the original per-token regex sanitizer and the table-driven
+clean_lemmas() over (word, lemma) pairs derived from the vocab base
+dataset, asserts byte-identical output, and reports tokens/sec.
+
+Usage:
+    python -m worker.benchmarks.sanitizer
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+
+from worker.nlp.sanitizers.spanish import IRREGULAR_FIXES, clean_lemmas, clean_lemma_regex
+from worker.utils.dataset_io import read_dataset
+
+PROJECT_ROOT = Path(__file__).resolve().parents[4]  # palabra/
+DATASET = Path(os.getenv("DATASET", PROJECT_ROOT / "language_datasets" / "es_to_en_vocab_base.csv.gz"))
+ROUNDS = int(os.getenv("ROUNDS", 5))
+
+
+def legacy_clean_lemma(word: str, lemma: str) -> str:
+    """The sanitizer as it shipped before clean_lemmas (uncompiled regexes)."""
+    word_lower = word.lower()
+    lemma_lower = lemma.lower()
+
+    if " " in lemma_lower or re.search(r"\b(el|la|los|las|un|una|unos|unas)$", lemma_lower):
+        return ""
+
+    if lemma_lower.endswith("ár"):
+        lemma_lower = lemma_lower.replace("á", "a")
+
+    if lemma_lower == "ír":
+        lemma_lower = "ir"
+
+    if word_lower in {"fui", "fue", "fueron", "fuiste", "fuimos"}:
+        return "ser"
+
+    if re.search(r"(aba|abas|aban|ábamos)$", word_lower) and lemma_lower == word_lower:
+        return re.sub(r"(aba|abas|aban|ábamos)$", "ar", word_lower)
+
+    if re.search(r"(ía|ías|ían|íamos)$", word_lower) and lemma_lower == word_lower:
+        stem = word_lower[:-2]
+        if re.search(r"(viv|dorm|sal|sub|abr|recib|decid|sent|escrib|permit|exist|part|sufr)$", stem):
+            return stem + "ir"
+        return stem + "er"
+
+    if re.search(r"^ib(a|as|an|amos|ais|as)$", word_lower):
+        return "ir"
+
+    if word_lower.endswith(("ré", "rás", "rán", "remos")) and lemma_lower.startswith(word_lower[:-2]):
+        if word_lower[:-2].endswith(("ar", "er", "ir")):
+            return word_lower[:-2]
+        return re.sub(r"(ré|rás|rán|remos)$", "r", word_lower)
+
+    normalized = lemma_lower.replace("á", "a").replace("í", "i").replace("é", "e")
+    if normalized in IRREGULAR_FIXES:
+        return IRREGULAR_FIXES[normalized]
+
+    if re.search(r"(acer|ecer)$", normalized) and normalized[:-4] in {"habl", "trabaj", "est"}:
+        return normalized[:-4] + "ar"
+
+    return normalized
+
+
+def build_pairs():
+    """Derive (word, lemma) pairs exercising every sanitizer branch from the vocab list."""
+    vocab = read_dataset(DATASET, columns=["word"]).word.tolist()
+
+    pairs = []
+    for word in vocab:
+        pairs.append((word, word))
+        pairs.append((word.capitalize(), word))
+        pairs.append((word, word + " el"))
+        if word.endswith(("ar", "er", "ir")):
+            stem = word[:-2]
+            # spaCy echoing the inflected form back, or truncating it
+            for form in (stem + "aba", stem + "ábamos", stem + "ía", stem + "íamos",
+                         word + "é", word + "rás", stem + "ré", word + "emos"):
+                pairs.append((form, form))
+                pairs.append((form, word))
+                pairs.append((form, stem))
+            pairs.append((word, stem + "ár"))
+    pairs += [(w, w) for w in ("iba", "ibas", "ibamos", "ibais", "fui", "fuimos", "ír")]
+    pairs += [("hablacer", "hablacer"), ("hablaba\n", "hablaba\n"), ("casa\n", "el\n")]
+    return pairs
+
+
+def main():
+    pairs = build_pairs()
+    words = [w for w, _ in pairs]
+    lemmas = [l for _, l in pairs]
+    print(f"📂 {len(pairs):,} (word, lemma) pairs from {DATASET.name}")
+
+    expected = [legacy_clean_lemma(w, l) for w, l in pairs]
+    actual = clean_lemmas(words, lemmas)
+    regex = [clean_lemma_regex(w, l) for w, l in pairs]
+    mismatches = [(p, e, a) for p, e, a in zip(pairs, expected, actual) if e != a]
+    mismatches += [(p, e, r) for p, e, r in zip(pairs, expected, regex) if e != r]
+    if mismatches:
+        for pair, exp, got in mismatches[:20]:
+            print(f"  ❌ {pair!r}: expected {exp!r}, got {got!r}")
+        raise SystemExit(f"💥 {len(mismatches)} mismatches against the legacy sanitizer")
+    print("✅ Output is byte-identical to the legacy sanitizer")
+
+    def best_of(fn):
+        best = float("inf")
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return len(pairs) / best
+
+    before = best_of(lambda: [legacy_clean_lemma(w, l) for w, l in pairs])
+    after = best_of(lambda: clean_lemmas(words, lemmas))
+    print(f"⏱️  legacy clean_lemma: {before:,.0f} tokens/sec")
+    print(f"⚡ clean_lemmas:        {after:,.0f} tokens/sec ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cold-start time and peak RSS of the worker's two processes.
+
+Each scenario runs in a fresh interpreter, a few times; the fastest run
+and its peak RSS (from wait4) are reported:
+- api:     importing worker.api.enqueue_api (what uvicorn does before serving)
+- worker:  importing worker.main
+- warm-up: worker.main.warm_up(WORKER_LANGUAGES), the phase before the
+           first job is taken
+
+The api scenario also lists which heavy packages ended up imported; the
+enqueue service should import none of them.
+
+Usage:
+    python -m worker.benchmarks.startup
+    ROUNDS=5 WORKER_LANGUAGES=es,en python -m worker.benchmarks.startup
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROUNDS = int(os.getenv("ROUNDS", 3))
+HEAVY_MODULES = ("spacy", "thinc", "nltk", "wordfreq", "tika", "pandas", "sqlalchemy", "ebooklib")
+
+SCENARIOS = {
+    "api": (
+        "import sys, json, worker.api.enqueue_api; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    ),
+    "worker": "import worker.main",
+    "warm-up": (
+        "from worker.config.settings import WORKER_LANGUAGES; "
+        "from worker.main import warm_up; warm_up(WORKER_LANGUAGES)"
+    ),
+}
+
+
+def run(code: str) -> tuple[float, float, str]:
+    """Run code in a fresh interpreter; return (seconds, peak RSS in MB, last stdout line)."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    output = process.stdout.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    if status != 0:
+        raise SystemExit(f"💥 Scenario failed (exit status {status}): {code}")
+    lines = output.strip().splitlines()
+    return seconds, usage.ru_maxrss / 1024, lines[-1] if lines else ""
+
+
+def main():
+    print(f"⏱️  Cold start, best of {ROUNDS} fresh interpreters")
+    for name, code in SCENARIOS.items():
+        seconds, rss, output = min(run(code) for _ in range(ROUNDS))
+        print(f"  {name:<8} {seconds:6.2f}s  peak RSS {rss:7.1f} MB")
+        if name == "api":
+            heavy = json.loads(output)
+            print(f"           heavy imports: {', '.join(heavy) if heavy else 'none ✅'}")
+
+
+if __name__ == "__main__":
+    main()
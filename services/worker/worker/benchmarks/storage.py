@@ -0,0 +1,162 @@
+"""
+Benchmark and correctness check for worker.storage against a fake S3 server.
+
+Starts an in-process S3 stand-in (HEAD/GET with Range, per-request latency
+and a per-connection bandwidth cap, like a busy MinIO), then:
+- checks that ranged reads and the prefetch spool return byte-identical data,
+- times a single GET against concurrent ranged GETs for a large object,
+- times a fetch served from the prefetch spool against one from the server.
+
+Usage:
+    python -m worker.benchmarks.storage
+    LARGE_MB=128 FAKE_BANDWIDTH_MBPS=25 python -m worker.benchmarks.storage
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SMALL_MB = int(os.getenv("SMALL_MB", 4))
+LARGE_MB = int(os.getenv("LARGE_MB", 64))
+FAKE_LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", 20))
+FAKE_BANDWIDTH_MBPS = float(os.getenv("FAKE_BANDWIDTH_MBPS", 50))
+BUCKET = "books"
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    """Serves objects from FakeS3Handler.objects at /<bucket>/<name>."""
+
+    protocol_version = "HTTP/1.1"
+    objects: dict[str, bytes] = {}
+    etags: dict[str, str] = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _lookup(self):
+        self.key = self.path.split("?")[0].lstrip("/")
+        data = self.objects.get(self.key)
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        return data
+
+    def _send_headers(self, status: int, data: bytes, length: int):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("ETag", f'"{self.etags[self.key]}"')
+        self.send_header("Last-Modified", formatdate(usegmt=True))
+        self.end_headers()
+
+    def do_HEAD(self):
+        time.sleep(FAKE_LATENCY_MS / 1000)
+        data = self._lookup()
+        if data is not None:
+            self._send_headers(200, data, len(data))
+
+    def do_GET(self):
+        time.sleep(FAKE_LATENCY_MS / 1000)
+        data = self._lookup()
+        if data is None:
+            return
+        start, end, status = 0, len(data) - 1, 200
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+            status = 206
+        body = memoryview(data)[start:end + 1]
+        self._send_headers(status, data, len(body))
+
+        # Throttle each connection to FAKE_BANDWIDTH_MBPS
+        chunk = 256 * 1024
+        for offset in range(0, len(body), chunk):
+            self.wfile.write(body[offset:offset + chunk])
+            time.sleep(chunk / (FAKE_BANDWIDTH_MBPS * 1024 * 1024))
+
+
+def best_of(fn, rounds: int = 3) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    spool = tempfile.mkdtemp(prefix="palabra-prefetch-")
+
+    # Settings are read at import time, so point them at the fake server first
+    os.environ.update({
+        "MINIO_ENDPOINT": f"127.0.0.1:{server.server_address[1]}",
+        "MINIO_ACCESS_KEY": "minioadmin",
+        "MINIO_SECRET_KEY": "minioadmin",
+        "MINIO_SSL": "false",
+        "MINIO_BUCKET": BUCKET,
+        "PREFETCH_DIR": spool,
+    })
+    from worker.storage.minio_client import get_minio_client, iter_object, read_object, read_range
+    from worker.storage.prefetch import prefetch_object, take_prefetched
+
+    small, large = os.urandom(SMALL_MB << 20), os.urandom(LARGE_MB << 20)
+    FakeS3Handler.objects = {f"{BUCKET}/small.epub": small, f"{BUCKET}/large.pdf": large}
+    FakeS3Handler.etags = {key: hashlib.md5(data).hexdigest() for key, data in FakeS3Handler.objects.items()}
+    client = get_minio_client()
+    print(f"🪣 Fake S3 at {os.environ['MINIO_ENDPOINT']}: {FAKE_LATENCY_MS:.0f} ms latency, "
+          f"{FAKE_BANDWIDTH_MBPS:.0f} MB/s per connection")
+
+    # --- Correctness ---
+    assert get_minio_client() is client, "client is not reused within a process"
+    assert read_object(client, BUCKET, "small.epub", len(small)) == small
+    assert read_object(client, BUCKET, "large.pdf", len(large)) == large
+    assert b"".join(iter_object(client, BUCKET, "large.pdf", len(large))) == large
+    assert read_range(client, BUCKET, "large.pdf", 12345, 678) == large[12345:12345 + 678]
+
+    etag = client.stat_object(BUCKET, "small.epub").etag
+    prefetch_object(BUCKET, "small.epub")
+    assert take_prefetched(BUCKET, "small.epub", etag) == small
+    assert take_prefetched(BUCKET, "small.epub", etag) is None, "spool entry was not consumed"
+    assert take_prefetched(BUCKET, "small.epub", "stale-etag") is None
+    print("✅ Ranged reads and prefetch spool are byte-identical to the source objects")
+
+    # --- Ranged GETs ---
+    size = len(large)
+    single = best_of(lambda: b"".join(iter_object(client, BUCKET, "large.pdf", size, workers=1)))
+    ranged = best_of(lambda: read_object(client, BUCKET, "large.pdf", size))
+    print(f"⏱️  {LARGE_MB} MiB single GET:   {single:.2f}s ({LARGE_MB / single:,.0f} MiB/s)")
+    print(f"⚡ {LARGE_MB} MiB ranged GETs:  {ranged:.2f}s ({LARGE_MB / ranged:,.0f} MiB/s, {single / ranged:.1f}x)")
+
+    # --- Prefetch ---
+    def fetch_cold():
+        stat = client.stat_object(BUCKET, "small.epub")
+        return read_object(client, BUCKET, "small.epub", stat.size)
+
+    def fetch_prefetched():
+        stat = client.stat_object(BUCKET, "small.epub")
+        return take_prefetched(BUCKET, "small.epub", stat.etag)
+
+    cold = best_of(fetch_cold)
+    warm = float("inf")
+    for _ in range(3):
+        prefetch_object(BUCKET, "small.epub")
+        start = time.perf_counter()
+        assert fetch_prefetched() == small
+        warm = min(warm, time.perf_counter() - start)
+    print(f"⏱️  {SMALL_MB} MiB fetch from server:  {cold * 1000:.0f} ms")
+    print(f"⚡ {SMALL_MB} MiB fetch prefetched:   {warm * 1000:.0f} ms (stat + spool read)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
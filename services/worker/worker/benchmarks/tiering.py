@@ -0,0 +1,115 @@
+"""
+Benchmark and equivalence check for build_dataset's dedupe and tiering stage.
+
+Generates synthetic (lemma, pos, zipf) candidate rows — with repeated
+lemmas and bucketed Zipf scores, so ties are common as in wordfreq — and
+runs the original dict/sort/per-row implementation against the vectorized
+dedupe_lemmas() + assign_difficulty_by_rank(). Asserts the rendered CSV is
+identical and reports the time of each at every size.
+
+Usage:
+    python -m worker.benchmarks.tiering
+    SIZES=50000,500000 python -m worker.benchmarks.tiering
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from worker.tasks.build_dataset import (
+    DEFAULT_DIFFICULTY_CUTS,
+    assign_difficulty_by_rank,
+    dedupe_lemmas,
+)
+
+SIZES = [int(s) for s in os.getenv("SIZES", "50000,500000,5000000").split(",")]
+POS_TAGS = ["NOUN", "VERB", "ADJ", "ADV", "PROPN", "ADP"]
+
+
+def legacy_assign_difficulty_by_rank(index: int, total: int) -> int:
+    pct = index / total
+    if pct < 0.01:
+        return 1
+    elif pct < 0.03:
+        return 2
+    elif pct < 0.07:
+        return 3
+    elif pct < 0.15:
+        return 4
+    elif pct < 0.30:
+        return 5
+    return 6
+
+
+def legacy_tiering(lemma_data) -> pd.DataFrame:
+    """The dedupe and tier assignment as they shipped before vectorization."""
+    lemma_dict = {}
+    for lemma, pos, zipf in lemma_data:
+        if lemma not in lemma_dict or zipf > lemma_dict[lemma]["zipf"]:
+            lemma_dict[lemma] = {"pos": pos, "zipf": zipf}
+    sorted_lemmas = sorted(lemma_dict.items(), key=lambda x: x[1]["zipf"], reverse=True)
+
+    total = len(sorted_lemmas)
+    data = [
+        {
+            "word": lemma,
+            "pos": info["pos"],
+            "language": "es",
+            "difficulty": legacy_assign_difficulty_by_rank(i, total),
+            "zipf_score": info["zipf"],
+        }
+        for i, (lemma, info) in enumerate(sorted_lemmas)
+    ]
+    counts = {lvl: 0 for lvl in range(1, 7)}
+    for d in data:
+        counts[d["difficulty"]] += 1
+    return pd.DataFrame(data), [counts[lvl] for lvl in range(1, 7)]
+
+
+def vectorized_tiering(lemma_data) -> pd.DataFrame:
+    lemmas = dedupe_lemmas(lemma_data)
+    difficulty = assign_difficulty_by_rank(len(lemmas), np.asarray(DEFAULT_DIFFICULTY_CUTS))
+    df = pd.DataFrame({
+        "word": lemmas["word"].to_numpy(),
+        "pos": lemmas["pos"].to_numpy(),
+        "language": "es",
+        "difficulty": difficulty,
+        "zipf_score": lemmas["zipf_score"].to_numpy(),
+    })
+    return df, np.bincount(difficulty, minlength=7)[1:].tolist()
+
+
+def candidates(n: int, seed: int = 0):
+    """n candidate rows over roughly n/3 distinct lemmas."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"lema{i}" for i in range(max(n // 3, 1))], dtype=object)
+    lemmas = vocab[rng.integers(0, len(vocab), n)]
+    # wordfreq frequencies are bucketed, so Zipf scores repeat
+    zipfs = np.round(rng.uniform(1.0, 7.5, n), 2)
+    pos = np.array(POS_TAGS, dtype=object)[rng.integers(0, len(POS_TAGS), n)]
+    return list(zip(lemmas.tolist(), pos.tolist(), zipfs.tolist()))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(f"{'rows':>10} {'lemmas':>9} {'legacy':>9} {'vectorized':>11} {'speedup':>8}")
+    for n in SIZES:
+        lemma_data = candidates(n)
+        (expected, expected_counts), before = timed(legacy_tiering, lemma_data)
+        (actual, actual_counts), after = timed(vectorized_tiering, lemma_data)
+
+        if expected.to_csv(index=False) != actual.to_csv(index=False) or expected_counts != actual_counts:
+            raise SystemExit(f"💥 Output differs from the legacy implementation at {n:,} rows")
+        print(f"{n:>10,} {len(actual):>9,} {before:>8.2f}s {after:>10.2f}s {before / after:>7.1f}x")
+    print("✅ Output is identical to the legacy implementation at every size")
+
+
+if __name__ == "__main__":
+    main()
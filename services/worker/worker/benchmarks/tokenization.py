@@ -0,0 +1,82 @@
+"""
+Scaling of intra-book parallel tokenization (extractor.count_tokens).
+
+Builds a large lower-cased fixture text (Zipf-sampled words from wordfreq's
+list for LANGUAGE, with punctuation, numbers and paragraph breaks), counts
+it serially, then with a pool of each size in WORKERS. Every parallel
+count is checked to be identical to the serial one. Also reports what the
+pool costs on a small book, which is what PARALLEL_TOKENIZE_MIN_CHARS
+protects against.
+
+Speedups are bounded by the machine's CPUs (printed first).
+
+Usage:
+    python -m worker.benchmarks.tokenization
+    TEXT_MB=50 WORKERS=1,2,4,8 python -m worker.benchmarks.tokenization
+"""
+
+import os
+import time
+
+import numpy as np
+from wordfreq import top_n_list
+
+from worker.nlp.extractor import count_tokens
+from worker.nlp.language_profile import get_language_profile
+
+LANGUAGE = os.getenv("LANGUAGE", "es")
+TEXT_MB = float(os.getenv("TEXT_MB", 20))
+WORKERS = [int(w) for w in os.getenv("WORKERS", "1,2,4,8").split(",")]
+ROUNDS = int(os.getenv("ROUNDS", 3))
+SMALL_BOOK_CHARS = 200_000
+PARAGRAPH_WORDS = 120
+
+
+def make_text(n_chars: int, seed: int = 0) -> str:
+    """Zipf-distributed words with some punctuation, numbers and paragraph breaks, lower-cased."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array(top_n_list(LANGUAGE, 50_000) + ["1984", "3,5", "—", "«hola»", "¿qué?", "x-y"], dtype=object)
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    weights /= weights.sum()
+    n_words = int(n_chars / 6)
+    words = vocab[rng.choice(len(vocab), size=n_words, p=weights)]
+    separators = rng.choice(np.array([" ", " ", " ", " ", ", ", ". ", "; "], dtype=object), size=n_words)
+    separators[PARAGRAPH_WORDS - 1::PARAGRAPH_WORDS] = ".\n\n"
+    return "".join(np.char.add(words.astype(str), separators.astype(str)).tolist()).lower()
+
+
+def best_of(fn, rounds: int = ROUNDS):
+    best, result = float("inf"), None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    get_language_profile(LANGUAGE)
+    print(f"🖥️  {os.cpu_count()} CPU(s)")
+    text = make_text(int(TEXT_MB * 1_000_000))
+    print(f"📖 Fixture: {len(text) / 1e6:.1f}M characters of '{LANGUAGE}' text")
+
+    serial_seconds, expected = best_of(lambda: count_tokens(text, LANGUAGE, workers=1))
+    print(f"  serial      {serial_seconds:7.2f}s  {len(text) / serial_seconds / 1e6:5.1f}M chars/s  "
+          f"({sum(expected.values()):,} tokens, {len(expected):,} forms)")
+
+    for workers in WORKERS:
+        seconds, counter = best_of(lambda: count_tokens(text, LANGUAGE, workers=workers, min_chars=0))
+        assert counter == expected, f"{workers}-worker counts differ from the serial count"
+        speedup = serial_seconds / seconds
+        print(f"  {workers} worker(s) {seconds:7.2f}s  {speedup:5.2f}x  efficiency {100 * speedup / workers:5.1f}%  ✅ identical")
+
+    small = text[:SMALL_BOOK_CHARS]
+    serial_small, expected_small = best_of(lambda: count_tokens(small, LANGUAGE, workers=1))
+    pooled_small, counter_small = best_of(lambda: count_tokens(small, LANGUAGE, workers=max(WORKERS), min_chars=0))
+    assert counter_small == expected_small
+    print(f"\n📄 {SMALL_BOOK_CHARS:,}-character book: serial {serial_small * 1000:.0f} ms, "
+          f"{max(WORKERS)}-process pool {pooled_small * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
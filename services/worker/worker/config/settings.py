@@ -13,12 +13,81 @@ MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
 MINIO_BUCKET = os.getenv("MINIO_BUCKET")
 MINIO_USE_SSL = os.getenv("MINIO_SSL").lower() == "true"
+MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
+
+# Connections kept per process, and concurrent ranged GETs for large objects
+STORAGE_POOL_SIZE = int(os.getenv("STORAGE_POOL_SIZE", 10))
+RANGED_GET_THRESHOLD = int(os.getenv("RANGED_GET_THRESHOLD", 16 * 1024 * 1024))
+RANGED_GET_PART_SIZE = int(os.getenv("RANGED_GET_PART_SIZE", 8 * 1024 * 1024))
+RANGED_GET_WORKERS = int(os.getenv("RANGED_GET_WORKERS", 4))
+
+# Next queued book is downloaded into this spool while the current one is lemmatized
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_DIR = os.getenv("PREFETCH_DIR", "/tmp/palabra-prefetch")
+PREFETCH_WAIT_SECONDS = float(os.getenv("PREFETCH_WAIT_SECONDS", 30))
+PREFETCH_TTL_SECONDS = int(os.getenv("PREFETCH_TTL_SECONDS", 3600))
 
 # --- Redis ---
 REDIS_URL = os.getenv("REDIS_URL")
+# Connections in the enqueue API's asyncio pool (requests wait for a free one)
+REDIS_POOL_SIZE = int(os.getenv("REDIS_POOL_SIZE", 20))
 
 # --- Apache Tika ---
 TIKA_SERVER_ENDPOINT = os.getenv("TIKA_SERVER_ENDPOINT")
 
+# Books at or above this size are streamed through Tika instead of buffered
+STREAM_THRESHOLD_BYTES = int(os.getenv("STREAM_THRESHOLD_BYTES", 32 * 1024 * 1024))
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 1024 * 1024))
+
 # --- Language ---
 LANGUAGE_CODE = os.getenv("LANGUAGE_CODE", "es")
+
+# Languages this worker serves (listens on their books-<lang> queues and preloads their models)
+WORKER_LANGUAGES = [l.strip() for l in os.getenv("WORKER_LANGUAGES", LANGUAGE_CODE).split(",") if l.strip()]
+
+# Most per-language spaCy models kept loaded in one process
+MAX_LOADED_MODELS = int(os.getenv("MAX_LOADED_MODELS", 2))
+
+# --- Lemma cache ---
+LEMMA_CACHE_SIZE = int(os.getenv("LEMMA_CACHE_SIZE", 200_000))
+
+# --- Enqueue backpressure (0 disables a limit) ---
+# New jobs get 429 + Retry-After past this many jobs ahead of them, or this estimated wait
+ENQUEUE_MAX_DEPTH = int(os.getenv("ENQUEUE_MAX_DEPTH", 5000))
+ENQUEUE_MAX_WAIT_SECONDS = float(os.getenv("ENQUEUE_MAX_WAIT_SECONDS", 6 * 3600))
+# Per-book processing time assumed until workers have reported real timings
+ENQUEUE_DEFAULT_BOOK_SECONDS = float(os.getenv("ENQUEUE_DEFAULT_BOOK_SECONDS", 10))
+
+# --- Batch processing ---
+BATCH_FETCH_WORKERS = int(os.getenv("BATCH_FETCH_WORKERS", 4))
+BATCH_MAX_BOOKS = int(os.getenv("BATCH_MAX_BOOKS", 50))
+
+# --- Word id cache ---
+WORD_ID_CACHE_SIZE = int(os.getenv("WORD_ID_CACHE_SIZE", 100_000))
+
+# --- Worker pool ---
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 1))
+POOL_STATS_INTERVAL = int(os.getenv("POOL_STATS_INTERVAL", 300))
+
+# --- Tokenization ---
+# Extracted texts of at least this many characters are counted in a process pool
+PARALLEL_TOKENIZE_MIN_CHARS = int(os.getenv("PARALLEL_TOKENIZE_MIN_CHARS", 2_000_000))
+# Pool size per job; defaults to the CPUs left per forked worker
+TOKENIZE_WORKERS = int(os.getenv("TOKENIZE_WORKERS", max(1, (os.cpu_count() or 1) // WORKER_CONCURRENCY)))
+
+# --- spaCy ---
+SPACY_MODEL = os.getenv("SPACY_MODEL", "es_core_news_lg")
+# Per-language overrides, e.g. "en=en_core_web_md,fr=fr_core_news_md"
+SPACY_MODELS = os.getenv("SPACY_MODELS", "")
+LEMMATIZER_VECTORS = os.getenv("LEMMATIZER_VECTORS", "true").lower() == "true"
+LEMMA_LOOKUP_PATH = os.getenv("LEMMA_LOOKUP_PATH")
+
+# --- Coverage engine ---
+# Seconds between polls of the books-written stream, and between full reloads
+COVERAGE_REFRESH_SECONDS = float(os.getenv("COVERAGE_REFRESH_SECONDS", 5))
+COVERAGE_FULL_REFRESH_SECONDS = float(os.getenv("COVERAGE_FULL_REFRESH_SECONDS", 3600))
+COVERAGE_STREAM_MAXLEN = int(os.getenv("COVERAGE_STREAM_MAXLEN", 100_000))
+
+# --- Profiling (per job, enqueue with profile=true) ---
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", 40))
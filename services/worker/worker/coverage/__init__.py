@@ -0,0 +1,2 @@
+from worker.coverage.engine import CoverageEngine, CoverageResult, LEVELS
+from worker.coverage.events import publish_books_written
@@ -0,0 +1,431 @@
+"""
+In-memory "known words" coverage over book_words.
+
+Answers "what share of each book's tokens does this learner already know?"
+for thousands of books at once, without joining book_words against words
+per request.
+
+Layout: books are stored in segments, each a CSR-style block of sorted
+word id arrays with aligned counts:
+
+    offsets  int64[n_books + 1]   book i owns entries offsets[i]:offsets[i+1]
+    word_ids int32[n_entries]     sorted within each book
+    counts   int32[n_entries]
+    rows     int32[n_entries]     owning book of each entry
+    levels   int8[n_entries]      words.difficulty of each entry (0 = unrated)
+
+A learner's known words become a boolean mask over word ids; one gather
+(mask[word_ids]) and one bincount per segment then give known tokens per
+book and per CEFR level for every book in the segment.
+
+Incremental refresh: process_book appends the ids of books it writes to a
+Redis stream (worker.coverage.events). refresh() reads the stream from where
+it left off and loads just those books into a new small segment; older
+copies of those books are masked out. Segments are merged back into one
+when there are too many of them or too many dead rows.
+
+Segments are never changed in place. A refresh builds the new segments,
+levels and index off to the side and publishes them as one Snapshot, so a
+query running on another thread always reads a consistent set.
+"""
+
+import copy
+import tempfile
+import threading
+import time
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from redis import Redis, RedisError
+from sqlalchemy import text
+
+from worker.config.settings import COVERAGE_FULL_REFRESH_SECONDS, COVERAGE_REFRESH_SECONDS
+from worker.coverage.events import BOOKS_WRITTEN_STREAM
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Index = words.difficulty (NULL → 0), as assigned by build_dataset (DIFFICULTY_LABELS)
+LEVELS = ("unrated", "A1", "A2", "B1", "B2", "C1", "C2")
+
+# Below 1/SUBSET_FRACTION of a segment's books, only their entries are scanned
+SUBSET_FRACTION = 4
+
+# Compaction triggers
+MAX_SEGMENTS = 8
+MAX_DEAD_FRACTION = 0.2
+
+
+class Segment:
+    """An immutable block of books in CSR layout; retiring rows or relevelling makes a copy."""
+
+    def __init__(self, book_ids: list[str], offsets: np.ndarray, word_ids: np.ndarray,
+                 counts: np.ndarray, difficulty: np.ndarray):
+        self.book_ids = book_ids
+        self.offsets = offsets
+        self.word_ids = word_ids
+        self.counts = counts
+        self.rows = np.repeat(np.arange(len(book_ids), dtype=np.int32), np.diff(offsets))
+        self.alive = np.ones(len(book_ids), dtype=bool)
+        self.set_difficulty(difficulty)
+
+    def __len__(self):
+        return len(self.book_ids)
+
+    @property
+    def dead(self) -> int:
+        return len(self.book_ids) - int(self.alive.sum())
+
+    def set_difficulty(self, difficulty: np.ndarray):
+        """(Re)compute per-entry levels and per-book token totals by level."""
+        ids = np.minimum(self.word_ids, len(difficulty) - 1)
+        self.levels = np.where(self.word_ids < len(difficulty), difficulty[ids], 0).astype(np.int8)
+        self.level_tokens = sum_by_level(self.rows, self.levels, self.counts, len(self.book_ids))
+
+    def with_difficulty(self, difficulty: np.ndarray) -> "Segment":
+        """A copy with levels from difficulty (the word arrays are shared)."""
+        segment = copy.copy(self)
+        segment.set_difficulty(difficulty)
+        return segment
+
+    def retire(self, rows: list[int]) -> "Segment":
+        """A copy with the given books masked out."""
+        segment = copy.copy(self)
+        segment.alive = self.alive.copy()
+        segment.alive[rows] = False
+        return segment
+
+    def entries(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Entry positions of the given books, and the index into rows each belongs to."""
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        owners = np.repeat(np.arange(len(rows), dtype=np.int32), lengths)
+        # Position k of book j sits at starts[j] + (k - entries before book j)
+        shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return np.arange(int(lengths.sum()), dtype=np.int64) + shifts, owners
+
+    def known_by_level(self, known: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Known tokens per level for a boolean known-word mask, for every book
+        in the segment or, more cheaply for a few of them, just `rows`.
+        """
+        if rows is None:
+            word_ids, counts, levels, owners = self.word_ids, self.counts, self.levels, self.rows
+            n = len(self.book_ids)
+        else:
+            positions, owners = self.entries(rows)
+            word_ids, counts, levels = self.word_ids[positions], self.counts[positions], self.levels[positions]
+            n = len(rows)
+        hits = known[np.minimum(word_ids, len(known) - 1)] & (word_ids < len(known))
+        return sum_by_level(owners, levels, np.where(hits, counts, 0), n)
+
+
+def sum_by_level(rows: np.ndarray, levels: np.ndarray, weights: np.ndarray, n: int) -> np.ndarray:
+    """Sum weights into an (n, len(LEVELS)) matrix by (row, level)."""
+    keys = rows.astype(np.int64) * len(LEVELS) + levels
+    return np.bincount(keys, weights=weights, minlength=n * len(LEVELS)).reshape(n, len(LEVELS))
+
+
+def build_segment(frame: pd.DataFrame, difficulty: np.ndarray) -> Segment:
+    """Build a segment from (book_id, word_id, count) rows sorted by book_id, word_id."""
+    codes, book_ids = pd.factorize(frame["book_id"], sort=False)
+    offsets = np.zeros(len(book_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(book_ids)), out=offsets[1:])
+    return Segment(
+        [str(b) for b in book_ids],
+        offsets,
+        frame["word_id"].to_numpy(dtype=np.int32),
+        frame["count"].to_numpy(dtype=np.int32),
+        difficulty,
+    )
+
+
+def merge_segments(segments: list["Segment"], difficulty: np.ndarray) -> Segment:
+    """Concatenate the live books of several segments into one."""
+    book_ids, lengths, word_ids, counts = [], [], [], []
+    for segment in segments:
+        keep = np.flatnonzero(segment.alive)
+        if not len(keep):
+            continue
+        entry_mask = segment.alive[segment.rows]
+        book_ids += [segment.book_ids[i] for i in keep]
+        lengths.append(np.diff(segment.offsets)[keep])
+        word_ids.append(segment.word_ids[entry_mask])
+        counts.append(segment.counts[entry_mask])
+    if not book_ids:
+        empty = np.zeros(0, dtype=np.int32)
+        return Segment([], np.zeros(1, dtype=np.int64), empty, empty, difficulty)
+
+    offsets = np.zeros(len(book_ids) + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(lengths), out=offsets[1:])
+    return Segment(book_ids, offsets, np.concatenate(word_ids), np.concatenate(counts), difficulty)
+
+
+def read_frame(conn, query: str, params: Optional[dict] = None) -> pd.DataFrame:
+    """Stream a (book_id, word_id, count) query out of Postgres with COPY."""
+    # Spooled through a temp file: the CSV of all book_words can run to gigabytes
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as spool:
+        cursor = conn.connection.cursor()
+        try:
+            sql = cursor.mogrify(query, params or {}).decode("utf-8")
+            cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", spool)
+        finally:
+            cursor.close()
+        spool.seek(0)
+        return pd.read_csv(spool, names=["book_id", "word_id", "count"],
+                           dtype={"book_id": "category", "word_id": np.int32, "count": np.int32})
+
+
+def read_difficulty(conn) -> np.ndarray:
+    """words.difficulty indexed by word id (0 where NULL or missing)."""
+    rows = conn.execute(text("SELECT id, COALESCE(difficulty, 0) FROM words")).all()
+    if not rows:
+        return np.zeros(1, dtype=np.int8)
+    ids, levels = np.array(rows, dtype=np.int64).T
+    difficulty = np.zeros(int(ids.max()) + 1, dtype=np.int8)
+    difficulty[ids] = np.clip(levels, 0, len(LEVELS) - 1)
+    return difficulty
+
+
+class CoverageResult:
+    """Per-book token totals and known tokens, split by CEFR level."""
+
+    def __init__(self, book_ids: list[str], level_tokens: np.ndarray, level_known: np.ndarray):
+        self.book_ids = book_ids
+        self.level_tokens = level_tokens
+        self.level_known = level_known
+        self.tokens = level_tokens.sum(axis=1)
+        self.known_tokens = level_known.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.coverage = np.where(self.tokens > 0, self.known_tokens / self.tokens, 0.0)
+
+    def __len__(self):
+        return len(self.book_ids)
+
+    def to_dicts(self) -> list[dict]:
+        results = []
+        for i, book_id in enumerate(self.book_ids):
+            levels = {}
+            for level, name in enumerate(LEVELS):
+                tokens = int(self.level_tokens[i, level])
+                if tokens:
+                    known = int(self.level_known[i, level])
+                    levels[name] = {"tokens": tokens, "known": known, "coverage": round(known / tokens, 4)}
+            results.append({
+                "book_id": book_id,
+                "tokens": int(self.tokens[i]),
+                "known_tokens": int(self.known_tokens[i]),
+                "coverage": round(float(self.coverage[i]), 4),
+                "levels": levels,
+            })
+        return results
+
+
+class Snapshot(NamedTuple):
+    """Everything a query reads, published by refreshes in one assignment."""
+
+    difficulty: np.ndarray
+    segments: tuple[Segment, ...]
+    # book_id → (position in segments, row in that segment)
+    index: dict[str, tuple[int, int]]
+
+
+def snapshot_of(difficulty: np.ndarray, segments: Iterable[Segment]) -> Snapshot:
+    segments = tuple(segments)
+    index = {}
+    for position, segment in enumerate(segments):
+        for row in np.flatnonzero(segment.alive):
+            index[segment.book_ids[row]] = (position, int(row))
+    return Snapshot(difficulty, segments, index)
+
+
+class CoverageEngine:
+    """book_words held in memory as sorted id/count arrays, refreshed incrementally."""
+
+    def __init__(self, engine, connection: Optional[Redis] = None):
+        self.engine = engine
+        self.connection = connection
+        self.snapshot = snapshot_of(np.zeros(1, dtype=np.int8), [])
+        self.stream_id = "0-0"
+        self.loaded_at = 0.0
+        self.polled_at = 0.0
+        # Serializes loads and refreshes; queries read self.snapshot without it
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.snapshot.index)
+
+    @property
+    def segments(self) -> tuple[Segment, ...]:
+        return self.snapshot.segments
+
+    @property
+    def difficulty(self) -> np.ndarray:
+        return self.snapshot.difficulty
+
+    @property
+    def entries(self) -> int:
+        return sum(len(s.word_ids) for s in self.segments)
+
+    def _stream_tail(self) -> str:
+        if self.connection is None:
+            return "0-0"
+        try:
+            last = self.connection.xrevrange(BOOKS_WRITTEN_STREAM, count=1)
+        except RedisError as e:
+            logger.warning(f"⚠️ Could not read the books stream, incremental refresh disabled: {e}")
+            return "0-0"
+        return last[0][0].decode("utf-8") if last else "0-0"
+
+    def load(self):
+        """(Re)load every book from the database."""
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        start = time.perf_counter()
+        # Events after this point are replayed by refresh(), so none are lost during the load
+        stream_id = self._stream_tail()
+        with self.engine.connect() as conn:
+            difficulty = read_difficulty(conn)
+            frame = read_frame(conn, "SELECT book_id, word_id, count FROM book_words ORDER BY book_id, word_id")
+
+        self.snapshot = snapshot_of(difficulty, [build_segment(frame, difficulty)])
+        self.stream_id = stream_id
+        self.loaded_at = self.polled_at = time.monotonic()
+        logger.info(
+            f"📚 Coverage engine loaded {len(self):,} books / {len(frame):,} entries "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    def update_books(self, book_ids: Iterable[str]):
+        """Reload the given books' rows into a new segment, retiring their old copies."""
+        with self._lock:
+            self._update_books(book_ids)
+
+    def _update_books(self, book_ids: Iterable[str]):
+        book_ids = sorted({str(b) for b in book_ids})
+        if not book_ids:
+            return
+        current = self.snapshot
+        difficulty, segments = current.difficulty, list(current.segments)
+        with self.engine.connect() as conn:
+            frame = read_frame(
+                conn,
+                "SELECT book_id, word_id, count FROM book_words "
+                "WHERE book_id = ANY(%(ids)s::uuid[]) ORDER BY book_id, word_id",
+                {"ids": book_ids},
+            )
+            if len(frame) and frame["word_id"].max() >= len(difficulty):
+                # New words since the last load; their levels are needed too
+                difficulty = read_difficulty(conn)
+                segments = [segment.with_difficulty(difficulty) for segment in segments]
+
+        retired = {}
+        for book_id in book_ids:
+            old = current.index.get(book_id)
+            if old is not None:
+                retired.setdefault(old[0], []).append(old[1])
+        for position, rows in retired.items():
+            segments[position] = segments[position].retire(rows)
+
+        index = dict(current.index)
+        for book_id in book_ids:
+            index.pop(book_id, None)
+        if len(frame):
+            segment = build_segment(frame, difficulty)
+            segments.append(segment)
+            for row, book_id in enumerate(segment.book_ids):
+                index[book_id] = (len(segments) - 1, row)
+
+        rows = sum(len(s) for s in segments)
+        dead = sum(s.dead for s in segments)
+        if len(segments) > MAX_SEGMENTS or dead > MAX_DEAD_FRACTION * max(rows, 1):
+            self.snapshot = snapshot_of(difficulty, [merge_segments(segments, difficulty)])
+        else:
+            self.snapshot = Snapshot(difficulty, tuple(segments), index)
+
+    def refresh(self, force: bool = False):
+        """
+        Apply books written since the last refresh (at most every
+        COVERAGE_REFRESH_SECONDS), and reload everything every
+        COVERAGE_FULL_REFRESH_SECONDS to pick up deletions and difficulty changes.
+        """
+        with self._lock:
+            self._refresh(force)
+
+    def _refresh(self, force: bool):
+        now = time.monotonic()
+        if not self.loaded_at or now - self.loaded_at >= COVERAGE_FULL_REFRESH_SECONDS:
+            self._load()
+            return
+        if self.connection is None or (not force and now - self.polled_at < COVERAGE_REFRESH_SECONDS):
+            return
+        self.polled_at = now
+
+        try:
+            entries = self.connection.xread({BOOKS_WRITTEN_STREAM: self.stream_id})
+        except RedisError as e:
+            logger.warning(f"⚠️ Could not read the books stream: {e}")
+            return
+        book_ids = []
+        for _, messages in entries:
+            for message_id, fields in messages:
+                self.stream_id = message_id.decode("utf-8")
+                book_ids += fields[b"book_ids"].decode("utf-8").split(",")
+        if book_ids:
+            self._update_books(book_ids)
+            logger.info(f"🔄 Coverage engine refreshed {len(set(book_ids))} books")
+
+    @staticmethod
+    def known_mask(known_word_ids: Iterable[int], size: int) -> np.ndarray:
+        ids = np.fromiter(known_word_ids, dtype=np.int64)
+        ids = ids[(ids >= 0) & (ids < size)]
+        mask = np.zeros(size, dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def coverage(self, known_word_ids: Iterable[int], book_ids: Optional[Iterable[str]] = None) -> CoverageResult:
+        """
+        Token-weighted coverage of known_word_ids for book_ids (all loaded
+        books if None). Books that aren't loaded are left out of the result.
+        """
+        # Read one snapshot throughout; a concurrent refresh publishes a new one
+        snapshot = self.snapshot
+        known = self.known_mask(known_word_ids, len(snapshot.difficulty))
+
+        if book_ids is None:
+            wanted = None
+        else:
+            wanted = {}
+            for book_id in book_ids:
+                location = snapshot.index.get(str(book_id))
+                if location is not None:
+                    wanted.setdefault(location[0], []).append((str(book_id), location[1]))
+
+        out_ids, out_tokens, out_known = [], [], []
+        for position, segment in enumerate(snapshot.segments):
+            if wanted is None:
+                rows = np.flatnonzero(segment.alive)
+                ids = [segment.book_ids[i] for i in rows]
+            else:
+                picks = wanted.get(position)
+                if not picks:
+                    continue
+                ids = [book_id for book_id, _ in picks]
+                rows = np.fromiter((row for _, row in picks), dtype=np.int64, count=len(picks))
+            if not len(rows):
+                continue
+            if len(rows) * SUBSET_FRACTION < len(segment):
+                known_levels = segment.known_by_level(known, rows)
+            else:
+                known_levels = segment.known_by_level(known)[rows]
+            out_ids += ids
+            out_tokens.append(segment.level_tokens[rows])
+            out_known.append(known_levels)
+
+        if not out_ids:
+            empty = np.zeros((0, len(LEVELS)))
+            return CoverageResult([], empty, empty)
+        return CoverageResult(out_ids, np.concatenate(out_tokens), np.concatenate(out_known))
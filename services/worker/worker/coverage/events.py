@@ -0,0 +1,29 @@
+"""
+"Books written" notifications for the coverage engine.
+
+Whenever book_words rows of a book are (re)written, the book ids are
+appended to a capped Redis stream. Each coverage engine keeps its own read
+position, so any number of them can follow the same stream.
+"""
+
+from typing import Iterable, Optional
+
+from redis import Redis, RedisError
+from worker.config.settings import COVERAGE_STREAM_MAXLEN
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BOOKS_WRITTEN_STREAM = "palabra:books:written"
+
+
+def publish_books_written(connection: Optional[Redis], book_ids: Iterable):
+    """Announce that these books' book_words changed (after the transaction committed)."""
+    book_ids = [str(b) for b in book_ids]
+    if connection is None or not book_ids:
+        return
+    try:
+        connection.xadd(BOOKS_WRITTEN_STREAM, {"book_ids": ",".join(book_ids)},
+                        maxlen=COVERAGE_STREAM_MAXLEN, approximate=True)
+    except RedisError as e:
+        logger.warning(f"⚠️ Could not publish written books: {e}")
@@ -0,0 +1,179 @@
+"""
+COPY-based bulk writers for the words, book_words and book_profiles tables.
+
+Rows are streamed with Postgres COPY into a temp staging table (temp
+tables skip WAL) and merged with a single INSERT … SELECT … ON CONFLICT,
+instead of one statement per row.
+
+All functions take a SQLAlchemy connection inside an open transaction.
+"""
+
+import csv
+from io import StringIO
+from itertools import islice
+from typing import Iterable
+
+# Rows rendered per batch, and bytes handed to COPY per read
+COPY_BATCH_ROWS = 5000
+COPY_READ_SIZE = 1 << 20
+
+
+class _CsvRowStream:
+    """File-like object that lazily renders rows as CSV for copy_expert."""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self._pending = ""
+
+    def _render_batch(self) -> str:
+        buffer = StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(islice(self._rows, COPY_BATCH_ROWS))
+        return buffer.getvalue()
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            batch = self._render_batch()
+            if not batch:
+                break
+            self._pending += batch
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def copy_rows(conn, table: str, columns: list[str], rows: Iterable[tuple]):
+    """Stream rows into table with COPY … FROM STDIN (CSV; None becomes NULL)."""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            _CsvRowStream(rows),
+            size=COPY_READ_SIZE,
+        )
+    finally:
+        cursor.close()
+
+
+def _create_stage(conn, name: str, definition: str):
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+    conn.exec_driver_sql(f"CREATE TEMP TABLE {name} ({definition}) ON COMMIT DROP")
+
+
+def upsert_words(conn, words: Iterable[str], language: str) -> dict[str, int]:
+    """
+    Ensure every word exists in `words` for language and return {word: id}.
+    Existing rows are left untouched.
+    """
+    words = set(words)
+    _create_stage(conn, "stage_words", "word text NOT NULL")
+    copy_rows(conn, "stage_words", ["word"], ((w,) for w in words))
+
+    # The outer SELECT can't see rows inserted by the CTE, so the union
+    # yields each word exactly once: freshly inserted or pre-existing.
+    rows = conn.exec_driver_sql(
+        """
+        WITH inserted AS (
+            INSERT INTO words (word, language)
+            SELECT word, %(lang)s FROM stage_words
+            ON CONFLICT (word, language) DO NOTHING
+            RETURNING id, word
+        )
+        SELECT id, word FROM inserted
+        UNION ALL
+        SELECT w.id, w.word FROM words w
+        JOIN stage_words s ON s.word = w.word
+        WHERE w.language = %(lang)s
+        """,
+        {"lang": language},
+    ).fetchall()
+    id_map = {r.word: r.id for r in rows}
+
+    # Words committed by a concurrent worker after our snapshot was taken
+    missing = words - id_map.keys()
+    if missing:
+        rows = conn.exec_driver_sql(
+            "SELECT id, word FROM words WHERE language = %(lang)s AND word = ANY(%(words)s)",
+            {"lang": language, "words": list(missing)},
+        ).fetchall()
+        id_map.update({r.word: r.id for r in rows})
+    return id_map
+
+
+def upsert_word_scores(conn, rows: Iterable[tuple]) -> int:
+    """
+    Upsert (word, language, difficulty, zipf_score) rows, overwriting the
+    scores of existing words. Returns the number of rows written.
+    """
+    _create_stage(
+        conn,
+        "stage_word_scores",
+        "word text NOT NULL, language text NOT NULL, difficulty integer, zipf_score double precision",
+    )
+    copy_rows(conn, "stage_word_scores", ["word", "language", "difficulty", "zipf_score"], rows)
+    result = conn.exec_driver_sql(
+        """
+        INSERT INTO words (word, language, difficulty, zipf_score, created)
+        SELECT DISTINCT ON (word, language) word, language, difficulty, zipf_score, NOW()
+        FROM stage_word_scores
+        ON CONFLICT (word, language)
+        DO UPDATE SET
+            difficulty = EXCLUDED.difficulty,
+            zipf_score = EXCLUDED.zipf_score
+        """
+    )
+    return result.rowcount
+
+
+def update_word_glosses(conn, rows: Iterable[tuple]) -> int:
+    """
+    Set the gloss of existing words from (word, language, gloss) rows.
+    Words not in the table are skipped. Returns the number of rows changed.
+    """
+    _create_stage(conn, "stage_word_glosses", "word text NOT NULL, language text NOT NULL, gloss text")
+    copy_rows(conn, "stage_word_glosses", ["word", "language", "gloss"], rows)
+    result = conn.exec_driver_sql(
+        """
+        UPDATE words w SET gloss = s.gloss
+        FROM stage_word_glosses s
+        WHERE w.word = s.word AND w.language = s.language
+          AND w.gloss IS DISTINCT FROM s.gloss
+        """
+    )
+    return result.rowcount
+
+
+def upsert_book_words(conn, rows: Iterable[tuple]) -> int:
+    """Upsert (book_id, word_id, count) rows into book_words. Returns rows written."""
+    _create_stage(conn, "stage_book_words", "book_id uuid NOT NULL, word_id integer NOT NULL, count integer NOT NULL")
+    copy_rows(conn, "stage_book_words", ["book_id", "word_id", "count"], rows)
+    result = conn.exec_driver_sql(
+        """
+        INSERT INTO book_words (book_id, word_id, count)
+        SELECT book_id, word_id, count FROM stage_book_words
+        ON CONFLICT (book_id, word_id)
+        DO UPDATE SET count = EXCLUDED.count
+        """
+    )
+    return result.rowcount
+
+
+def upsert_book_profiles(conn, columns: list[str], rows: Iterable[tuple]) -> int:
+    """Upsert book_profiles rows (columns starting with book_id). Returns rows written."""
+    conn.exec_driver_sql("DROP TABLE IF EXISTS stage_book_profiles")
+    # Same columns as book_profiles, without its defaults or constraints
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE stage_book_profiles ON COMMIT DROP AS "
+        f"SELECT {', '.join(columns)} FROM book_profiles WITH NO DATA"
+    )
+    copy_rows(conn, "stage_book_profiles", columns, rows)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns[1:])
+    result = conn.exec_driver_sql(
+        f"""
+        INSERT INTO book_profiles ({', '.join(columns)})
+        SELECT {', '.join(columns)} FROM stage_book_profiles
+        ON CONFLICT (book_id)
+        DO UPDATE SET {updates}, updated = NOW()
+        """
+    )
+    return result.rowcount
@@ -0,0 +1,152 @@
+"""
+Per-book difficulty profiles (the book_profiles table).
+
+One row per book summarises its book_words, so books can be listed or
+sorted by difficulty without touching book_words:
+- total_tokens, unique_lemmas
+- tokens_<level>: tokens per words.difficulty tier (unrated = NULL)
+- difficulty: token-weighted mean tier (1–6) of the rated tokens
+- avg_zipf, zipf_p10/p50/p90: token-weighted Zipf frequency of the book's
+  lemmas (p10 is the rare tail; unscored words count as 0)
+- coverage_curve: share of tokens covered by the book's own COVERAGE_RANKS
+  most frequent lemmas
+
+process_book computes the profile from its lemma counts in the transaction
+that writes book_words; worker.tasks.backfill_profiles builds profiles for
+older books, and rebuilds rows whose version is below PROFILE_VERSION.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from worker.db.bulk import upsert_book_profiles
+
+# Bump when the computation changes; the backfill rebuilds older rows
+PROFILE_VERSION = 1
+
+# Index = words.difficulty (NULL → 0), as assigned by build_dataset
+LEVEL_COLUMNS = ("tokens_unrated", "tokens_a1", "tokens_a2", "tokens_b1", "tokens_b2", "tokens_c1", "tokens_c2")
+
+COVERAGE_RANKS = (100, 500, 1000, 2000, 5000)
+ZIPF_PERCENTILES = (10, 50, 90)
+
+PROFILE_COLUMNS = [
+    "book_id", "language", "version", "total_tokens", "unique_lemmas", *LEVEL_COLUMNS,
+    "difficulty", "avg_zipf", "zipf_p10", "zipf_p50", "zipf_p90", "coverage_curve",
+]
+
+# Columns list_profiles can sort by
+SORT_COLUMNS = {
+    "difficulty", "avg_zipf", "zipf_p10", "zipf_p50", "zipf_p90",
+    "total_tokens", "unique_lemmas", "updated", *LEVEL_COLUMNS,
+}
+
+
+def compute_profile(counts, difficulty, zipf) -> dict:
+    """
+    Profile of one book from aligned per-lemma arrays: token counts,
+    difficulty tiers (0 = unrated) and Zipf scores.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    difficulty = np.clip(np.asarray(difficulty, dtype=np.int64), 0, len(LEVEL_COLUMNS) - 1)
+    zipf = np.asarray(zipf, dtype=np.float64)
+    total = int(counts.sum())
+    if not total:
+        raise ValueError("Cannot profile a book without tokens")
+
+    level_tokens = np.bincount(difficulty, weights=counts, minlength=len(LEVEL_COLUMNS)).astype(np.int64)
+    rated = total - int(level_tokens[0])
+    mean_level = float(level_tokens[1:] @ np.arange(1, len(LEVEL_COLUMNS))) / rated if rated else None
+
+    # Token-weighted percentiles: the lowest score whose cumulative share reaches p%
+    order = np.argsort(zipf, kind="stable")
+    cumulative = np.cumsum(counts[order])
+    positions = np.searchsorted(cumulative, np.array(ZIPF_PERCENTILES) / 100 * total)
+    percentiles = zipf[order][np.minimum(positions, len(order) - 1)]
+
+    by_frequency = np.cumsum(np.sort(counts)[::-1])
+    ranks = np.minimum(COVERAGE_RANKS, len(counts)) - 1
+
+    profile = {
+        "total_tokens": total,
+        "unique_lemmas": len(counts),
+        **{column: int(tokens) for column, tokens in zip(LEVEL_COLUMNS, level_tokens)},
+        "difficulty": mean_level,
+        "avg_zipf": float(zipf @ counts) / total,
+        "coverage_curve": [round(float(share), 4) for share in by_frequency[ranks] / total],
+    }
+    for p, value in zip(ZIPF_PERCENTILES, percentiles):
+        profile[f"zipf_p{p}"] = float(value)
+    return profile
+
+
+def profile_row(book_id, language: str, profile: dict) -> tuple:
+    """A PROFILE_COLUMNS row for COPY (the curve as a Postgres array literal)."""
+    values = {**profile, "book_id": book_id, "language": language, "version": PROFILE_VERSION}
+    values["coverage_curve"] = "{" + ",".join(str(share) for share in profile["coverage_curve"]) + "}"
+    return tuple(values[column] for column in PROFILE_COLUMNS)
+
+
+def word_scores(conn, word_ids: Iterable[int]) -> dict[int, tuple[int, float]]:
+    """{word id: (difficulty, zipf_score)}, with NULLs as 0."""
+    rows = conn.execute(
+        text("""
+            SELECT id, COALESCE(difficulty, 0), COALESCE(zipf_score, 0)
+            FROM words WHERE id = ANY(:ids)
+        """),
+        {"ids": list(word_ids)},
+    ).all()
+    return {word_id: (difficulty, zipf) for word_id, difficulty, zipf in rows}
+
+
+def write_profiles(conn, lemma_counters: dict, id_map: dict[str, int], language: str) -> int:
+    """
+    Compute and upsert the profiles of books just written to book_words
+    ({book_id: lemma_counter}, lemmas resolved through id_map). Returns rows written.
+    """
+    scores = word_scores(conn, {id_map[w] for c in lemma_counters.values() for w in c if w in id_map})
+    rows = []
+    for book_id, lemma_counter in lemma_counters.items():
+        entries = [(c, *scores.get(id_map[w], (0, 0.0))) for w, c in lemma_counter.items() if w in id_map]
+        if not entries:
+            continue
+        counts, difficulty, zipf = zip(*entries)
+        rows.append(profile_row(book_id, language, compute_profile(counts, difficulty, zipf)))
+    return upsert_book_profiles(conn, PROFILE_COLUMNS, rows) if rows else 0
+
+
+def copy_profile(conn, source_book_id, book_id) -> int:
+    """Copy source_book_id's profile to book_id (identical content). Returns rows written."""
+    if str(source_book_id) == str(book_id):
+        return 0
+    columns = ", ".join(PROFILE_COLUMNS[1:])
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in PROFILE_COLUMNS[1:])
+    return conn.execute(
+        text(f"""
+            INSERT INTO book_profiles (book_id, {columns})
+            SELECT :book_id, {columns} FROM book_profiles WHERE book_id = :source
+            ON CONFLICT (book_id) DO UPDATE SET {updates}, updated = NOW()
+        """),
+        {"book_id": book_id, "source": source_book_id},
+    ).rowcount
+
+
+def list_profiles(conn, language: Optional[str] = None, order_by: str = "difficulty",
+                  descending: bool = False, limit: int = 100, offset: int = 0) -> list[dict]:
+    """Profiles joined with their book's title, sorted by one of SORT_COLUMNS."""
+    if order_by not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort profiles by '{order_by}'; choose from {sorted(SORT_COLUMNS)}")
+    direction = "DESC" if descending else "ASC"
+    rows = conn.execute(
+        text(f"""
+            SELECT p.*, b.title
+            FROM book_profiles p JOIN books b ON b.id = p.book_id
+            WHERE CAST(:language AS text) IS NULL OR p.language = :language
+            ORDER BY p.{order_by} {direction} NULLS LAST, p.book_id
+            LIMIT :limit OFFSET :offset
+        """),
+        {"language": language, "limit": limit, "offset": offset},
+    ).mappings().all()
+    return [dict(row) for row in rows]
@@ -0,0 +1,80 @@
+"""
+Content-addressed record of processed books (the content_results table).
+
+Each row says: the object with this content hash, run through this
+pipeline (spaCy model + sanitizer version), produced the book_words rows
+of book_id, at a cost of cpu_seconds. Another book with the same content
+can then copy those rows instead of going through Tika and spaCy again.
+
+Rows disappear with their book (ON DELETE CASCADE), so a hit always
+points at live book_words.
+"""
+
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+
+
+class StoredResult(NamedTuple):
+    book_id: object
+    cpu_seconds: float
+
+
+def find_result(conn, content_hash: str, pipeline: str) -> Optional[StoredResult]:
+    row = conn.execute(
+        text("""
+            SELECT book_id, cpu_seconds FROM content_results
+            WHERE content_hash = :hash AND pipeline = :pipeline
+        """),
+        {"hash": content_hash, "pipeline": pipeline},
+    ).first()
+    return StoredResult(row.book_id, row.cpu_seconds) if row else None
+
+
+def find_language(conn, content_hash: str) -> Optional[str]:
+    """Language recorded for this content by any pipeline (identical content, identical language)."""
+    return conn.execute(
+        text("SELECT language FROM content_results WHERE content_hash = :hash LIMIT 1"),
+        {"hash": content_hash},
+    ).scalar()
+
+
+def copy_result(conn, source_book_id, book_id) -> int:
+    """Copy source_book_id's book_words rows to book_id. Returns rows written."""
+    if str(source_book_id) == str(book_id):
+        return 0
+    return conn.execute(
+        text("""
+            INSERT INTO book_words (book_id, word_id, count)
+            SELECT :book_id, word_id, count FROM book_words WHERE book_id = :source
+            ON CONFLICT (book_id, word_id)
+            DO UPDATE SET count = EXCLUDED.count
+        """),
+        {"book_id": book_id, "source": source_book_id},
+    ).rowcount
+
+
+def save_result(conn, content_hash: str, pipeline: str, language: str, book_id, cpu_seconds: float):
+    """Record book_id's book_words as the result for this content and pipeline."""
+    # book_words now hold this content and pipeline's output; the book's rows for
+    # older content (a re-upload) or older pipelines would point at the wrong words
+    conn.execute(
+        text("""
+            DELETE FROM content_results
+            WHERE book_id = :book_id AND NOT (content_hash = :hash AND pipeline = :pipeline)
+        """),
+        {"book_id": book_id, "hash": content_hash, "pipeline": pipeline},
+    )
+    conn.execute(
+        text("""
+            INSERT INTO content_results (content_hash, pipeline, language, book_id, cpu_seconds)
+            VALUES (:hash, :pipeline, :language, :book_id, :cpu_seconds)
+            ON CONFLICT (content_hash, pipeline)
+            DO UPDATE SET book_id = EXCLUDED.book_id,
+                          language = EXCLUDED.language,
+                          cpu_seconds = EXCLUDED.cpu_seconds,
+                          created = NOW()
+        """),
+        {"hash": content_hash, "pipeline": pipeline, "language": language,
+         "book_id": book_id, "cpu_seconds": cpu_seconds},
+    )
@@ -0,0 +1,83 @@
+"""
+Worker-level (word, language) → words.id cache.
+
+Warmed at startup with the most frequent words of a language, so hot
+vocabulary ("ser", "tener", "casa") never hits the database again. Misses
+are resolved through upsert_words, whose ON CONFLICT path keeps concurrent
+workers consistent, and added to the cache.
+
+RQ forks a work horse per job, so ids added during a job only serve the
+rest of that job (e.g. later books of a batch); they are gone once it
+exits. Only the warm() set, loaded in the parent by worker.main, carries
+over from job to job.
+
+Only add ids after the transaction that produced them has committed: a
+rolled-back insert would otherwise leave a dangling id in the cache.
+Words can still be deleted under a warm cache (load_dataset --delete);
+write_book_words then discards the stale ids and resolves them again.
+"""
+
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import text
+from worker.config.settings import WORD_ID_CACHE_SIZE
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WordIdCache:
+    """Size-capped LRU of word ids, keyed by (word, language)."""
+
+    def __init__(self, maxsize: int = WORD_ID_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._ids: OrderedDict[tuple[str, str], int] = OrderedDict()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get_many(self, words: Iterable[str], language: str) -> tuple[dict[str, int], list[str]]:
+        """Split words into ({word: id} for cached ones, [uncached words])."""
+        found = {}
+        missing = []
+        for word in words:
+            key = (word, language)
+            word_id = self._ids.get(key)
+            if word_id is None:
+                missing.append(word)
+            else:
+                self._ids.move_to_end(key)
+                found[word] = word_id
+        return found, missing
+
+    def discard(self, words: Iterable[str], language: str):
+        for word in words:
+            self._ids.pop((word, language), None)
+
+    def update(self, id_map: dict[str, int], language: str):
+        for word, word_id in id_map.items():
+            key = (word, language)
+            self._ids[key] = word_id
+            self._ids.move_to_end(key)
+        while len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def warm(self, engine, language: str):
+        """Preload the most frequent words of a language, up to the size cap."""
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("""
+                    SELECT id, word FROM words
+                    WHERE language = :lang
+                    ORDER BY zipf_score DESC NULLS LAST
+                    LIMIT :limit
+                """),
+                {"lang": language, "limit": self.maxsize},
+            ).fetchall()
+        # Least frequent first, so the most frequent end up most recently used
+        self.update({r.word: r.id for r in reversed(rows)}, language)
+        logger.info(f"🆔 Warmed word id cache with {len(rows)} '{language}' words")
+
+
+word_id_cache = WordIdCache()
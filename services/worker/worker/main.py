@@ -1,20 +1,38 @@
 """
 Main RQ worker entrypoint.
 Listens to Redis queues and executes background jobs with graceful shutdown.
+
+With --concurrency N (or WORKER_CONCURRENCY), the process loads the spaCy
+model once and forks N RQ workers that share its memory pages copy-on-write.
+
+With --languages es,en (or WORKER_LANGUAGES), the worker preloads those
+languages' models and listens on their books-<lang> queues, then on the
+shared "books" queue for books of unknown language. Interactive queues
+come first; the matching -bulk queues are only served when they are empty.
+
+The NLP stack is only imported by warm_up(), which runs once before the
+worker takes any jobs; importing this module stays cheap.
 """
 
+import argparse
+import gc
+import os
 import signal
 import sys
+import time
 import redis
 from rq import Worker
-from worker.config.settings import REDIS_URL
-
-# Import tasks so RQ knows them
-from worker.tasks import process_book  # noqa: F401
+from worker.config.settings import REDIS_URL, WORKER_LANGUAGES, WORKER_CONCURRENCY, POOL_STATS_INTERVAL
+from worker.nlp.languages import normalize_language
+from worker.task_queue import worker_queues
+from worker.utils.memory import process_memory
 
 # Global flag to handle stop signals
 should_stop = False
 
+# Define which queues this worker should process (set in main() from --languages)
+QUEUES = ["books"]
+
 
 def handle_signal(signum, frame):
     """Catch SIGTERM/SIGINT to allow graceful shutdown."""
@@ -23,21 +41,13 @@ def handle_signal(signum, frame):
     should_stop = True
 
 
-def main():
-    print("🚀 Starting Palabra RQ Worker...")
-
-    # Handle signals gracefully
-    signal.signal(signal.SIGTERM, handle_signal)
-    signal.signal(signal.SIGINT, handle_signal)
-
+def run_worker():
+    """Run a single RQ worker until a stop signal arrives."""
     # Connect to Redis
     redis_conn = redis.from_url(REDIS_URL)
 
-    # Define which queues this worker should process
-    queues = ["books"]
-
-    worker = Worker(queues=queues, connection=redis_conn)
-    print(f"🎧 Listening on queues: {queues}")
+    worker = Worker(queues=QUEUES, connection=redis_conn)
+    print(f"🎧 Listening on queues: {QUEUES}")
 
     try:
         while not should_stop:
@@ -49,6 +59,135 @@ def main():
             )
     except Exception as e:
         print(f"💥 Worker error: {e}")
+
+
+def spawn_child() -> int:
+    """Fork a child that runs an RQ worker on the parent's already-loaded model."""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Child: don't reuse the parent's pooled DB connections
+    from worker.db.connection import engine
+    engine.dispose(close=False)
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    try:
+        run_worker()
+    finally:
+        os._exit(0)
+
+
+def run_pool(concurrency: int):
+    """Supervise `concurrency` forked workers, respawning any that die."""
+    # Keep the GC from touching (and un-sharing) the pages of everything loaded so far
+    gc.freeze()
+
+    children = {spawn_child() for _ in range(concurrency)}
+    print(f"👶 Forked {concurrency} workers: {sorted(children)}")
+
+    last_stats = 0.0
+    while children:
+        if should_stop:
+            # Forward the stop request; each RQ worker finishes its current job
+            for pid in children:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            for pid in children:
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+            break
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            children.discard(pid)
+            print(f"⚠️ Worker {pid} exited with status {status}; respawning")
+            children.add(spawn_child())
+
+        if time.monotonic() - last_stats >= POOL_STATS_INTERVAL:
+            last_stats = time.monotonic()
+            for child in sorted(children):
+                print(f"📈 Worker {child} memory: {process_memory(child)}")
+
+        time.sleep(1)
+
+
+def warm_up(languages: list[str]):
+    """
+    Import the task modules and load everything jobs need before taking any:
+    the stopword lists used for language detection, the models of `languages`
+    (up to MAX_LOADED_MODELS) and their hot vocabulary ids. Work horses and
+    pool children are forked afterwards and inherit all of it.
+    """
+    start = time.perf_counter()
+
+    # Import tasks so RQ knows them
+    from worker.tasks import process_book, process_books_batch  # noqa: F401
+    from worker.db.connection import engine
+    from worker.db.word_ids import word_id_cache
+    from worker.nlp.language_detect import stopword_weights
+    from worker.nlp.registry import get_language_models, registry
+
+    stopword_weights()
+    for language in languages[:registry.max_loaded]:
+        get_language_models(language)
+        try:
+            word_id_cache.warm(engine, language)
+        except Exception as e:
+            print(f"⚠️ Could not warm word id cache for '{language}', filling it lazily: {e}")
+    # Close the warm-up's pooled connection: work horses forked from this
+    # process must not share its socket
+    engine.dispose()
+
+    memory = process_memory(os.getpid())
+    print(
+        f"🔥 Warm-up done in {time.perf_counter() - start:.1f}s "
+        f"(models: {', '.join(registry.loaded()) or 'none'}, RSS {memory.get('rss_mb', 0):.0f} MB)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Palabra RQ worker")
+    parser.add_argument(
+        "--concurrency", "-c", type=int, default=WORKER_CONCURRENCY,
+        help="number of forked workers sharing one loaded model",
+    )
+    parser.add_argument(
+        "--languages", "-l", default=",".join(WORKER_LANGUAGES),
+        help="comma-separated languages whose models are preloaded and whose queues are served",
+    )
+    args = parser.parse_args()
+
+    print("🚀 Starting Palabra RQ Worker...")
+
+    global QUEUES
+    languages = []
+    for value in args.languages.split(","):
+        language = normalize_language(value)
+        if language is None:
+            print(f"⚠️ Unsupported language '{value}', ignoring")
+        elif language not in languages:
+            languages.append(language)
+    QUEUES = worker_queues(languages)
+
+    warm_up(languages)
+
+    # Handle signals gracefully
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    try:
+        if args.concurrency > 1:
+            run_pool(args.concurrency)
+        else:
+            run_worker()
     finally:
         print("👋 Worker shutting down cleanly.")
         sys.exit(0)
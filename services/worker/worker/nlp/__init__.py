@@ -1 +1,6 @@
-from worker.nlp.extractor import extract_words_from_buffer
\ No newline at end of file
+# Resolved on first access: importing worker.nlp.languages must not pull in Tika/NLTK
+def __getattr__(name):
+    if name == "extract_words_from_buffer":
+        from worker.nlp.extractor import extract_words_from_buffer
+        return extract_words_from_buffer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,43 +1,244 @@
+import re
+import threading
 from io import BytesIO
 from collections import Counter
-from typing import Union, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from multiprocessing import get_context
+from typing import Iterable, Optional
 
+import requests
 from tika import parser
-from nltk.corpus import stopwords
-from wordfreq import tokenize
-from worker.config.settings import TIKA_SERVER_ENDPOINT
+from worker.config.settings import (
+    TIKA_SERVER_ENDPOINT,
+    STREAM_CHUNK_SIZE,
+    LANGUAGE_CODE,
+    PARALLEL_TOKENIZE_MIN_CHARS,
+    TOKENIZE_WORKERS,
+)
+from worker.utils.utils import extract_text_from_epub, extract_text_from_html
+from worker.nlp.language_profile import LanguageProfile, get_language_profile
+from worker.nlp.languages import normalize_language
+from worker.nlp.language_detect import language_from_metadata, detect_language
+from worker.utils.timing import StageTimer
 
-language = "es"
+# Used when a book's language is neither given, declared nor detectable
+DEFAULT_LANGUAGE = LANGUAGE_CODE
 
-def extract_words_from_buffer(data: bytes) -> Union[Counter[Any], tuple[Counter[str], Any]]:
+# Longest carry-over kept while waiting for whitespace between chunks
+MAX_CARRY = 64 * 1024
+
+# How much of the file to inspect when sniffing its format
+SNIFF_BYTES = 8 * 1024
+
+WHITESPACE_RE = re.compile(r"\s")
+
+# Text being counted by count_tokens' pool; set in the parent just before
+# forking, so workers read it copy-on-write instead of through a pipe
+_pool_text = None
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """
+    Detect formats we can extract in-process: "epub", "html" or "text".
+    Returns None for anything else (PDF, DOC, ...), which goes to Tika.
+    """
+    head = data[:SNIFF_BYTES]
+    if head.startswith(b"PK\x03\x04"):
+        # EPUB's first zip entry is an uncompressed "mimetype" file
+        return "epub" if head[30:58] == b"mimetypeapplication/epub+zip" else None
+    if b"\x00" in head or head.startswith(b"%PDF"):
+        return None
+
+    try:
+        sample = head.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        # A multi-byte character may straddle the sniff window
+        if e.start < len(head) - 3:
+            return None
+        sample = head[:e.start].decode("utf-8-sig")
+
+    start = sample.lstrip()[:256].lower()
+    if start.startswith(("<!doctype html", "<html")) or (start.startswith("<?xml") and "<html" in sample.lower()):
+        return "html"
+    if start.startswith(("{\\rtf", "<")):
+        return None
+    return "text"
+
+
+def extract_text_locally(data: bytes, fmt: str) -> Optional[str]:
+    """Extract text in-process for a sniffed format; None means fall back to Tika."""
+    if fmt == "epub":
+        return extract_text_from_epub(BytesIO(data))
+    if fmt == "html":
+        return extract_text_from_html(data)
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return None
+
+
+def choose_language(hint: Optional[str], metadata: Optional[dict], text: str) -> str:
+    """The given language if supported, else Tika's metadata, else a guess from the text."""
+    return (
+        normalize_language(hint)
+        or language_from_metadata(metadata or {})
+        or detect_language(text)
+        or DEFAULT_LANGUAGE
+    )
+
+
+def extract_words_from_buffer(data: bytes, timer: Optional[StageTimer] = None,
+                              language: Optional[str] = None) -> tuple[Counter[str], str]:
     """
     Extracts and tokenizes words from any text-based file.
 
-    Automatically detects the language using Tika's metadata,
-    falling back to DEFAULT_LANGUAGE if detection fails.
+    EPUB, HTML and plain text are extracted in-process; everything else
+    (PDF, DOC, ...) goes through the Tika server. Unless a language is given,
+    it is taken from Tika's metadata or detected from the text, falling back
+    to DEFAULT_LANGUAGE. Text extraction and tokenization are timed as the
+    "parse" and "tokenize" stages.
     """
-    parsed = parser.from_buffer(BytesIO(data), serverEndpoint=TIKA_SERVER_ENDPOINT)
-    text = parsed.get("content", "")
+    timer = timer or StageTimer()
+    text = None
+    metadata = None
+    with timer.stage("parse"):
+        fmt = sniff_format(data)
+        if fmt:
+            # EPUB / HTML / plain text: skip the Tika round-trip
+            text = extract_text_locally(data, fmt)
+
+        if text is None:
+            parsed = parser.from_buffer(BytesIO(data), serverEndpoint=TIKA_SERVER_ENDPOINT)
+            text = parsed.get("content", "")
+
+            # Detect language if available
+            metadata = parsed.get("metadata", {})
+
     if not text:
-        return Counter()
+        return Counter(), choose_language(language, metadata, "")
+
+    # Tokenize
+    with timer.stage("tokenize"):
+        text = text.lower().strip()
+        language = choose_language(language, metadata, text)
+        counter = count_tokens(text, language)
+
+    return counter, language
+
+
+def split_text(text: str, parts: int) -> list[tuple[int, int]]:
+    """
+    (start, end) offsets cutting text into about `parts` spans. Each cut is
+    the first paragraph break within MAX_CARRY characters of the even split
+    point, else the first whitespace, so no token is ever split.
+    """
+    size = len(text) // parts
+    bounds = [0]
+    for i in range(1, parts):
+        target = max(i * size, bounds[-1])
+        window_end = min(target + MAX_CARRY, len(text))
+        cut = text.find("\n\n", target, window_end)
+        if cut == -1:
+            match = WHITESPACE_RE.search(text, target, window_end)
+            if match is None:
+                # No whitespace nearby (one enormous token); this span absorbs the next one
+                continue
+            cut = match.start()
+        bounds.append(cut)
+    bounds.append(len(text))
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
 
-    # Detect language if available
-    metadata = parsed.get("metadata", {})
 
+def _count_span(language: str, start: int, end: int) -> Counter:
+    counter = Counter()
+    get_language_profile(language).count(_pool_text[start:end], counter)
+    return counter
 
-    text = text.lower().strip()
 
-    lang_name = "spanish" if language.startswith("es") else language
+def count_tokens(text: str, language: str, workers: int = TOKENIZE_WORKERS,
+                 min_chars: int = PARALLEL_TOKENIZE_MIN_CHARS) -> Counter:
+    """
+    Count the tokens of a lower-cased text with the language's profile.
+
+    Texts of min_chars or more are split at whitespace and counted in a
+    pool of `workers` forked processes, and the partial counts are merged;
+    the result is identical to counting serially. The pool is only used
+    from the main thread (forking next to other threads can deadlock the
+    children), so the batch task's extraction threads count serially.
+    """
+    profile = get_language_profile(language)
+    spans = split_text(text, workers) if workers > 1 and len(text) >= min_chars else []
+    if len(spans) < 2 or threading.current_thread() is not threading.main_thread():
+        counter = Counter()
+        profile.count(text, counter)
+        return counter
+
+    global _pool_text
+    _pool_text = text
     try:
-        stop_words = set(stopwords.words(lang_name))
-    except LookupError:
-        import nltk
-        nltk.download("stopwords")
-        stop_words = set(stopwords.words(lang_name))
+        with ProcessPoolExecutor(max_workers=len(spans), mp_context=get_context("fork")) as pool:
+            partials = pool.map(_count_span, repeat(language), *zip(*spans))
+            counter = next(partials)
+            for partial in partials:
+                counter.update(partial)
+    finally:
+        _pool_text = None
+    return counter
 
-    # Tokenize
-    tokens = tokenize(text, language)
-    words = [t for t in tokens if t.isalpha() and t not in stop_words]
 
-    return Counter(words), language
+def count_text_chunks(chunks: Iterable[str], profile: Optional[LanguageProfile] = None) -> Counter:
+    """
+    Incrementally count tokens over a stream of text chunks.
+
+    Each chunk is cut at its last whitespace and the tail is carried into
+    the next one, so words spanning a chunk boundary are never split.
+    """
+    if profile is None:
+        profile = get_language_profile(DEFAULT_LANGUAGE)
+
+    counter = Counter()
+    carry = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        text = carry + chunk.lower()
+        cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t"))
+        if cut == -1 and len(text) < MAX_CARRY:
+            carry = text
+            continue
+        if cut == -1:
+            cut = len(text)
+        profile.count(text[:cut], counter)
+        carry = text[cut:]
+
+    if carry:
+        profile.count(carry, counter)
+    return counter
 
+
+def extract_words_from_stream(stream, language: Optional[str] = None) -> tuple[Counter[str], str]:
+    """
+    Streaming variant of extract_words_from_buffer for large books.
+
+    Pipes the raw object stream straight into Tika's /tika endpoint and
+    consumes the plain-text response in chunks, so neither the file nor
+    its extracted text is ever held in memory as a whole. Without a given
+    language, it is detected from the first chunk.
+    """
+    response = requests.put(
+        f"{TIKA_SERVER_ENDPOINT.rstrip('/')}/tika",
+        data=stream,
+        headers={"Accept": "text/plain"},
+        stream=True,
+    )
+    response.raise_for_status()
+    response.encoding = "utf-8"
+    try:
+        chunks = response.iter_content(STREAM_CHUNK_SIZE, decode_unicode=True)
+        first = next(chunks, "")
+        language = choose_language(language, None, first.lower())
+        counter = count_text_chunks(chain([first], chunks), get_language_profile(language))
+    finally:
+        response.close()
+    return counter, language
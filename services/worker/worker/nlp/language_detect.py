@@ -0,0 +1,69 @@
+"""
+Book language detection.
+
+Tika reports a document's declared language in its metadata (dc:language,
+Content-Language, ...); when that is missing, a text sample is scored
+against the stopword lists of the supported languages. Stopwords shared
+by several languages ("de", "a", "que") count for less, so closely related
+languages such as Spanish, Portuguese and Italian still separate.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Optional
+
+from worker.nlp.language_profile import get_language_profile
+from worker.nlp.languages import SUPPORTED_LANGUAGES, normalize_language
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Characters of text inspected by detect_language
+SAMPLE_CHARS = 20_000
+
+# Minimum weighted stopword hits before a guess is trusted
+MIN_SCORE = 5.0
+
+METADATA_KEYS = ("language", "dc:language", "Content-Language", "meta:language")
+
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def language_from_metadata(metadata: dict) -> Optional[str]:
+    """Language declared in Tika metadata, if it is one we support."""
+    for key in METADATA_KEYS:
+        value = metadata.get(key)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        language = normalize_language(value)
+        if language:
+            return language
+    return None
+
+
+@lru_cache(maxsize=None)
+def stopword_weights() -> dict[str, dict[str, float]]:
+    """{language: {stopword: weight}}, each word weighted by 1 / languages sharing it."""
+    stop_words = {}
+    for code in SUPPORTED_LANGUAGES:
+        try:
+            stop_words[code] = get_language_profile(code).stop_words
+        except (RuntimeError, OSError) as e:
+            logger.warning(f"⚠️ No stopwords for '{code}', it won't be detected: {e}")
+    shared = Counter(word for words in stop_words.values() for word in words)
+    return {code: {w: 1.0 / shared[w] for w in words} for code, words in stop_words.items()}
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Guess the language of a text from its first SAMPLE_CHARS characters."""
+    words = Counter(WORD_RE.findall(text[:SAMPLE_CHARS].lower()))
+    if not words:
+        return None
+
+    scores = {
+        code: sum(weights.get(word, 0.0) * count for word, count in words.items())
+        for code, weights in stopword_weights().items()
+    }
+    best = max(scores, key=scores.get)
+    return best if scores[best] >= MIN_SCORE else None
@@ -0,0 +1,57 @@
+"""
+Per-language tokenization profile, loaded once per worker process.
+
+Holds everything the extractor needs to turn text into word counts:
+the stopword set, the wordfreq tokenizer settings and the token filter.
+"""
+
+from collections import Counter
+from functools import lru_cache
+
+from nltk.corpus import stopwords
+from wordfreq import tokenize
+from worker.nlp.languages import NLTK_LANGUAGE_NAMES
+
+
+class LanguageProfile:
+    """Stopwords, tokenizer config and token filter for a single language."""
+
+    def __init__(self, code: str, include_punctuation: bool = False, external_wordlist: bool = False):
+        self.code = code
+        self.include_punctuation = include_punctuation
+        self.external_wordlist = external_wordlist
+
+        name = NLTK_LANGUAGE_NAMES.get(code, code)
+        try:
+            self.stop_words = frozenset(stopwords.words(name))
+        except LookupError as e:
+            raise RuntimeError(
+                f"NLTK stopwords for '{name}' are missing. Run: python -m nltk.downloader stopwords"
+            ) from e
+
+    def tokenize(self, text: str) -> list[str]:
+        return tokenize(
+            text,
+            self.code,
+            include_punctuation=self.include_punctuation,
+            external_wordlist=self.external_wordlist,
+        )
+
+    def count(self, text: str, counter: Counter):
+        """
+        Add the alphabetic, non-stopword tokens of a lower-cased text to counter.
+
+        Tokens are counted first (in C, via Counter) and the filter then runs
+        once per distinct form instead of once per token.
+        """
+        counts = Counter(self.tokenize(text))
+        stop_words = self.stop_words
+        for token in [t for t in counts if not t.isalpha() or t in stop_words]:
+            del counts[token]
+        counter.update(counts)
+
+
+@lru_cache(maxsize=None)
+def get_language_profile(code: str) -> LanguageProfile:
+    """Return the process-wide profile for a language, building it on first use."""
+    return LanguageProfile(code)
@@ -0,0 +1,35 @@
+"""
+Supported language codes.
+
+Kept free of NLP dependencies so that the enqueue API can validate and
+route languages without importing NLTK, wordfreq or spaCy.
+"""
+
+import re
+from typing import Optional
+
+# ISO code → NLTK stopwords corpus name
+NLTK_LANGUAGE_NAMES = {
+    "es": "spanish",
+    "en": "english",
+    "fr": "french",
+    "de": "german",
+    "it": "italian",
+    "pt": "portuguese",
+}
+
+SUPPORTED_LANGUAGES = tuple(NLTK_LANGUAGE_NAMES)
+
+
+def normalize_language(value) -> Optional[str]:
+    """Map "es", "es-ES", "ES_mx", "spanish" to a supported code, or None."""
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    code = re.split(r"[-_]", value, maxsplit=1)[0]
+    if code in SUPPORTED_LANGUAGES:
+        return code
+    for code, name in NLTK_LANGUAGE_NAMES.items():
+        if value == name:
+            return code
+    return None
@@ -0,0 +1,81 @@
+"""
+Shared surface form → cleaned lemma cache.
+
+Two tiers:
+1. An in-process LRU, reused across jobs handled by the same process.
+2. A Redis hash on the worker's connection, shared by every worker.
+
+Entries are namespaced by spaCy model and sanitizer version, so bumping
+either one starts a fresh cache. Rejected forms are cached too, stored as
+an empty string (REJECTED).
+"""
+
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from redis import Redis, RedisError
+from worker.config.settings import LEMMA_CACHE_SIZE
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+REJECTED = ""
+
+
+def model_key(nlp) -> str:
+    """Return a stable identifier for a loaded spaCy pipeline, e.g. es_core_news_lg-3.8.0."""
+    meta = nlp.meta
+    return f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+
+
+class LemmaCache:
+    """LRU + Redis hash cache keyed by surface form."""
+
+    def __init__(self, model: str, sanitizer_version: str, maxsize: int = LEMMA_CACHE_SIZE):
+        self.redis_key = f"palabra:lemmas:{model}:{sanitizer_version}"
+        self.maxsize = maxsize
+        self._lru: OrderedDict[str, str] = OrderedDict()
+
+    def _remember(self, form: str, lemma: str):
+        self._lru[form] = lemma
+        self._lru.move_to_end(form)
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def get_many(self, forms: Iterable[str], connection: Optional[Redis] = None) -> dict[str, str]:
+        """Return cached lemmas (or REJECTED) for the given forms; misses are omitted."""
+        found = {}
+        remote = []
+        for form in forms:
+            lemma = self._lru.get(form)
+            if lemma is None:
+                remote.append(form)
+            else:
+                self._lru.move_to_end(form)
+                found[form] = lemma
+
+        if remote and connection is not None:
+            try:
+                values = connection.hmget(self.redis_key, remote)
+            except RedisError as e:
+                logger.warning(f"⚠️ Lemma cache lookup failed, continuing without it: {e}")
+                values = []
+            for form, value in zip(remote, values):
+                if value is not None:
+                    lemma = value.decode("utf-8")
+                    self._remember(form, lemma)
+                    found[form] = lemma
+
+        return found
+
+    def set_many(self, mapping: dict[str, str], connection: Optional[Redis] = None):
+        """Store freshly computed lemmas in both tiers."""
+        if not mapping:
+            return
+        for form, lemma in mapping.items():
+            self._remember(form, lemma)
+        if connection is not None:
+            try:
+                connection.hset(self.redis_key, mapping=mapping)
+            except RedisError as e:
+                logger.warning(f"⚠️ Lemma cache write failed: {e}")
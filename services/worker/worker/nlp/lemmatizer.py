@@ -0,0 +1,142 @@
+"""
+Trimmed spaCy pipeline for lemmatizing isolated word forms.
+
+Lemma and POS assignment only need tok2vec → morphologizer →
+attribute_ruler → lemmatizer, so the dependency parser, NER and senter are
+excluded at load time (never deserialized, unlike `disable`).
+
+Options:
+- SPACY_MODEL names the Spanish model; SPACY_MODELS="en=en_core_web_md,..."
+  overrides the defaults (<lang>_core_news_lg, en_core_web_lg) per language.
+- LEMMATIZER_VECTORS=false swaps in the vectorless *_sm model.
+  The lg model's tok2vec embeds its static vectors, so they can't simply
+  be dropped from it.
+- LEMMA_LOOKUP_PATH points at a JSON {form: lemma} table (e.g. the es
+  lemma lookup from spacy-lookups-data). Forms found there skip the model
+  entirely and carry no POS. It applies to LANGUAGE_CODE only, unless the
+  path contains a {language} placeholder.
+"""
+
+import json
+import os
+from typing import NamedTuple, Optional
+
+import spacy
+from worker.config.settings import SPACY_MODEL, SPACY_MODELS, LEMMATIZER_VECTORS, LEMMA_LOOKUP_PATH, LANGUAGE_CODE
+from worker.nlp.lemma_cache import model_key
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Components that single-token lemma/POS assignment never reads
+EXCLUDED_COMPONENTS = ["parser", "ner", "senter"]
+LIGHT_MODEL = "es_core_news_sm"
+
+# spaCy ships English as *_core_web_*, the other languages as *_core_news_*
+MODEL_FAMILIES = {"en": "core_web"}
+MODEL_OVERRIDES = dict(
+    pair.strip().split("=", 1) for pair in SPACY_MODELS.split(",") if "=" in pair
+)
+
+
+class LemmaResult(NamedTuple):
+    text: str
+    lemma: str
+    pos: str
+    is_alpha: bool
+
+
+def model_name(language: str) -> str:
+    """Configured spaCy model for a language."""
+    if language in MODEL_OVERRIDES:
+        return MODEL_OVERRIDES[language]
+    if language == "es":
+        return SPACY_MODEL
+    return f"{language}_{MODEL_FAMILIES.get(language, 'core_news')}_lg"
+
+
+def light_model_name(language: str) -> str:
+    """Vectorless fallback model for a language."""
+    if language == "es":
+        return LIGHT_MODEL
+    return f"{language}_{MODEL_FAMILIES.get(language, 'core_news')}_sm"
+
+
+def load_pipeline(model: str = SPACY_MODEL, vectors: bool = LEMMATIZER_VECTORS, light: str = LIGHT_MODEL):
+    """Load only the components needed for lemmas and POS tags."""
+    name = model if vectors else light
+    logger.info(f"🧠 Loading trimmed spaCy pipeline '{name}'...")
+    try:
+        return spacy.load(name, exclude=EXCLUDED_COMPONENTS)
+    except OSError:
+        logger.warning(f"⚠️ Model not found. Run: python -m spacy download {name}")
+        return spacy.load(light, exclude=EXCLUDED_COMPONENTS)
+
+
+def load_language_pipeline(language: str, vectors: bool = LEMMATIZER_VECTORS):
+    return load_pipeline(model_name(language), vectors, light_model_name(language))
+
+
+def installed_model_key(language: str, vectors: bool = LEMMATIZER_VECTORS) -> Optional[str]:
+    """
+    model_key() of the pipeline load_language_pipeline would load, read from
+    the installed package's metadata instead of loading it. None if neither
+    the model nor its light fallback is installed.
+    """
+    names = [model_name(language), light_model_name(language)] if vectors else [light_model_name(language)]
+    for name in names:
+        version = spacy.util.get_package_version(name)
+        if version:
+            return f"{name}-{version}"
+    return None
+
+
+def lookup_path(language: str) -> Optional[str]:
+    if not LEMMA_LOOKUP_PATH:
+        return None
+    if "{language}" in LEMMA_LOOKUP_PATH:
+        # Languages without a table of their own just use the model
+        path = LEMMA_LOOKUP_PATH.format(language=language)
+        return path if os.path.exists(path) else None
+    return LEMMA_LOOKUP_PATH if language == LANGUAGE_CODE else None
+
+
+def load_lookup(path: Optional[str] = LEMMA_LOOKUP_PATH) -> dict[str, str]:
+    if not path:
+        return {}
+    if "{language}" in path:
+        path = lookup_path(LANGUAGE_CODE)
+    with open(path, encoding="utf-8") as f:
+        lookup = json.load(f)
+    logger.info(f"📖 Loaded {len(lookup):,} lemma lookup entries from {path}")
+    return lookup
+
+
+class SingleTokenLemmatizer:
+    """Lemmatize one word per doc, consulting the lookup table before the model."""
+
+    def __init__(self, nlp=None, lookup: Optional[dict[str, str]] = None):
+        self.nlp = nlp if nlp is not None else load_pipeline()
+        self.lookup = lookup if lookup is not None else load_lookup()
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies this configuration's output, for namespacing cached lemmas."""
+        return model_key(self.nlp) + ("+lookup" if self.lookup else "")
+
+    def lemmatize(self, forms: list[str], batch_size: int = 1000, n_process: int = 1) -> list[LemmaResult]:
+        """Return a LemmaResult per form, in input order."""
+        results: list[Optional[LemmaResult]] = [None] * len(forms)
+        pending = []
+        for i, form in enumerate(forms):
+            lemma = self.lookup.get(form)
+            if lemma is None:
+                pending.append(i)
+            else:
+                results[i] = LemmaResult(form, lemma, "", form.isalpha())
+
+        docs = self.nlp.pipe((forms[i] for i in pending), batch_size=batch_size, n_process=n_process)
+        for i, doc in zip(pending, docs):
+            token = doc[0]
+            results[i] = LemmaResult(token.text, token.lemma_, token.pos_, token.is_alpha)
+        return results
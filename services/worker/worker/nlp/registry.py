@@ -0,0 +1,111 @@
+"""
+Per-language NLP models, loaded on first use.
+
+Everything process_book needs for one language (trimmed spaCy pipeline,
+lemma lookup table, lemma cache namespace and sanitizer) is bundled in a
+LanguageModels and built the first time that language is requested. At
+most MAX_LOADED_MODELS bundles stay resident; the least recently used one
+is dropped when another language needs loading.
+
+RQ forks a work horse per job, so a model loaded inside a job is gone once
+the job ends. worker.main preloads the models of WORKER_LANGUAGES in the
+parent process; jobs routed to that worker's books-<lang> queues inherit
+them warm. A book in another language still works, at the cost of a model
+load for that job.
+"""
+
+import gc
+from collections import OrderedDict
+from typing import Optional
+
+from worker.config.settings import MAX_LOADED_MODELS
+from worker.nlp.language_profile import LanguageProfile, get_language_profile
+from worker.nlp.lemma_cache import LemmaCache
+from worker.nlp.lemmatizer import (
+    SingleTokenLemmatizer,
+    installed_model_key,
+    load_language_pipeline,
+    load_lookup,
+    lookup_path,
+)
+from worker.nlp.sanitizers import get_sanitizer
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LanguageModels:
+    """Lemmatizer, lemma cache, sanitizer and tokenizer profile for one language."""
+
+    def __init__(self, language: str):
+        self.language = language
+        self.profile: LanguageProfile = get_language_profile(language)
+        self.sanitizer = get_sanitizer(language)
+        self.lemmatizer = SingleTokenLemmatizer(
+            load_language_pipeline(language),
+            load_lookup(lookup_path(language)),
+        )
+        self.lemma_cache = LemmaCache(self.lemmatizer.cache_key, self.sanitizer.SANITIZER_VERSION)
+
+    @property
+    def pipeline_key(self) -> str:
+        """Identifies this language's output, for reusing results across books."""
+        return f"{self.lemmatizer.cache_key}:s{self.sanitizer.SANITIZER_VERSION}"
+
+
+class ModelRegistry:
+    """LRU of LanguageModels, capped at max_loaded languages."""
+
+    def __init__(self, max_loaded: int = MAX_LOADED_MODELS):
+        self.max_loaded = max(1, max_loaded)
+        self._models: OrderedDict[str, LanguageModels] = OrderedDict()
+
+    def __contains__(self, language: str) -> bool:
+        return language in self._models
+
+    def loaded(self) -> list[str]:
+        return list(self._models)
+
+    def peek(self, language: str) -> Optional[LanguageModels]:
+        """The language's models if resident, without loading them or touching the LRU order."""
+        return self._models.get(language)
+
+    def get(self, language: str) -> LanguageModels:
+        models = self._models.get(language)
+        if models is not None:
+            self._models.move_to_end(language)
+            return models
+
+        while len(self._models) >= self.max_loaded:
+            evicted, _ = self._models.popitem(last=False)
+            logger.info(f"♻️ Unloading '{evicted}' models (MAX_LOADED_MODELS={self.max_loaded})")
+            gc.collect()
+
+        models = LanguageModels(language)
+        self._models[language] = models
+        return models
+
+
+registry = ModelRegistry()
+
+
+def get_language_models(language: str) -> LanguageModels:
+    """Return the process-wide models for a language, loading them on first use."""
+    return registry.get(language)
+
+
+def pipeline_key(language: str) -> Optional[str]:
+    """
+    LanguageModels.pipeline_key for a language. When its models aren't
+    resident the key is built from the installed model package instead, so
+    a dedupe lookup neither loads them nor evicts another language's.
+    None if no model for the language is installed.
+    """
+    models = registry.peek(language)
+    if models is not None:
+        return models.pipeline_key
+    model = installed_model_key(language)
+    if model is None:
+        return None
+    lookup = "+lookup" if lookup_path(language) else ""
+    return f"{model}{lookup}:s{get_sanitizer(language).SANITIZER_VERSION}"
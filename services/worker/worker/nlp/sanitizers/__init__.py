@@ -1 +1,10 @@
-from worker.nlp.sanitizers.spanish import clean_lemma
\ No newline at end of file
+from worker.nlp.sanitizers import generic, spanish
+from worker.nlp.sanitizers.spanish import clean_lemma, clean_lemmas
+
+# Language code → sanitizer module (exposing clean_lemmas and SANITIZER_VERSION)
+SANITIZERS = {"es": spanish}
+
+
+def get_sanitizer(language: str):
+    """Return the sanitizer module for a language, falling back to the generic one."""
+    return SANITIZERS.get(language, generic)
@@ -0,0 +1,22 @@
+"""
+Fallback lemma sanitizer for languages without a dedicated one.
+
+spaCy's lemmas are used as-is apart from lower-casing; multi-word lemmas
+are rejected, as in the Spanish sanitizer.
+"""
+
+# Bump whenever clean_lemma output changes, so cached lemmas are invalidated.
+SANITIZER_VERSION = "1"
+
+
+def clean_lemma(word: str, lemma: str) -> str:
+    lemma_lower = lemma.lower().strip()
+    if " " in lemma_lower:
+        return ""
+    return lemma_lower
+
+
+def clean_lemmas(words: list[str], lemmas: list[str]) -> list[str]:
+    """Batch version of clean_lemma over aligned word/lemma lists."""
+    clean = clean_lemma
+    return [clean(word, lemma) for word, lemma in zip(words, lemmas)]
@@ -2,10 +2,18 @@
 Spanish lemma sanitizer for spaCy lemmatization output.
 Fixes common irregulars, imperfects, future/conditional truncations,
 and malformed stems produced by default spaCy models.
+
+The hot path is table-driven: suffix tuples for str.endswith, set lookups
+and a single translate() pass for accent folding. The regex version is kept
+for inputs containing newlines (where `$` semantics differ from endswith)
+and as the reference implementation for equivalence checks.
 """
 
 import re
 
+# Bump whenever clean_lemma output changes, so cached lemmas are invalidated.
+SANITIZER_VERSION = "1"
+
 IRREGULAR_FIXES = {
     "har": "hacer", "haga": "hacer", "hecho": "hacer",
     "habier": "haber", "habr": "haber",
@@ -24,14 +32,49 @@ IRREGULAR_FIXES = {
     "reir": "reír", "rei": "reír",
 }
 
+# --- Lookup tables ---
+ARTICLES = ("el", "la", "los", "las", "un", "una", "unos", "unas")
+SER_PRETERITE = frozenset({"fui", "fue", "fueron", "fuiste", "fuimos"})
+AR_IMPERFECT = ("aba", "abas", "aban", "ábamos")
+ER_IR_IMPERFECT = ("ía", "ías", "ían", "íamos")
+IR_STEMS = (
+    "viv", "dorm", "sal", "sub", "abr", "recib", "decid",
+    "sent", "escrib", "permit", "exist", "part", "sufr",
+)
+IR_IMPERFECT_FORMS = frozenset({"iba", "ibas", "iban", "ibamos", "ibais"})
+FUTURE_ENDINGS = ("ré", "rás", "rán", "remos")
+INFINITIVE_ENDINGS = ("ar", "er", "ir")
+HYBRID_ENDINGS = ("acer", "ecer")
+HYBRID_STEMS = frozenset({"habl", "trabaj", "est"})
+ACCENT_FOLD = str.maketrans({"á": "a", "í": "i", "é": "e"})
+
+# --- Precompiled patterns (newline fallback / reference) ---
+ARTICLE_END_RE = re.compile(r"\b(el|la|los|las|un|una|unos|unas)$")
+AR_IMPERFECT_RE = re.compile(r"(aba|abas|aban|ábamos)$")
+ER_IR_IMPERFECT_RE = re.compile(r"(ía|ías|ían|íamos)$")
+IR_STEM_RE = re.compile(r"(viv|dorm|sal|sub|abr|recib|decid|sent|escrib|permit|exist|part|sufr)$")
+IR_IMPERFECT_RE = re.compile(r"^ib(a|as|an|amos|ais|as)$")
+FUTURE_RE = re.compile(r"(ré|rás|rán|remos)$")
+HYBRID_RE = re.compile(r"(acer|ecer)$")
+
+
+def _strip_suffix(word: str, suffixes: tuple) -> str:
+    for suffix in suffixes:
+        if word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
 
 def clean_lemma(word: str, lemma: str) -> str:
     """Return a normalized lemma for a Spanish token."""
     word_lower = word.lower()
     lemma_lower = lemma.lower()
 
+    if "\n" in word_lower or "\n" in lemma_lower:
+        return clean_lemma_regex(word, lemma)
+
     # Skip malformed or multiword lemmas like "vender el", "utilizar la"
-    if " " in lemma_lower or re.search(r"\b(el|la|los|las|un|una|unos|unas)$", lemma_lower):
+    if " " in lemma_lower or (lemma_lower.endswith(ARTICLES) and ARTICLE_END_RE.search(lemma_lower)):
         return ""
 
     # Fix accidental accented infinitives (hablár → hablar)
@@ -43,37 +86,88 @@ def clean_lemma(word: str, lemma: str) -> str:
         lemma_lower = "ir"
 
     # 'fui', 'fue', etc. → ser
-    if word_lower in {"fui", "fue", "fueron", "fuiste", "fuimos"}:
+    if word_lower in SER_PRETERITE:
         return "ser"
 
     # Imperfect -ar verbs
-    if re.search(r"(aba|abas|aban|ábamos)$", word_lower) and lemma_lower == word_lower:
-        return re.sub(r"(aba|abas|aban|ábamos)$", "ar", word_lower)
+    if lemma_lower == word_lower and word_lower.endswith(AR_IMPERFECT):
+        return _strip_suffix(word_lower, AR_IMPERFECT) + "ar"
 
     # Imperfect -er/-ir verbs
-    if re.search(r"(ía|ías|ían|íamos)$", word_lower) and lemma_lower == word_lower:
+    if lemma_lower == word_lower and word_lower.endswith(ER_IR_IMPERFECT):
         stem = word_lower[:-2]
-        if re.search(r"(viv|dorm|sal|sub|abr|recib|decid|sent|escrib|permit|exist|part|sufr)$", stem):
+        if stem.endswith(IR_STEMS):
             return stem + "ir"
         return stem + "er"
 
     # 'ibas', 'íbamos', etc. → ir
-    if re.search(r"^ib(a|as|an|amos|ais|as)$", word_lower):
+    if word_lower in IR_IMPERFECT_FORMS:
         return "ir"
 
     # Future tense mislemmatized forms like “dormiré” → dormir
-    if word_lower.endswith(("ré", "rás", "rán", "remos")) and lemma_lower.startswith(word_lower[:-2]):
-        if word_lower[:-2].endswith(("ar", "er", "ir")):
+    if word_lower.endswith(FUTURE_ENDINGS) and lemma_lower.startswith(word_lower[:-2]):
+        if word_lower[:-2].endswith(INFINITIVE_ENDINGS):
             return word_lower[:-2]
-        return re.sub(r"(ré|rás|rán|remos)$", "r", word_lower)
+        return _strip_suffix(word_lower, FUTURE_ENDINGS) + "r"
 
     # Irregular fixes
+    normalized = lemma_lower.translate(ACCENT_FOLD)
+    fixed = IRREGULAR_FIXES.get(normalized)
+    if fixed is not None:
+        return fixed
+
+    # Catch malformed hybrids like hablacer, trabajacer
+    if normalized.endswith(HYBRID_ENDINGS) and normalized[:-4] in HYBRID_STEMS:
+        return normalized[:-4] + "ar"
+
+    return normalized
+
+
+def clean_lemmas(words: list[str], lemmas: list[str]) -> list[str]:
+    """Batch version of clean_lemma over aligned word/lemma lists."""
+    clean = clean_lemma
+    return [clean(word, lemma) for word, lemma in zip(words, lemmas)]
+
+
+def clean_lemma_regex(word: str, lemma: str) -> str:
+    """Regex implementation of clean_lemma, the reference for equivalence checks."""
+    word_lower = word.lower()
+    lemma_lower = lemma.lower()
+
+    if " " in lemma_lower or ARTICLE_END_RE.search(lemma_lower):
+        return ""
+
+    if lemma_lower.endswith("ár"):
+        lemma_lower = lemma_lower.replace("á", "a")
+
+    if lemma_lower == "ír":
+        lemma_lower = "ir"
+
+    if word_lower in SER_PRETERITE:
+        return "ser"
+
+    if AR_IMPERFECT_RE.search(word_lower) and lemma_lower == word_lower:
+        return AR_IMPERFECT_RE.sub("ar", word_lower)
+
+    if ER_IR_IMPERFECT_RE.search(word_lower) and lemma_lower == word_lower:
+        stem = word_lower[:-2]
+        if IR_STEM_RE.search(stem):
+            return stem + "ir"
+        return stem + "er"
+
+    if IR_IMPERFECT_RE.search(word_lower):
+        return "ir"
+
+    if word_lower.endswith(FUTURE_ENDINGS) and lemma_lower.startswith(word_lower[:-2]):
+        if word_lower[:-2].endswith(INFINITIVE_ENDINGS):
+            return word_lower[:-2]
+        return FUTURE_RE.sub("r", word_lower)
+
     normalized = lemma_lower.replace("á", "a").replace("í", "i").replace("é", "e")
     if normalized in IRREGULAR_FIXES:
         return IRREGULAR_FIXES[normalized]
 
-    # Catch malformed hybrids like hablacer, trabajacer
-    if re.search(r"(acer|ecer)$", normalized) and normalized[:-4] in {"habl", "trabaj", "est"}:
+    if HYBRID_RE.search(normalized) and normalized[:-4] in HYBRID_STEMS:
         return normalized[:-4] + "ar"
 
     return normalized
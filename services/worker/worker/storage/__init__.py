@@ -0,0 +1 @@
+from worker.storage.minio_client import get_minio_client
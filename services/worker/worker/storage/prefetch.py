@@ -0,0 +1,124 @@
+"""
+Prefetch the next queued book while the current one is lemmatized.
+
+RQ runs every job in a freshly forked work horse, so prefetched objects are
+spooled to PREFETCH_DIR rather than kept in memory: whichever worker
+process picks up the next job finds the file there. Spool entries are
+keyed by bucket, object name and ETag, so a replaced object is never
+served stale. Only books below STREAM_THRESHOLD_BYTES are prefetched;
+larger ones are streamed as before.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from rq import Queue
+from rq.job import Job
+
+from worker.config.settings import (
+    MINIO_BUCKET,
+    PREFETCH_ENABLED,
+    PREFETCH_DIR,
+    PREFETCH_TTL_SECONDS,
+    STREAM_THRESHOLD_BYTES,
+)
+from worker.storage.minio_client import get_minio_client, read_object
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def spool_path(bucket: str, name: str, etag: str) -> Path:
+    key = hashlib.sha1(f"{bucket}/{name}".encode("utf-8")).hexdigest()
+    etag = etag.strip('"')
+    return Path(PREFETCH_DIR) / f"{key}-{etag}"
+
+
+def take_prefetched(bucket: str, name: str, etag: str) -> Optional[bytes]:
+    """Return and remove a spooled copy of the object, or None if there isn't one."""
+    path = spool_path(bucket, name, etag)
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    path.unlink(missing_ok=True)
+    return data
+
+
+def prefetch_object(bucket: str, name: str):
+    """Download an object into the spool unless it is large, spooled, or being spooled."""
+    client = get_minio_client()
+    stat = client.stat_object(bucket, name)
+    if stat.size >= STREAM_THRESHOLD_BYTES:
+        return
+    path = spool_path(bucket, name, stat.etag)
+    if path.exists():
+        return
+
+    partial = path.with_suffix(".part")
+    try:
+        # O_EXCL: another worker already prefetching this object wins
+        fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(read_object(client, bucket, name, stat.size))
+        partial.replace(path)
+        logger.info(f"📥 Prefetched {name} ({stat.size:,} bytes)")
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+
+def clean_spool(now: Optional[float] = None):
+    """Remove spool files (finished or abandoned) older than PREFETCH_TTL_SECONDS."""
+    now = now or time.time()
+    for path in Path(PREFETCH_DIR).glob("*"):
+        try:
+            if now - path.stat().st_mtime > PREFETCH_TTL_SECONDS:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def next_queued_filename(job: Job, func_name: str) -> Optional[str]:
+    """Filename argument of the next job waiting on job's queue, if it runs func_name."""
+    queue = Queue(job.origin, connection=job.connection)
+    for job_id in queue.get_job_ids(0, 1):
+        next_job = Job.fetch(job_id, connection=job.connection)
+        if next_job.func_name == func_name and len(next_job.args) >= 2:
+            return next_job.args[1]
+    return None
+
+
+def prefetch_next(job: Optional[Job], func_name: str) -> Optional[threading.Thread]:
+    """
+    Start downloading the next queued book in the background. Join the
+    returned thread before the job returns: the work horse exits right after.
+    """
+    if not PREFETCH_ENABLED or job is None:
+        return None
+    try:
+        filename = next_queued_filename(job, func_name)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not inspect the queue for prefetching: {e}")
+        return None
+    if not filename:
+        return None
+
+    def run():
+        try:
+            Path(PREFETCH_DIR).mkdir(parents=True, exist_ok=True)
+            clean_spool()
+            prefetch_object(MINIO_BUCKET, filename)
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetch of {filename} failed: {e}")
+
+    thread = threading.Thread(target=run, name="prefetch", daemon=True)
+    thread.start()
+    return thread
@@ -4,4 +4,32 @@ from worker.config.settings import REDIS_URL
 
 redis_conn = redis.from_url(REDIS_URL)
 
+# Jobs are enqueued by import path, so enqueuers never import the NLP stack
+PROCESS_BOOK = "worker.tasks.process_book.process_book"
+PROCESS_BOOKS_BATCH = "worker.tasks.process_books_batch.process_books_batch"
+
+# Workers drain every interactive queue (uploads) before any bulk one (catalogue imports)
+PRIORITIES = ("interactive", "bulk")
+
+# Books whose language is unknown go here and are detected by whichever worker takes them
 queue = Queue("books", connection=redis_conn)
+
+
+def queue_name(language=None, priority: str = "interactive") -> str:
+    """
+    books-<lang> for a known language, so the job lands on a worker with that
+    model warm; bulk jobs go to the same name with a -bulk suffix.
+    """
+    name = f"books-{language}" if language else "books"
+    return name if priority == "interactive" else f"{name}-bulk"
+
+
+def worker_queues(languages) -> list[str]:
+    """Queues a worker serving these languages listens on, highest priority first."""
+    return [queue_name(language, priority) for priority in PRIORITIES for language in [*languages, None]]
+
+
+def queue_for(language=None, priority: str = "interactive") -> Queue:
+    if not language and priority == "interactive":
+        return queue
+    return Queue(queue_name(language, priority), connection=redis_conn)
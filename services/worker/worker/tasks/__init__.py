@@ -1 +1,2 @@
-from worker.tasks.process_book import process_book
\ No newline at end of file
+from worker.tasks.process_book import process_book
+from worker.tasks.process_books_batch import process_books_batch
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Builds book_profiles rows for books written before profiles existed.
+
+By default only books without a profile, or with one older than
+PROFILE_VERSION, are profiled. Pass --all to rebuild every profile, e.g.
+after load_dataset changed words' difficulty or zipf_score.
+
+Books are processed BATCH_BOOKS at a time: their book_words rows are
+streamed out with COPY, profiled per book with NumPy against the words'
+scores (read once), and written back with one COPY + upsert per batch.
+
+Can also be enqueued as an RQ job: "worker.tasks.backfill_profiles.backfill_profiles".
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from worker.coverage.engine import read_frame
+from worker.db.bulk import upsert_book_profiles
+from worker.db.connection import engine
+from worker.db.profiles import PROFILE_COLUMNS, PROFILE_VERSION, compute_profile, profile_row
+from worker.utils.logger import get_logger
+from worker.utils.timing import StageTimer
+
+logger = get_logger(__name__)
+
+BATCH_BOOKS = 500
+
+
+def read_word_scores(conn) -> tuple[np.ndarray, np.ndarray]:
+    """(difficulty, zipf_score) of every word, indexed by word id (0 where NULL)."""
+    rows = conn.execute(text("SELECT id, COALESCE(difficulty, 0), COALESCE(zipf_score, 0) FROM words")).all()
+    size = max((r[0] for r in rows), default=0) + 1
+    difficulty = np.zeros(size, dtype=np.int8)
+    zipf = np.zeros(size, dtype=np.float64)
+    if rows:
+        ids, levels, scores = np.array(rows, dtype=np.float64).T
+        difficulty[ids.astype(np.int64)] = levels
+        zipf[ids.astype(np.int64)] = scores
+    return difficulty, zipf
+
+
+def books_to_profile(conn, rebuild: bool) -> list[str]:
+    """Ids of books with book_words whose profile is missing or outdated (every such book with rebuild)."""
+    return [str(b) for b in conn.execute(
+        text("""
+            SELECT b.id FROM books b
+            WHERE EXISTS (SELECT 1 FROM book_words bw WHERE bw.book_id = b.id)
+              AND (:rebuild OR NOT EXISTS (
+                  SELECT 1 FROM book_profiles p WHERE p.book_id = b.id AND p.version >= :version
+              ))
+            ORDER BY b.id
+        """),
+        {"rebuild": rebuild, "version": PROFILE_VERSION},
+    ).scalars()]
+
+
+def book_languages(conn, book_ids: list[str]) -> dict[str, str]:
+    """Each book's language, taken from the words it was written with."""
+    rows = conn.execute(
+        text("""
+            SELECT b.id, (
+                SELECT w.language FROM book_words bw JOIN words w ON w.id = bw.word_id
+                WHERE bw.book_id = b.id LIMIT 1
+            )
+            FROM books b WHERE b.id = ANY(CAST(:ids AS uuid[]))
+        """),
+        {"ids": book_ids},
+    ).all()
+    return {str(book_id): language for book_id, language in rows}
+
+
+def profile_batch(frame: pd.DataFrame, languages: dict[str, str], difficulty: np.ndarray, zipf: np.ndarray):
+    """Yield a profile row per book in a (book_id, word_id, count) frame."""
+    codes, book_ids = pd.factorize(frame["book_id"], sort=False)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(book_ids)))[:-1]
+    word_ids = np.split(frame["word_id"].to_numpy()[order], bounds)
+    counts = np.split(frame["count"].to_numpy()[order], bounds)
+    for book_id, ids, book_counts in zip(book_ids, word_ids, counts):
+        # Words added after the scores were read are unrated here
+        known = ids < len(difficulty)
+        levels = np.where(known, difficulty[np.where(known, ids, 0)], 0)
+        scores = np.where(known, zipf[np.where(known, ids, 0)], 0.0)
+        yield profile_row(book_id, languages[str(book_id)], compute_profile(book_counts, levels, scores))
+
+
+def backfill_profiles(rebuild: bool = False, batch_size: int = BATCH_BOOKS) -> int:
+    """Profile every book that needs it; returns the number of profiles written."""
+    timer = StageTimer()
+    with engine.connect() as conn:
+        with timer.stage("select books"):
+            book_ids = books_to_profile(conn, rebuild)
+        with timer.stage("read word scores"):
+            difficulty, zipf = read_word_scores(conn)
+    logger.info(f"📊 {len(book_ids):,} books to profile ({'rebuild' if rebuild else 'missing or outdated'})")
+
+    written = 0
+    for start in range(0, len(book_ids), batch_size):
+        batch = book_ids[start:start + batch_size]
+        with engine.begin() as conn:
+            with timer.stage("read book_words"):
+                frame = read_frame(
+                    conn,
+                    "SELECT book_id, word_id, count FROM book_words WHERE book_id = ANY(%(ids)s::uuid[])",
+                    {"ids": batch},
+                )
+                languages = book_languages(conn, batch)
+            with timer.stage("profile"):
+                rows = list(profile_batch(frame, languages, difficulty, zipf))
+            with timer.stage("write"):
+                written += upsert_book_profiles(conn, PROFILE_COLUMNS, rows)
+        logger.info(f"💾 Profiled {min(start + batch_size, len(book_ids)):,}/{len(book_ids):,} books")
+
+    timer.report()
+    logger.info(f"✅ Wrote {written:,} book profiles.")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build book_profiles rows for existing books")
+    parser.add_argument("--all", action="store_true", help="rebuild every profile, not just missing or outdated ones")
+    parser.add_argument("--batch-size", type=int, default=BATCH_BOOKS, help="books per transaction")
+    args = parser.parse_args()
+    backfill_profiles(rebuild=args.all, batch_size=args.batch_size)
@@ -3,27 +3,47 @@ Builds the core lemma dataset for Spanish (or any supported language).
 
 Pipeline:
 1. Get top N most frequent words from wordfreq.
-2. Lemmatize and POS-tag using spaCy.
+2. Lemmatize and POS-tag using spaCy, in parallel word shards.
 3. Deduplicate to unique lemmas.
 4. Assign CEFR-like difficulty tiers (A1–C2).
-5. Save to CSV and compressed CSV (.gz).
+5. Save to CSV, compressed CSV (.gz) and Parquet.
+
+Each lemmatized shard is checkpointed under language_datasets/.checkpoints,
+so an interrupted run resumes with the shards it hasn't finished yet.
 
 Columns:
 word,pos,language,difficulty,zipf_score
 """
 
 import os
+import json
 import math
+import shutil
+import numpy as np
 import pandas as pd
-import spacy
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from pathlib import Path
 from wordfreq import top_n_list, word_frequency
-from worker.nlp.sanitizers.spanish import clean_lemma
+from worker.nlp.sanitizers.spanish import clean_lemma, SANITIZER_VERSION
+from worker.nlp.lemmatizer import SingleTokenLemmatizer
+from worker.utils.dataset_io import parquet_path, write_parquet
+from worker.utils.timing import StageTimer
 
 # --- Configuration ---
 TOTAL_WORDS = int(os.getenv("TOTAL_WORDS", 50_000))
 SOURCE_LANG = os.getenv("SOURCE_LANG", "es")
 TARGET_LANG = os.getenv("TARGET_LANG", "en")
+SHARD_SIZE = int(os.getenv("SHARD_SIZE", 10_000))
+BUILD_WORKERS = int(os.getenv("BUILD_WORKERS", os.cpu_count() or 1))
+
+# Rank-percentile cut points between CEFR-like tiers (A1|A2|B1|B2|C1|C2), per language.
+# DIFFICULTY_CUTS="0.01,0.03,0.07,0.15,0.30" overrides them for the current run.
+LANGUAGE_DIFFICULTY_CUTS = {
+    "es": (0.01, 0.03, 0.07, 0.15, 0.30),
+}
+DEFAULT_DIFFICULTY_CUTS = (0.01, 0.03, 0.07, 0.15, 0.30)
+DIFFICULTY_LABELS = {1: "A1", 2: "A2", 3: "B1", 4: "B2", 5: "C1", 6: "C2"}
 
 # The dataset should live in /language_datasets at the project root
 PROJECT_ROOT = Path(__file__).resolve().parents[3]  # palabra/
@@ -33,95 +53,182 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 BASE_FILENAME = f"{SOURCE_LANG}_to_{TARGET_LANG}_vocab_base.csv"
 OUTPUT_CSV = OUTPUT_DIR / BASE_FILENAME
 OUTPUT_GZ = OUTPUT_DIR / f"{BASE_FILENAME}.gz"
-
-# --- Load spaCy model ---
-print(f"🧠 Loading spaCy model for '{SOURCE_LANG}'...")
-try:
-    nlp = spacy.load("es_core_news_lg")
-except OSError:
-    print("⚠️ Model not found. Run: python -m spacy download es_core_news_lg")
-    nlp = spacy.load("es_core_news_sm")
-
-
-def assign_difficulty_by_rank(index: int, total: int) -> int:
-    """Map rank percentile to CEFR-like difficulty levels."""
-    pct = index / total
-    if pct < 0.01:
-        return 1  # A1
-    elif pct < 0.03:
-        return 2  # A2
-    elif pct < 0.07:
-        return 3  # B1
-    elif pct < 0.15:
-        return 4  # B2
-    elif pct < 0.30:
-        return 5  # C1
-    return 6  # C2
-
-
-def lemmatize(words):
+OUTPUT_PARQUET = parquet_path(OUTPUT_CSV)
+
+CHECKPOINT_ROOT = OUTPUT_DIR / ".checkpoints"
+
+# Loaded on first use, in the parent before forking shard workers
+lemmatizer = None
+
+def get_lemmatizer() -> SingleTokenLemmatizer:
+    """Load the trimmed spaCy pipeline (no lookup table: POS tags are needed)."""
+    global lemmatizer
+    if lemmatizer is None:
+        print(f"🧠 Loading spaCy model for '{SOURCE_LANG}'...")
+        lemmatizer = SingleTokenLemmatizer(lookup={})
+    return lemmatizer
+
+
+def checkpoint_dir() -> Path:
+    """
+    Checkpoints are only valid for the same word list, model and sanitizer.
+    The model is the one actually loaded (LEMMATIZER_VECTORS=false or a
+    missing model swap in the *_sm one), not the configured name.
+    """
+    return CHECKPOINT_ROOT / (
+        f"{SOURCE_LANG}_{TOTAL_WORDS}_{SHARD_SIZE}_{get_lemmatizer().cache_key}_s{SANITIZER_VERSION}"
+    )
+
+
+def difficulty_cuts(language: str = SOURCE_LANG) -> np.ndarray:
+    override = os.getenv("DIFFICULTY_CUTS")
+    if override:
+        cuts = [float(c) for c in override.split(",")]
+    else:
+        cuts = LANGUAGE_DIFFICULTY_CUTS.get(language, DEFAULT_DIFFICULTY_CUTS)
+    cuts = np.asarray(cuts, dtype=np.float64)
+    if len(cuts) != len(DIFFICULTY_LABELS) - 1 or np.any(np.diff(cuts) <= 0):
+        raise ValueError(f"Expected {len(DIFFICULTY_LABELS) - 1} increasing difficulty cut points, got {cuts.tolist()}")
+    return cuts
+
+
+def assign_difficulty_by_rank(total: int, cuts: np.ndarray) -> np.ndarray:
+    """Map each rank's percentile (rank / total) to a CEFR-like difficulty level 1–6."""
+    pct = np.arange(total, dtype=np.float64) / total
+    # A percentile equal to a cut point falls into the higher tier
+    return np.searchsorted(cuts, pct, side="right") + 1
+
+
+def dedupe_lemmas(lemma_data) -> pd.DataFrame:
+    """
+    Keep one row per lemma (the one with the highest Zipf score, earliest on
+    ties) and order lemmas by Zipf, most frequent first. Equal scores keep
+    the order in which the lemmas first appeared.
+    """
+    df = pd.DataFrame(lemma_data, columns=["word", "pos", "zipf_score"])
+    # sort=False numbers and returns groups in order of first appearance
+    best = df.groupby("word", sort=False)["zipf_score"].idxmax().to_numpy()
+    df = df.iloc[best]
+    order = np.argsort(-df["zipf_score"].to_numpy(), kind="stable")
+    return df.iloc[order].reset_index(drop=True)
+
+
+def zipf_scores(words) -> list[float]:
+    """
+    Zipf score per word. wordfreq frequencies are bucketed, so the log is
+    taken once per distinct frequency (with math.log10, matching earlier
+    builds bit for bit) and scattered back with NumPy.
+    """
+    freqs = np.array([word_frequency(word, SOURCE_LANG) for word in words], dtype=np.float64)
+    unique, inverse = np.unique(freqs, return_inverse=True)
+    unique_zipf = np.array([6 + math.log10(f) if f > 0 else 0 for f in unique.tolist()], dtype=np.float64)
+    return unique_zipf[inverse].tolist()
+
+
+def lemmatize(words, zipfs=None):
     """Tokenize, lemmatize, and compute Zipf scores."""
+    if zipfs is None:
+        zipfs = zipf_scores(words)
     results = []
-    for word in words:
-        doc = nlp(word)
-        token = doc[0]
+    for word, zipf, token in zip(words, zipfs, get_lemmatizer().lemmatize(words)):
         if token.is_alpha:
-            lemma = clean_lemma(token.text, token.lemma_)
+            lemma = clean_lemma(token.text, token.lemma)
             # Skip malformed lemmas like "vender el" or multi-word artifacts
             if not lemma or " " in lemma or "el" in lemma.split():
                 continue
-            freq = word_frequency(word, SOURCE_LANG)
-            zipf = 6 + math.log10(freq) if freq > 0 else 0
-            results.append((lemma, token.pos_, zipf))
+            results.append((lemma, token.pos, zipf))
     return results
 
 
+def shard_path(index: int) -> Path:
+    return checkpoint_dir() / f"shard_{index:05d}.json"
+
+
+def lemmatize_shard(index: int, words, zipfs) -> int:
+    """Lemmatize one shard and checkpoint it atomically."""
+    rows = lemmatize(words, zipfs)
+    tmp = shard_path(index).with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False)
+    tmp.replace(shard_path(index))
+    return index
+
+
+def lemmatize_sharded(words, zipfs):
+    """Lemmatize word shards in a process pool, skipping already-checkpointed shards."""
+    checkpoint_dir().mkdir(parents=True, exist_ok=True)
+    shards = [(i, words[start:start + SHARD_SIZE], zipfs[start:start + SHARD_SIZE])
+              for i, start in enumerate(range(0, len(words), SHARD_SIZE))]
+    pending = [shard for shard in shards if not shard_path(shard[0]).exists()]
+    print(f"🧩 {len(shards)} shards, {len(shards) - len(pending)} already checkpointed")
+
+    if pending:
+        if BUILD_WORKERS > 1 and len(pending) > 1:
+            # Forked workers share the model (loaded by checkpoint_dir) copy-on-write
+            with ProcessPoolExecutor(max_workers=BUILD_WORKERS, mp_context=get_context("fork")) as pool:
+                for index in pool.map(lemmatize_shard, *zip(*pending)):
+                    print(f"  ✔️ shard {index + 1}/{len(shards)}")
+        else:
+            for shard in pending:
+                index = lemmatize_shard(*shard)
+                print(f"  ✔️ shard {index + 1}/{len(shards)}")
+
+    lemma_data = []
+    for index, _, _ in shards:
+        with open(shard_path(index), encoding="utf-8") as f:
+            lemma_data.extend(tuple(row) for row in json.load(f))
+    return lemma_data
+
+
 def build_dataset():
+    timer = StageTimer()
     print(f"📘 Generating top {TOTAL_WORDS:,} frequent words...")
-    words = top_n_list(SOURCE_LANG, TOTAL_WORDS)
-    lemma_data = lemmatize(words)
-
-    # Deduplicate lemmas, keeping highest Zipf score
-    lemma_dict = {}
-    for lemma, pos, zipf in lemma_data:
-        if lemma not in lemma_dict or zipf > lemma_dict[lemma]["zipf"]:
-            lemma_dict[lemma] = {"pos": pos, "zipf": zipf}
-
-    # Sort by Zipf (most frequent first)
-    sorted_lemmas = sorted(lemma_dict.items(), key=lambda x: x[1]["zipf"], reverse=True)
-
-    total = len(sorted_lemmas)
-    data = [
-        {
-            "word": lemma,
-            "pos": info["pos"],
+    with timer.stage("wordfreq"):
+        words = top_n_list(SOURCE_LANG, TOTAL_WORDS)
+        zipfs = zipf_scores(words)
+
+    with timer.stage("lemmatize"):
+        lemma_data = lemmatize_sharded(words, zipfs)
+
+    with timer.stage("dedupe"):
+        # Deduplicate lemmas, keeping highest Zipf score, most frequent first
+        lemmas = dedupe_lemmas(lemma_data)
+
+    with timer.stage("tier assignment"):
+        total = len(lemmas)
+        difficulty = assign_difficulty_by_rank(total, difficulty_cuts(SOURCE_LANG))
+        df = pd.DataFrame({
+            "word": lemmas["word"].to_numpy(),
+            "pos": lemmas["pos"].to_numpy(),
             "language": SOURCE_LANG,
-            "difficulty": assign_difficulty_by_rank(i, total),
-            "zipf_score": info["zipf"],
-        }
-        for i, (lemma, info) in enumerate(sorted_lemmas)
-    ]
+            "difficulty": difficulty,
+            "zipf_score": lemmas["zipf_score"].to_numpy(),
+        })
+        counts = np.bincount(difficulty, minlength=len(DIFFICULTY_LABELS) + 1)
 
     # Difficulty distribution
     print("\n📊 Difficulty distribution (CEFR-aligned):")
-    counts = {lvl: 0 for lvl in range(1, 7)}
-    for d in data:
-        counts[d["difficulty"]] += 1
-    labels = {1: "A1", 2: "A2", 3: "B1", 4: "B2", 5: "C1", 6: "C2"}
-    for lvl in range(1, 7):
+    for lvl, label in DIFFICULTY_LABELS.items():
         pct = (counts[lvl] / total) * 100
-        print(f"  {labels[lvl]} (Level {lvl}): {counts[lvl]:,} words ({pct:.1f}%)")
+        print(f"  {label} (Level {lvl}): {counts[lvl]:,} words ({pct:.1f}%)")
 
     # Write outputs
-    df = pd.DataFrame(data)
-    df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
-    df.to_csv(OUTPUT_GZ, index=False, encoding="utf-8", compression="gzip")
+    with timer.stage("write"):
+        df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
+        df.to_csv(OUTPUT_GZ, index=False, encoding="utf-8", compression="gzip")
+        write_parquet(df, OUTPUT_PARQUET)
+
+    # The build is complete; checkpoints are no longer needed
+    shutil.rmtree(checkpoint_dir(), ignore_errors=True)
 
     print(f"\n💾 Saved plain CSV to {OUTPUT_CSV}")
     print(f"✅ Saved compressed CSV to {OUTPUT_GZ}")
+    print(f"✅ Saved Parquet to {OUTPUT_PARQUET}")
     print(f"🌐 Languages: {SOURCE_LANG.upper()} → {TARGET_LANG.upper()}")
     print(f"✅ Total: {len(df)} words")
 
+    timer.report()
+
 
 if __name__ == "__main__":
     build_dataset()
@@ -0,0 +1,289 @@
+"""
+Enriches the lemma dataset with English glosses from a bilingual dictionary.
+
+Pipeline:
+1. Build (or reuse) a gloss index from a local dictionary dump: an Arrow
+   IPC file of (lemma, pos, gloss, primary) rows sorted by lemma and POS,
+   memory-mapped by every later run. It is rebuilt only when the dump's
+   content changes (size and mtime are checked first, then a SHA-256).
+2. Join the whole dataset against it in one vectorized pass: on
+   (lemma, POS) first, then on the lemma alone (its first dictionary
+   entry) for lemmas whose tagged POS has no entry.
+3. Write the glosses back into the dataset files (CSV, .gz, Parquet) and
+   into words.gloss through COPY.
+
+Supported dumps (optionally gzip-compressed):
+- Wiktextract JSONL (e.g. kaikki.org): one entry per line with word, pos,
+  lang_code and senses[].glosses. Entries of other languages and form-of
+  senses ("plural of ...") are skipped.
+- TSV: lemma<TAB>pos<TAB>gloss, e.g. converted from FreeDict; pos may be
+  empty (lemma-only match).
+
+Usage:
+    python -m worker.tasks.enrich_dataset --dictionary kaikki.org-dictionary-Spanish.jsonl.gz
+    DICTIONARY_PATH=... python -m worker.tasks.enrich_dataset --skip-db
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import create_engine
+from worker.config.settings import SEED_DB_URL
+from worker.db.bulk import update_word_glosses
+from worker.utils.dataset_io import ENRICHED_SCHEMA, parquet_path, read_dataset, write_parquet
+from worker.utils.timing import StageTimer
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", PROJECT_ROOT / "language_datasets"))
+SOURCE_LANG = os.getenv("SOURCE_LANG", "es")
+TARGET_LANG = os.getenv("TARGET_LANG", "en")
+BASE_FILENAME = f"{SOURCE_LANG}_to_{TARGET_LANG}_vocab_base.csv"
+OUTPUT_CSV = OUTPUT_DIR / BASE_FILENAME
+OUTPUT_GZ = OUTPUT_DIR / f"{BASE_FILENAME}.gz"
+OUTPUT_PARQUET = parquet_path(OUTPUT_CSV)
+
+DICTIONARY_PATH = Path(os.getenv("DICTIONARY_PATH", OUTPUT_DIR / f"{SOURCE_LANG}_{TARGET_LANG}_dictionary.jsonl.gz"))
+INDEX_PATH = OUTPUT_DIR / ".index" / f"{SOURCE_LANG}_to_{TARGET_LANG}_glosses.arrow"
+
+# Bump when the index layout or gloss selection changes
+INDEX_VERSION = 1
+
+# Senses kept per (lemma, POS), joined with "; "
+MAX_SENSES = 3
+
+# Wiktextract part-of-speech names → the spaCy UPOS tags in the dataset
+WIKTIONARY_POS = {
+    "noun": "NOUN", "verb": "VERB", "adj": "ADJ", "adv": "ADV", "name": "PROPN",
+    "pron": "PRON", "det": "DET", "article": "DET", "prep": "ADP", "postp": "ADP",
+    "conj": "CCONJ", "num": "NUM", "intj": "INTJ", "particle": "PART",
+}
+
+INDEX_SCHEMA = pa.schema([
+    ("lemma", pa.string()),
+    ("pos", pa.string()),
+    ("gloss", pa.string()),
+    # First entry of its lemma in the dump; used for lemma-only matches
+    ("primary", pa.bool_()),
+])
+
+
+def open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_wiktextract(path: Path):
+    """(lemma, POS, gloss) from a Wiktextract JSONL dump, for SOURCE_LANG entries."""
+    marker = f'"lang_code": "{SOURCE_LANG}"'
+    with open_text(path) as f:
+        for line in f:
+            # Cheap prefilter: most lines of a full dump are other languages
+            if marker not in line and f'"lang_code":"{SOURCE_LANG}"' not in line:
+                continue
+            entry = json.loads(line)
+            if entry.get("lang_code") != SOURCE_LANG or not entry.get("word"):
+                continue
+            pos = WIKTIONARY_POS.get(entry.get("pos"), (entry.get("pos") or "").upper())
+            for sense in entry.get("senses", []):
+                if "form_of" in sense or "alt_of" in sense:
+                    continue
+                for gloss in sense.get("glosses", [])[:1]:
+                    yield entry["word"], pos, gloss
+
+
+def iter_tsv(path: Path):
+    """(lemma, POS, gloss) from a lemma<TAB>pos<TAB>gloss file."""
+    with open_text(path) as f:
+        for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(row) >= 3 and row[0] and row[2]:
+                yield row[0], WIKTIONARY_POS.get(row[1].lower(), row[1].upper()), row[2]
+
+
+def read_dictionary(path: Path):
+    name = path.name.removesuffix(".gz")
+    if name.endswith((".jsonl", ".json")):
+        return iter_wiktextract(path)
+    if name.endswith((".tsv", ".txt")):
+        return iter_tsv(path)
+    raise ValueError(f"Unsupported dictionary format: {path.name} (expected .jsonl or .tsv, optionally .gz)")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def meta_path(index_path: Path) -> Path:
+    return index_path.with_suffix(".json")
+
+
+def index_is_current(source: Path, index_path: Path) -> bool:
+    """Whether the index was built from this exact dump, by this INDEX_VERSION."""
+    if not index_path.exists() or not meta_path(index_path).exists():
+        return False
+    meta = json.loads(meta_path(index_path).read_text())
+    if meta.get("version") != INDEX_VERSION:
+        return False
+    stat = source.stat()
+    if meta.get("size") == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if meta.get("size") != stat.st_size or meta.get("sha256") != file_sha256(source):
+        return False
+    # Touched but unchanged: remember the new mtime so the next run skips hashing
+    meta["mtime_ns"] = stat.st_mtime_ns
+    meta_path(index_path).write_text(json.dumps(meta))
+    return True
+
+
+def build_index(source: Path, index_path: Path) -> int:
+    """Parse the dump into the sorted, uncompressed (memory-mappable) Arrow index. Returns its rows."""
+    senses = {}
+    for lemma, pos, gloss in read_dictionary(source):
+        glosses = senses.setdefault((lemma.strip().lower(), pos), [])
+        gloss = gloss.strip()
+        if gloss and gloss not in glosses and len(glosses) < MAX_SENSES:
+            glosses.append(gloss)
+
+    seen = set()
+    lemmas, tags, glosses, primary = [], [], [], []
+    # Dict order is dump order, so the first key of each lemma is its main entry
+    for (lemma, pos), lemma_glosses in senses.items():
+        if not lemma_glosses:
+            continue
+        lemmas.append(lemma)
+        tags.append(pos)
+        glosses.append("; ".join(lemma_glosses))
+        primary.append(lemma not in seen)
+        seen.add(lemma)
+
+    table = pa.table([lemmas, tags, glosses, primary], schema=INDEX_SCHEMA)
+    table = table.take(pc.sort_indices(table, [("lemma", "ascending"), ("pos", "ascending")]))
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, INDEX_SCHEMA) as writer:
+        writer.write_table(table)
+    tmp.replace(index_path)
+
+    stat = source.stat()
+    meta_path(index_path).write_text(json.dumps({
+        "version": INDEX_VERSION,
+        "source": str(source),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(source),
+        "rows": len(table),
+    }))
+    return len(table)
+
+
+def open_index(index_path: Path) -> pa.Table:
+    """The index, memory-mapped (its buffers are read from the page cache, not copied)."""
+    return pa.ipc.open_file(pa.memory_map(str(index_path), "r")).read_all()
+
+
+def join_glosses(words, pos, index: pa.Table) -> tuple[pa.ChunkedArray, int, int]:
+    """
+    Gloss per (word, pos) row, in row order: the (lemma, POS) entry, else
+    the lemma's primary entry. Returns (glosses, exact matches, lemma-only matches).
+    """
+    rows = pa.table({
+        "word": pa.array(words, pa.string()),
+        "pos": pa.array(pos, pa.string()),
+        "row": pa.array(np.arange(len(words), dtype=np.int64)),
+    })
+    exact = rows.join(
+        index.select(["lemma", "pos", "gloss"]),
+        keys=["word", "pos"], right_keys=["lemma", "pos"], join_type="left outer",
+    )
+    fallback = index.filter(index["primary"]).select(["lemma", "gloss"]).rename_columns(["lemma", "lemma_gloss"])
+    joined = exact.join(fallback, keys="word", right_keys="lemma", join_type="left outer")
+    joined = joined.take(pc.sort_indices(joined["row"]))
+
+    glosses = pc.coalesce(joined["gloss"], joined["lemma_gloss"])
+    exact_matches = len(joined) - joined["gloss"].null_count
+    return glosses, exact_matches, len(joined) - glosses.null_count - exact_matches
+
+
+def enrich_dataset(dictionary: Path = DICTIONARY_PATH, rebuild_index: bool = False, skip_db: bool = False):
+    timer = StageTimer()
+    if not dictionary.exists():
+        raise SystemExit(f"💥 Dictionary dump not found: {dictionary} (set DICTIONARY_PATH or pass --dictionary)")
+
+    if rebuild_index or not index_is_current(dictionary, INDEX_PATH):
+        print(f"🔨 Building gloss index from {dictionary}...")
+        start = time.perf_counter()
+        with timer.stage("build index"):
+            rows = build_index(dictionary, INDEX_PATH)
+        seconds = time.perf_counter() - start
+        print(f"✅ Indexed {rows:,} (lemma, POS) entries in {seconds:.1f}s ({rows / seconds:,.0f} entries/s)")
+    else:
+        print(f"♻️ Reusing gloss index {INDEX_PATH} (dictionary unchanged)")
+
+    with timer.stage("open index"):
+        index = open_index(INDEX_PATH)
+    print(f"🗂️ Index: {len(index):,} entries, {INDEX_PATH.stat().st_size / 2**20:,.1f} MiB memory-mapped")
+
+    source = OUTPUT_PARQUET if OUTPUT_PARQUET.exists() else OUTPUT_GZ
+    print(f"📂 Loading dataset from {source}...")
+    with timer.stage("read dataset"):
+        df = read_dataset(OUTPUT_GZ)
+        df["language"] = df.language.astype(str)
+        df["pos"] = df.pos.astype(str)
+        df = df.drop(columns=["gloss"], errors="ignore")
+
+    start = time.perf_counter()
+    with timer.stage("join"):
+        glosses, exact, lemma_only = join_glosses(df.word.to_numpy(), df.pos.to_numpy(), index)
+        df["gloss"] = glosses.to_pandas()
+    seconds = time.perf_counter() - start
+
+    total = len(df)
+    unmatched = total - exact - lemma_only
+    print(f"\n📊 Enrichment ({total / seconds:,.0f} lemmas/s in the join):")
+    print(f"  🎯 lemma + POS: {exact:,} ({100 * exact / max(total, 1):.1f}%)")
+    print(f"  🔤 lemma only:  {lemma_only:,} ({100 * lemma_only / max(total, 1):.1f}%)")
+    print(f"  ❔ unmatched:   {unmatched:,} ({100 * unmatched / max(total, 1):.1f}%)")
+
+    with timer.stage("write dataset"):
+        df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
+        df.to_csv(OUTPUT_GZ, index=False, encoding="utf-8", compression="gzip")
+        write_parquet(df, OUTPUT_PARQUET, ENRICHED_SCHEMA)
+    print(f"💾 Wrote glosses to {OUTPUT_CSV.name}, {OUTPUT_GZ.name} and {OUTPUT_PARQUET.name}")
+
+    if not skip_db:
+        engine = create_engine(SEED_DB_URL)
+        with timer.stage("update words"), engine.begin() as conn:
+            rows = (
+                (word, language, None if pd.isna(gloss) else gloss)
+                for word, language, gloss in zip(df.word, df.language, df.gloss)
+            )
+            updated = update_word_glosses(conn, rows)
+        print(f"💾 Updated the gloss of {updated:,} words.")
+
+    timer.report()
+    print("✅ Done.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add English glosses to the vocab dataset and words table")
+    parser.add_argument("--dictionary", type=Path, default=DICTIONARY_PATH,
+                        help="Wiktextract JSONL or lemma/pos/gloss TSV dump (optionally .gz)")
+    parser.add_argument("--rebuild-index", action="store_true", help="rebuild the gloss index even if the dump is unchanged")
+    parser.add_argument("--skip-db", action="store_true", help="only enrich the dataset files")
+    args = parser.parse_args()
+    enrich_dataset(args.dictionary, rebuild_index=args.rebuild_index, skip_db=args.skip_db)
@@ -1,12 +1,28 @@
 """
-Loads the generated lemma dataset CSV into Postgres `words` table.
+Loads the generated lemma dataset into Postgres `words` table.
+Reads the memory-mapped Parquet file when present, else the gzip CSV.
+
+By default the load is incremental: the dataset is diffed against the rows
+already in `words` for its language(s), and only new words and words whose
+difficulty or zipf_score changed are written. Pass --full to upsert every
+row, and --delete to remove dataset words that are no longer in the build
+(words still referenced by book_words are kept).
+
+Restart the workers after a --delete: their warmed word id caches still
+hold the deleted ids. Until then each stale id costs a failed book_words
+upsert that write_book_words retries with freshly resolved ids.
 """
 
 import os
+import argparse
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from sqlalchemy import create_engine, text
 from worker.config.settings import SEED_DB_URL
+from worker.db.bulk import upsert_word_scores
+from worker.utils.dataset_io import parquet_path, read_dataset
+from worker.utils.timing import StageTimer
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", PROJECT_ROOT / "language_datasets"))
@@ -15,36 +31,115 @@ TARGET_LANG = os.getenv("TARGET_LANG", "en")
 BASE_FILENAME = f"{SOURCE_LANG}_to_{TARGET_LANG}_vocab_base.csv"
 OUTPUT_GZ = OUTPUT_DIR / f"{BASE_FILENAME}.gz"
 
+# Relative difference below which a zipf_score counts as unchanged
+ZIPF_RTOL = 1e-6
+
+
+def score_rows(df: pd.DataFrame):
+    return (
+        (word, language, int(difficulty), float(zipf_score))
+        for word, language, difficulty, zipf_score in zip(
+            df.word, df.language, df.difficulty, df.zipf_score
+        )
+    )
+
+
+def diff_dataset(df: pd.DataFrame, existing: pd.DataFrame):
+    """
+    Split the dataset against existing words rows into
+    (new rows, changed rows, unchanged count, stale existing rows).
+    """
+    merged = df.merge(existing, on=["word", "language"], how="left", suffixes=("", "_db"), indicator=True)
+    new = merged[merged["_merge"] == "left_only"]
+    present = merged[merged["_merge"] == "both"]
+    # NULL scores (words first seen in a book) compare unequal, so they get filled in.
+    # zipf_score is compared with a tolerance: a dataset read back through a
+    # narrower float must not rewrite (and degrade) every row
+    same_zipf = np.isclose(
+        present.zipf_score.to_numpy(dtype="float64"),
+        present.zipf_score_db.to_numpy(dtype="float64"),
+        rtol=ZIPF_RTOL, atol=0, equal_nan=True,
+    )
+    changed = present[(present.difficulty != present.difficulty_db) | ~same_zipf]
+
+    stale = existing.merge(df[["word", "language"]], on=["word", "language"], how="left", indicator=True)
+    stale = stale[(stale["_merge"] == "left_only") & stale.difficulty.notna()]
+    return new, changed, len(present) - len(changed), stale
 
-def load_dataset():
-    print(f"📂 Loading dataset from {OUTPUT_GZ}...")
-    df = pd.read_csv(OUTPUT_GZ)
-    print(f"✅ Loaded {len(df)} rows. Inserting into database using SQLAlchemy...")
+
+def load_dataset(full: bool = False, delete: bool = False):
+    timer = StageTimer()
+    source = parquet_path(OUTPUT_GZ) if parquet_path(OUTPUT_GZ).exists() else OUTPUT_GZ
+    print(f"📂 Loading dataset from {source}...")
+    with timer.stage("read dataset"):
+        df = read_dataset(OUTPUT_GZ)
+        df["language"] = df.language.astype(str)
+        df["zipf_score"] = df.zipf_score.astype("float64")
+    print(f"✅ Loaded {len(df)} rows.")
 
     engine = create_engine(SEED_DB_URL)
 
     with engine.begin() as conn:
-        for _, row in df.iterrows():
-            conn.execute(
-                text("""
-                    INSERT INTO words (word, language, difficulty, zipf_score, created)
-                    VALUES (:word, :language, :difficulty, :zipf_score, NOW())
-                    ON CONFLICT (word, language)
-                    DO UPDATE SET
-                        difficulty = EXCLUDED.difficulty,
-                        zipf_score = EXCLUDED.zipf_score;
-                """),
-                {
-                    "word": row.word,
-                    "language": row.language,
-                    "difficulty": int(row.difficulty),
-                    "zipf_score": float(row.zipf_score),
-                },
-            )
-
-    print(f"💾 Upserted {len(df)} words into 'words' table.")
+        if full:
+            print("💾 Full load: upserting every row with COPY...")
+            with timer.stage("apply"):
+                # Stream rows through COPY into a staging table, then merge in one statement
+                upsert_word_scores(conn, score_rows(df))
+            print(f"💾 Upserted {len(df)} words into 'words' table.")
+        else:
+            with timer.stage("fetch existing"):
+                existing = pd.DataFrame(
+                    conn.execute(
+                        text("""
+                            SELECT id, word, language, difficulty, zipf_score
+                            FROM words WHERE language = ANY(:langs)
+                        """),
+                        {"langs": sorted(df.language.unique())},
+                    ).fetchall(),
+                    columns=["id", "word", "language", "difficulty", "zipf_score"],
+                )
+
+            with timer.stage("diff"):
+                new, changed, unchanged, stale = diff_dataset(df, existing)
+
+            with timer.stage("apply"):
+                if len(new) or len(changed):
+                    upsert_word_scores(conn, score_rows(pd.concat([new, changed])))
+
+            deleted = 0
+            if delete and len(stale):
+                with timer.stage("delete"):
+                    deleted = conn.execute(
+                        text("""
+                            DELETE FROM words w
+                            WHERE w.id = ANY(:ids)
+                              AND NOT EXISTS (SELECT 1 FROM book_words bw WHERE bw.word_id = w.id)
+                        """),
+                        {"ids": [int(i) for i in stale.id]},
+                    ).rowcount
+
+            print("\n📊 Incremental load summary:")
+            print(f"  ➕ inserted:  {len(new):,}")
+            print(f"  ✏️  updated:   {len(changed):,}")
+            print(f"  💤 unchanged: {unchanged:,}")
+            if delete:
+                print(f"  🗑️  deleted:   {deleted:,} ({len(stale) - deleted:,} kept, still used by books)")
+                if deleted:
+                    print("  💡 Restart the workers: their word id caches still hold the deleted ids")
+            else:
+                print(f"  🗃️  stale:     {len(stale):,} (pass --delete to remove)")
+            if len(changed):
+                print("  💡 Scores changed: run worker.tasks.backfill_profiles --all to refresh book profiles")
+
+    timer.report()
     print("✅ Done.")
 
 
 if __name__ == "__main__":
-    load_dataset()
+    parser = argparse.ArgumentParser(description="Load the vocab dataset into the words table")
+    parser.add_argument("--full", action="store_true", help="upsert every row instead of diffing")
+    parser.add_argument("--delete", action="store_true",
+                        help="delete words no longer in the dataset (then restart the workers: "
+                             "their word id caches hold the deleted ids)")
+    args = parser.parse_args()
+    load_dataset(full=args.full, delete=args.delete)
@@ -1,70 +1,294 @@
+from psycopg2.errors import ForeignKeyViolation
 from rq import get_current_job
+from sqlalchemy.exc import IntegrityError
 from worker.utils.logger import get_logger
-from worker.storage.minio_client import get_minio_client
-from worker.nlp.extractor import extract_words_from_buffer
-from worker.nlp.sanitizers.spanish import clean_lemma
-from worker.config.settings import MINIO_BUCKET, LANGUAGE_CODE
+from worker.storage.minio_client import get_minio_client, iter_object, read_object
+from worker.storage.prefetch import prefetch_next, take_prefetched
+from worker.nlp.extractor import extract_words_from_buffer, extract_words_from_stream
+from worker.nlp.languages import normalize_language
+from worker.nlp.lemma_cache import REJECTED
+from worker.nlp.registry import get_language_models, pipeline_key
+from worker.config.settings import MINIO_BUCKET, STREAM_THRESHOLD_BYTES, PREFETCH_WAIT_SECONDS
+from worker.task_queue import PROCESS_BOOK
+from worker.coverage.events import publish_books_written
 from worker.db.connection import engine
-from sqlalchemy import text
-import spacy
+from worker.db.bulk import upsert_words, upsert_book_words
+from worker.db.word_ids import word_id_cache
+from worker.db.results import find_language, find_result, copy_result, save_result
+from worker.db.profiles import copy_profile, write_profiles
+from worker.utils.metrics import JobMetrics, publish_job_metrics
+from worker.utils.profiling import profile_job
+import time
 import uuid
 
 logger = get_logger(__name__)
 
-# --- Load spaCy model once globally ---
-logger.info("🧠 Loading spaCy model for Spanish...")
-try:
-    nlp = spacy.load("es_core_news_lg", disable=["ner"])
-except OSError:
-    logger.warning("⚠️ Model not found. Run: python -m spacy download es_core_news_lg")
-    nlp = spacy.load("es_core_news_sm", disable=["ner"])
 
+def lemmatize_forms(forms: list[str], language: str, metrics: JobMetrics = None) -> dict[str, str]:
+    """Lemmatize single-word forms; map each form to its cleaned lemma or REJECTED."""
+    metrics = metrics or JobMetrics()
+    models = get_language_models(language)
+    with metrics.stage("spacy"):
+        results = models.lemmatizer.lemmatize(forms)
 
-def process_book(book_id, filename):
+    with metrics.stage("sanitize"):
+        cleaned = models.sanitizer.clean_lemmas([r.text for r in results], [r.lemma for r in results])
+
+        result = {}
+        for form, token, lemma in zip(forms, results, cleaned):
+            if not token.is_alpha or not lemma or " " in lemma or "el" in lemma.split():
+                lemma = REJECTED
+            result[form] = lemma
+    return result
+
+
+def to_book_id(book_id):
+    """Ensure book_id is a proper UUID object (important for SQL binding)."""
+    try:
+        return uuid.UUID(str(book_id))
+    except ValueError:
+        logger.warning(f"⚠️ Invalid book_id format, using string as fallback: {book_id}")
+        return book_id
+
+
+def content_key(stat) -> str:
+    """
+    Content identity of a MinIO object. The ETag is the MD5 of single-part
+    uploads; multipart ETags also depend on the part size, so re-uploading
+    the same file differently can miss (and simply reprocess).
+    """
+    etag = stat.etag.strip('"')
+    return f"etag:{etag}:{stat.size}"
+
+
+def reuse_result(book_id, content_hash, language=None):
+    """
+    Copy book_words from an earlier book with identical content and pipeline.
+    Returns job meta describing the reuse, or None when there is nothing to reuse.
+    """
+    with engine.begin() as conn:
+        language = language or find_language(conn, content_hash)
+        key = pipeline_key(language) if language else None
+        if key is None:
+            return None
+        stored = find_result(conn, content_hash, key)
+        if stored is None:
+            return None
+        copied = copy_result(conn, stored.book_id, book_id)
+        if not copied and str(stored.book_id) != str(book_id):
+            # The source book's rows are gone; process from scratch
+            return None
+        try:
+            with conn.begin_nested():
+                copy_profile(conn, stored.book_id, book_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not copy the book profile of {stored.book_id}: {e}")
+    return {
+        "hit": True,
+        "source_book": str(stored.book_id),
+        "rows": copied,
+        "saved_cpu_seconds": round(stored.cpu_seconds, 3),
+    }
+
+
+def fetch_word_counts(minio_client, filename, stat=None, metrics: JobMetrics = None, language=None):
+    """
+    Retrieve a book from MinIO (or the prefetch spool) and extract its token
+    counts and language (the given one, or else the detected one).
+    """
+    metrics = metrics or JobMetrics()
+    if stat is None:
+        stat = minio_client.stat_object(MINIO_BUCKET, filename)
+    metrics.count("object_bytes", stat.size)
+
+    if stat.size >= STREAM_THRESHOLD_BYTES:
+        # Large books: pipe MinIO → Tika and count text chunks as they arrive
+        logger.info(f"🌊 Streaming {stat.size:,} bytes through Tika")
+        with metrics.stage("stream_extract"):
+            return extract_words_from_stream(iter_object(minio_client, MINIO_BUCKET, filename, stat.size), language)
+
+    with metrics.stage("download"):
+        data = take_prefetched(MINIO_BUCKET, filename, stat.etag)
+        if data is not None:
+            logger.info(f"📥 Using prefetched copy of {filename}")
+            metrics.count("prefetched", 1)
+        else:
+            data = read_object(minio_client, MINIO_BUCKET, filename, stat.size)
+    return extract_words_from_buffer(data, metrics, language)
+
+
+def resolve_lemmas(forms, language: str, connection=None, metrics: JobMetrics = None):
+    """
+    Map surface forms to cleaned lemmas (or REJECTED), sending only
+    lemma cache misses through spaCy. Returns (lemmas, hits, misses).
+    """
+    metrics = metrics or JobMetrics()
+    lemma_cache = get_language_models(language).lemma_cache
+    with metrics.stage("lemma_cache"):
+        lemmas = lemma_cache.get_many(forms, connection)
+        hits = len(lemmas)
+        misses = [w for w in forms if w not in lemmas]
+
+    fresh = lemmatize_forms(misses, language, metrics)
+    with metrics.stage("lemma_cache"):
+        lemma_cache.set_many(fresh, connection)
+    lemmas.update(fresh)
+    return lemmas, hits, len(misses)
+
+
+def count_lemmas(word_counts, lemmas) -> dict[str, int]:
+    """Fold surface form counts into lemma counts, dropping rejected forms."""
+    lemma_counter = {}
+    for word, count in word_counts.items():
+        lemma = lemmas[word]
+        if lemma:
+            lemma_counter[lemma] = lemma_counter.get(lemma, 0) + count
+    return lemma_counter
+
+
+def write_book_words(conn, lemma_counters: dict, language: str, metrics: JobMetrics = None) -> dict[str, int]:
+    """
+    Upsert words, book_words and book_profiles for one or more books
+    ({book_id: lemma_counter}) written in the same language.
+
+    Returns the word ids fetched from the database; add them to word_id_cache
+    once the transaction has committed.
+    """
+    metrics = metrics or JobMetrics()
+    all_lemmas = set()
+    for lemma_counter in lemma_counters.values():
+        all_lemmas.update(lemma_counter)
+
+    # Only lemmas missing from the word id cache go through the words upsert
+    id_map, missing = word_id_cache.get_many(all_lemmas, language)
+    with metrics.stage("db_words"):
+        fetched = upsert_words(conn, missing, language) if missing else {}
+    id_map.update(fetched)
+    metrics.count("word_ids_fetched", len(fetched))
+
+    hit_rate = 100 * (len(all_lemmas) - len(missing)) / len(all_lemmas) if all_lemmas else 0
+    logger.info(f"🆔 Word id cache: {len(all_lemmas) - len(missing)} hits, {len(missing)} misses ({hit_rate:.1f}%)")
+
+    def book_word_rows():
+        return (
+            (book_id, id_map[w], c)
+            for book_id, lemma_counter in lemma_counters.items()
+            for w, c in lemma_counter.items() if w in id_map
+        )
+
+    # Upsert word frequencies for each book
+    try:
+        # Savepoint: a stale cached id (its word deleted since) fails only this statement
+        with metrics.stage("db_book_words"), conn.begin_nested():
+            rows = upsert_book_words(conn, book_word_rows())
+    except IntegrityError as e:
+        if not isinstance(e.orig, ForeignKeyViolation):
+            raise
+        cached = [w for w in id_map if w not in fetched]
+        logger.warning(f"⚠️ Cached word ids are stale ({e.orig.diag.message_detail}); resolving {len(cached)} again")
+        word_id_cache.discard(cached, language)
+        with metrics.stage("db_words"):
+            refetched = upsert_words(conn, cached, language)
+        fetched.update(refetched)
+        id_map.update(refetched)
+        with metrics.stage("db_book_words"):
+            rows = upsert_book_words(conn, book_word_rows())
+    metrics.count("rows_written", rows)
+
+    try:
+        # Savepoint: failing to profile must not lose the books' words (backfill_profiles catches up)
+        with metrics.stage("db_profiles"), conn.begin_nested():
+            write_profiles(conn, lemma_counters, id_map, language)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not write book profiles: {e}")
+    return fetched
+
+
+def process_book(book_id, filename, language=None):
     """
     Extract, lemmatize, and persist words from a book file.
     Uses nlp.pipe for efficient batch lemmatization.
+
+    language is the book's language if known (it also picked the job's
+    books-<lang> queue); otherwise it is detected during extraction.
+
+    Per-stage timings and counts end up in job.meta["metrics"] and the
+    /metrics histograms; enqueue with profile=true to also run under cProfile.
     """
     job = get_current_job()
     if job:
         logger.info(f"🚀 Starting RQ job {job.id} for book {book_id}")
 
-    # Ensure book_id is a proper UUID object (important for SQL binding)
+    metrics = JobMetrics()
     try:
-        book_id = uuid.UUID(str(book_id))
-    except ValueError:
-        logger.warning(f"⚠️ Invalid book_id format, using string as fallback: {book_id}")
+        with profile_job(job), metrics.stage("total"):
+            run_pipeline(job, to_book_id(book_id), filename, metrics, normalize_language(language))
+    finally:
+        publish_job_metrics(job, "process_book", metrics)
 
+
+def run_pipeline(job, book_id, filename, metrics: JobMetrics, language=None):
     minio_client = get_minio_client()
     logger.info(f"📘 Processing book {book_id}: {filename}")
 
-    # --- Retrieve book content from MinIO ---
-    response = minio_client.get_object(MINIO_BUCKET, filename)
-    data = response.read()
-    response.close()
-    response.release_conn()
+    # --- Skip content this pipeline has already processed for another book ---
+    with metrics.stage("stat"):
+        stat = minio_client.stat_object(MINIO_BUCKET, filename)
+    content_hash = content_key(stat)
+    try:
+        with metrics.stage("dedupe_lookup"):
+            reused = reuse_result(book_id, content_hash, language)
+    except Exception as e:
+        logger.warning(f"⚠️ Content result lookup failed, processing normally: {e}")
+        reused = None
+    if reused:
+        logger.info(
+            f"♻️ Reused results of book {reused['source_book']} for identical content "
+            f"({reused['rows']} rows, ~{reused['saved_cpu_seconds']}s CPU saved)"
+        )
+        metrics.count("rows_written", reused["rows"])
+        publish_books_written(job.connection if job else None, [book_id])
+        if job:
+            job.meta["dedupe"] = reused
+            job.meta["status"] = "completed"
+            job.save_meta()
+        return
 
-    # --- Extract tokens ---
-    word_counts, language = extract_words_from_buffer(data)
+    # --- Retrieve book content from MinIO and extract tokens ---
+    cpu_start = time.process_time()
+    word_counts, language = fetch_word_counts(minio_client, filename, stat, metrics, language)
+    metrics.count("tokens", sum(word_counts.values()))
+    metrics.count("unique_forms", len(word_counts))
     logger.info(f"🔤 Extracted {len(word_counts)} unique tokens before lemmatization")
 
+    # --- Download the next queued book while this one is in spaCy ---
+    prefetch = prefetch_next(job, PROCESS_BOOK)
+    try:
+        persist_book(job, book_id, word_counts, language, content_hash, cpu_start, metrics)
+    finally:
+        if prefetch:
+            with metrics.stage("prefetch_wait"):
+                prefetch.join(PREFETCH_WAIT_SECONDS)
+
+
+def persist_book(job, book_id, word_counts, language, content_hash, cpu_start, metrics: JobMetrics):
+    """Lemmatize one book's token counts and write them (and the content result) to the database."""
     if not word_counts:
         logger.warning("⚠️ No words extracted. Skipping book.")
         return
 
-    # --- Lemmatize in batches using spaCy's nlp.pipe() ---
-    lemma_counter = {}
-    batch_size = 1000
+    # --- Lemmatize, sending only cache misses through spaCy's nlp.pipe() ---
+    connection = job.connection if job else None
+    lemmas, hits, misses = resolve_lemmas(list(word_counts), language, connection, metrics)
 
-    for docs in nlp.pipe(word_counts.keys(), batch_size=batch_size):
-        token = docs[0]
-        if not token.is_alpha:
-            continue
-        lemma = clean_lemma(token.text, token.lemma_)
-        if not lemma or " " in lemma or "el" in lemma.split():
-            continue
-        lemma_counter[lemma] = lemma_counter.get(lemma, 0) + word_counts[token.text]
+    logger.info(f"🗃️ Lemma cache: {hits} hits, {misses} misses")
+    metrics.count("lemma_cache_hits", hits)
+    metrics.count("lemma_cache_misses", misses)
+    if job:
+        job.meta["lemma_cache"] = {"hits": hits, "misses": misses}
 
+    lemma_counter = count_lemmas(word_counts, lemmas)
+    metrics.count("lemmas", len(lemma_counter))
     logger.info(f"🧩 Reduced to {len(lemma_counter)} unique lemmas after normalization")
 
     if not lemma_counter:
@@ -72,39 +296,24 @@ def process_book(book_id, filename):
         return
 
     # --- Insert or update database records ---
-    with engine.begin() as conn:
-        # Upsert words
-        conn.execute(
-            text("""
-                INSERT INTO words (word, language)
-                VALUES (:word, :lang)
-                ON CONFLICT (word, language) DO NOTHING
-            """),
-            [{"word": w, "lang": LANGUAGE_CODE} for w in lemma_counter],
-        )
-
-        # Get word IDs for this language
-        rows = conn.execute(
-            text("SELECT id, word FROM words WHERE language=:lang AND word=ANY(:words)"),
-            {"lang": LANGUAGE_CODE, "words": list(lemma_counter.keys())},
-        ).fetchall()
-        id_map = {r.word: r.id for r in rows}
-
-        # Upsert word frequencies for the book
-        conn.execute(
-            text("""
-                INSERT INTO book_words (book_id, word_id, count)
-                VALUES (:book, :word_id, :count)
-                ON CONFLICT (book_id, word_id)
-                DO UPDATE SET count = EXCLUDED.count
-            """),
-            [
-                {"book": book_id, "word_id": id_map[w], "count": c}
-                for w, c in lemma_counter.items() if w in id_map
-            ],
-        )
+    # Commits explicitly (closing without a commit rolls back) so the commit is timed too
+    with engine.connect() as conn:
+        fetched = write_book_words(conn, {book_id: lemma_counter}, language, metrics)
+        cpu_seconds = time.process_time() - cpu_start
+        try:
+            # Savepoint: failing to record the result must not lose the book's words
+            with metrics.stage("db_results"), conn.begin_nested():
+                save_result(conn, content_hash, pipeline_key(language), language, book_id, cpu_seconds)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not record content result for book {book_id}: {e}")
+        with metrics.stage("db_commit"):
+            conn.commit()
+    word_id_cache.update(fetched, language)
+    publish_books_written(connection, [book_id])
 
     if job:
+        job.meta["language"] = language
+        job.meta["dedupe"] = {"hit": False, "cpu_seconds": round(cpu_seconds, 3)}
         job.meta["status"] = "completed"
         job.save_meta()
         logger.info(f"🏁 RQ job {job.id} completed successfully.")
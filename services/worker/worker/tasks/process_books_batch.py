@@ -0,0 +1,204 @@
+"""
+Batch variant of process_book for bulk catalogue imports.
+
+Amortises per-job overhead across many books:
+1. Stat every object and copy the results of content processed before
+   (content_results, as in process_book) instead of processing it again.
+2. Fetch and extract the remaining books concurrently (MinIO + Tika are
+   I/O bound); identical objects within the batch are extracted once.
+3. Lemmatize the union of unseen surface forms in a single nlp.pipe pass
+   per language.
+4. Write every book's book_words rows and content result in one
+   transaction per language.
+
+A book that fails is recorded in job.meta and skipped; the rest of the
+batch still completes. So does a language group whose model cannot be
+loaded: its books are marked failed.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rq import get_current_job
+from worker.utils.logger import get_logger
+from worker.storage.minio_client import get_minio_client
+from worker.config.settings import BATCH_FETCH_WORKERS, MINIO_BUCKET
+from worker.coverage.events import publish_books_written
+from worker.db.connection import engine
+from worker.db.results import save_result
+from worker.db.word_ids import word_id_cache
+from worker.nlp.registry import pipeline_key
+from worker.tasks.process_book import (
+    to_book_id,
+    content_key,
+    reuse_result,
+    fetch_word_counts,
+    resolve_lemmas,
+    count_lemmas,
+    write_book_words,
+)
+
+logger = get_logger(__name__)
+
+
+def process_books_batch(book_ids, filenames, language=None):
+    """
+    Extract, lemmatize, and persist words for many books in one job.
+    Without a language, each book's language is detected separately.
+    """
+    job = get_current_job()
+    if job:
+        logger.info(f"🚀 Starting RQ batch job {job.id} for {len(book_ids)} books")
+
+    book_ids = [to_book_id(b) for b in book_ids]
+    statuses = {}
+    minio_client = get_minio_client()
+
+    # --- Stat every object and reuse results of content processed before ---
+    def lookup(book_id, filename):
+        stat = minio_client.stat_object(MINIO_BUCKET, filename)
+        content_hash = content_key(stat)
+        try:
+            return stat, content_hash, reuse_result(book_id, content_hash, language)
+        except Exception as e:
+            logger.warning(f"⚠️ Content result lookup failed for book {book_id}, processing normally: {e}")
+            return stat, content_hash, None
+
+    content_hashes = {}
+    # content hash → (filename, stat, book ids with that content)
+    to_fetch = {}
+    dedupe = {"hits": 0, "saved_cpu_seconds": 0.0}
+    with ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS) as pool:
+        futures = {book_id: (filename, pool.submit(lookup, book_id, filename))
+                   for book_id, filename in zip(book_ids, filenames)}
+        for book_id, (filename, future) in futures.items():
+            try:
+                stat, content_hash, reused = future.result()
+            except Exception as e:
+                logger.error(f"💥 Could not stat book {book_id}: {e}")
+                statuses[str(book_id)] = f"failed: {e}"
+                continue
+            content_hashes[book_id] = content_hash
+            if reused:
+                statuses[str(book_id)] = "completed"
+                dedupe["hits"] += 1
+                dedupe["saved_cpu_seconds"] += reused["saved_cpu_seconds"]
+                continue
+            to_fetch.setdefault(content_hash, (filename, stat, []))[2].append(book_id)
+    if dedupe["hits"]:
+        logger.info(f"♻️ Reused earlier results for {dedupe['hits']} books "
+                    f"(~{dedupe['saved_cpu_seconds']:.1f}s CPU saved)")
+
+    # --- Fetch and extract the rest concurrently, once per distinct content ---
+    def fetch(filename, stat):
+        return fetch_word_counts(minio_client, filename, stat, language=language)
+
+    cpu_start = time.process_time()
+    extracted = {}
+    languages = {}
+    with ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS) as pool:
+        futures = {content_hash: pool.submit(fetch, filename, stat)
+                   for content_hash, (filename, stat, _) in to_fetch.items()}
+        for content_hash, future in futures.items():
+            same_content = to_fetch[content_hash][2]
+            try:
+                word_counts, book_language = future.result()
+            except Exception as e:
+                logger.error(f"💥 Extraction failed for book(s) {', '.join(map(str, same_content))}: {e}")
+                statuses.update({str(b): f"failed: {e}" for b in same_content})
+                continue
+            if not word_counts:
+                logger.warning(f"⚠️ No words extracted for book(s) {', '.join(map(str, same_content))}. Skipping.")
+                statuses.update({str(b): "skipped" for b in same_content})
+                continue
+            for book_id in same_content:
+                extracted[book_id] = word_counts
+                languages.setdefault(book_language, []).append(book_id)
+    # Per-book CPU cost recorded with each content result (an even share of the batch's)
+    extract_cpu = (time.process_time() - cpu_start) / max(len(futures), 1)
+
+    connection = job.connection if job else None
+    hits = misses = 0
+    for book_language, language_book_ids in languages.items():
+        language_start = time.process_time()
+        # A language whose model is missing or fails to load fails only its own books
+        try:
+            # --- Lemmatize the union of forms in one pass ---
+            forms = set()
+            for book_id in language_book_ids:
+                forms.update(extracted[book_id])
+            lemmas, language_hits, language_misses = resolve_lemmas(list(forms), book_language, connection)
+        except Exception as e:
+            logger.error(f"💥 Lemmatization failed for {len(language_book_ids)} '{book_language}' books: {e}")
+            for book_id in language_book_ids:
+                statuses[str(book_id)] = f"failed: {e}"
+            continue
+        hits += language_hits
+        misses += language_misses
+        logger.info(
+            f"🗃️ Lemma cache ({book_language}): {language_hits} hits, {language_misses} misses "
+            f"across {len(language_book_ids)} books"
+        )
+
+        lemma_counters = {}
+        for book_id in language_book_ids:
+            lemma_counter = count_lemmas(extracted[book_id], lemmas)
+            if lemma_counter:
+                lemma_counters[book_id] = lemma_counter
+            else:
+                statuses[str(book_id)] = "skipped"
+
+        cpu_seconds = extract_cpu + (time.process_time() - language_start) / len(language_book_ids)
+        write_books(lemma_counters, book_language, statuses, content_hashes, cpu_seconds)
+
+    publish_books_written(connection, [b for b in book_ids if statuses.get(str(b)) == "completed"])
+
+    completed = sum(1 for s in statuses.values() if s == "completed")
+    if job:
+        job.meta["books"] = statuses
+        job.meta["lemma_cache"] = {"hits": hits, "misses": misses}
+        job.meta["dedupe"] = {"hits": dedupe["hits"], "saved_cpu_seconds": round(dedupe["saved_cpu_seconds"], 3)}
+        job.meta["status"] = "completed"
+        job.save_meta()
+
+    logger.info(f"✅ Batch processed: {completed}/{len(book_ids)} books completed.")
+    return statuses
+
+
+def save_results(conn, book_ids, content_hashes: dict, language: str, cpu_seconds: float):
+    """Record the books' rows as the results for their content, so identical books can reuse them."""
+    try:
+        # Savepoint: failing to record results must not lose the books' words
+        with conn.begin_nested():
+            key = pipeline_key(language)
+            for book_id in book_ids:
+                save_result(conn, content_hashes[book_id], key, language, book_id, cpu_seconds)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not record content results: {e}")
+
+
+def write_books(lemma_counters: dict, language: str, statuses: dict,
+                content_hashes: dict, cpu_seconds: float):
+    """Persist same-language books in one transaction, falling back to per-book."""
+    if not lemma_counters:
+        return
+
+    try:
+        with engine.begin() as conn:
+            fetched = write_book_words(conn, lemma_counters, language)
+            save_results(conn, lemma_counters, content_hashes, language, cpu_seconds)
+        word_id_cache.update(fetched, language)
+        for book_id in lemma_counters:
+            statuses[str(book_id)] = "completed"
+    except Exception as e:
+        logger.warning(f"⚠️ Batch write failed ({e}); retrying books one at a time")
+        for book_id, lemma_counter in lemma_counters.items():
+            try:
+                with engine.begin() as conn:
+                    fetched = write_book_words(conn, {book_id: lemma_counter}, language)
+                    save_results(conn, [book_id], content_hashes, language, cpu_seconds)
+                word_id_cache.update(fetched, language)
+                statuses[str(book_id)] = "completed"
+            except Exception as book_error:
+                logger.error(f"💥 DB write failed for book {book_id}: {book_error}")
+                statuses[str(book_id)] = f"failed: {book_error}"
@@ -0,0 +1,47 @@
+"""
+Columnar (Parquet) format for the vocab datasets.
+
+The builder writes a zstd-compressed Parquet file next to the gzip CSV with
+a fixed schema (int8 difficulty, float64 zipf_score, dictionary-encoded
+pos/language); enrich_dataset rewrites it with a gloss column. Readers
+memory-map it when present and fall back to the CSV.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATASET_SCHEMA = pa.schema([
+    ("word", pa.string()),
+    ("pos", pa.dictionary(pa.int8(), pa.string())),
+    ("language", pa.dictionary(pa.int8(), pa.string())),
+    ("difficulty", pa.int8()),
+    ("zipf_score", pa.float64()),
+])
+
+# After enrich_dataset: the same columns plus an English gloss (null when unmatched)
+ENRICHED_SCHEMA = DATASET_SCHEMA.append(pa.field("gloss", pa.string()))
+
+
+def parquet_path(csv_path: Path) -> Path:
+    """es_to_en_vocab_base.csv(.gz) → es_to_en_vocab_base.parquet"""
+    name = csv_path.name.removesuffix(".gz").removesuffix(".csv")
+    return csv_path.with_name(f"{name}.parquet")
+
+
+def write_parquet(df: pd.DataFrame, path: Path, schema: pa.Schema = DATASET_SCHEMA):
+    table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+    pq.write_table(table, path, compression="zstd")
+
+
+def read_dataset(csv_path: Path, columns=None) -> pd.DataFrame:
+    """Read a dataset, memory-mapping its Parquet sibling when it exists."""
+    path = parquet_path(csv_path)
+    if path.exists():
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        # Release Arrow buffers column by column while converting
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    # Real words like "nan" and "null" must not become NaN
+    return pd.read_csv(csv_path, usecols=columns, keep_default_na=False, na_values=[""])
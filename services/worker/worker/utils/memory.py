@@ -0,0 +1,12 @@
+def process_memory(pid: int) -> dict:
+    """Return RSS and PSS (proportional share of pages shared with siblings) in MB."""
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    memory[key.lower() + "_mb"] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return memory
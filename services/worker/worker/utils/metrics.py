@@ -0,0 +1,108 @@
+"""
+Prometheus-style job metrics, aggregated in Redis.
+
+RQ runs each job in a short-lived work horse, so in-process counters would
+vanish with it. Instead every job adds its stage timings and counts to two
+Redis hashes, and render_metrics() turns them into the Prometheus text
+exposition format (served at /metrics by the worker API):
+
+- palabra_stage_seconds{task,stage}: latency histogram per pipeline stage
+- palabra_task_total{task,name}: cumulative counts (bytes, tokens, rows, ...)
+"""
+
+import math
+from typing import Optional
+
+from redis import Redis, RedisError
+from worker.utils.logger import get_logger
+from worker.utils.timing import StageTimer
+
+logger = get_logger(__name__)
+
+STAGES_KEY = "palabra:metrics:stage_seconds"
+COUNTS_KEY = "palabra:metrics:counts"
+
+# Upper bounds (seconds) of the latency histogram buckets
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, math.inf)
+
+
+class JobMetrics(StageTimer):
+    """Stage timings plus per-job counts (bytes, tokens, rows, ...)."""
+
+    def __init__(self):
+        super().__init__()
+        self.counts: dict[str, int] = {}
+
+    def count(self, name: str, value: int):
+        self.counts[name] = self.counts.get(name, 0) + int(value)
+
+    def as_meta(self) -> dict:
+        return {
+            "stages": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            "counts": dict(self.counts),
+        }
+
+
+def publish_job_metrics(job, task: str, metrics: JobMetrics):
+    """Store a job's metrics in job.meta["metrics"] and add them to the shared histograms."""
+    if job is None:
+        return
+    job.meta["metrics"] = metrics.as_meta()
+    job.save_meta()
+    record_job_metrics(job.connection, task, metrics.timings, metrics.counts)
+
+
+def _bucket(seconds: float) -> str:
+    for bound in STAGE_BUCKETS:
+        if seconds <= bound:
+            return "+Inf" if bound == math.inf else repr(float(bound))
+    return "+Inf"
+
+
+def record_job_metrics(connection: Optional[Redis], task: str, timings: dict[str, float], counts: dict[str, int]):
+    """Add one job's stage timings and counts to the shared histograms."""
+    if connection is None:
+        return
+    try:
+        pipe = connection.pipeline(transaction=False)
+        for stage, seconds in timings.items():
+            pipe.hincrby(STAGES_KEY, f"{task}|{stage}|{_bucket(seconds)}", 1)
+            pipe.hincrby(STAGES_KEY, f"{task}|{stage}|count", 1)
+            pipe.hincrbyfloat(STAGES_KEY, f"{task}|{stage}|sum", seconds)
+        for name, value in counts.items():
+            pipe.hincrby(COUNTS_KEY, f"{task}|{name}", int(value))
+        pipe.hincrby(COUNTS_KEY, f"{task}|jobs", 1)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"⚠️ Could not record job metrics: {e}")
+
+
+def render_metrics(connection: Redis) -> str:
+    """Render the aggregated metrics in the Prometheus text format."""
+    stages: dict[tuple[str, str], dict[str, float]] = {}
+    for field, value in connection.hgetall(STAGES_KEY).items():
+        task, stage, kind = field.decode("utf-8").rsplit("|", 2)
+        stages.setdefault((task, stage), {})[kind] = float(value)
+
+    lines = [
+        "# HELP palabra_stage_seconds Wall-clock seconds spent per pipeline stage.",
+        "# TYPE palabra_stage_seconds histogram",
+    ]
+    for (task, stage), values in sorted(stages.items()):
+        labels = f'task="{task}",stage="{stage}"'
+        cumulative = 0
+        for bound in STAGE_BUCKETS:
+            le = "+Inf" if bound == math.inf else repr(float(bound))
+            cumulative += int(values.get(le, 0))
+            lines.append(f'palabra_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"palabra_stage_seconds_sum{{{labels}}} {values.get('sum', 0.0)}")
+        lines.append(f"palabra_stage_seconds_count{{{labels}}} {int(values.get('count', 0))}")
+
+    lines += [
+        "# HELP palabra_task_total Cumulative per-task counts (jobs, bytes, tokens, rows).",
+        "# TYPE palabra_task_total counter",
+    ]
+    for field, value in sorted(connection.hgetall(COUNTS_KEY).items()):
+        task, name = field.decode("utf-8").rsplit("|", 1)
+        lines.append(f'palabra_task_total{{task="{task}",name="{name}"}} {int(value)}')
+    return "\n".join(lines) + "\n"
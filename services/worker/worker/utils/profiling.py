@@ -0,0 +1,44 @@
+"""
+Opt-in cProfile hook for a single job.
+
+Enqueue with profile=true and the job runs under cProfile. The top
+PROFILE_TOP_N functions by cumulative time are stored in job.meta["profile"];
+with PROFILE_DIR set, the full .prof dump is written there as well (open
+it with snakeviz or `python -m pstats`).
+"""
+
+import cProfile
+import io
+import os
+import pstats
+from contextlib import contextmanager
+
+from worker.config.settings import PROFILE_DIR, PROFILE_TOP_N
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@contextmanager
+def profile_job(job):
+    """Profile the enclosed block if the job was enqueued with profile=true."""
+    if job is None or not job.meta.get("profile"):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+        job.meta["profile"] = out.getvalue()
+        if PROFILE_DIR:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{job.id}.prof")
+            profiler.dump_stats(path)
+            job.meta["profile_path"] = path
+        job.save_meta()
+        logger.info(f"🔬 Profiled job {job.id}")
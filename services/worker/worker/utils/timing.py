@@ -0,0 +1,22 @@
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per named pipeline stage."""
+
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self):
+        print("\n⏱️ Stage timings:")
+        for name, seconds in self.timings.items():
+            print(f"  {name:<16} {seconds:8.2f}s")
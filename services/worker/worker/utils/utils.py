@@ -5,6 +5,7 @@ from psycopg2.extras import RealDictCursor
 from minio import Minio
 from minio.error import S3Error
 import os
+import ebooklib
 from ebooklib import epub
 from bs4 import BeautifulSoup
 
@@ -46,14 +47,19 @@ def download_file_from_minio(bucket_name: str, object_name: str, local_path: str
 # --------------------
 # EPUB / Text utilities
 # --------------------
-def extract_text_from_epub(file_path: str) -> str:
-    """Extract plain text from an EPUB file."""
-    book = epub.read_epub(file_path)
+def extract_text_from_epub(source) -> str:
+    """Extract plain text from an EPUB file path or binary file-like object."""
+    book = epub.read_epub(source)
     text_content = []
 
     for item in book.get_items():
-        if item.get_type() == epub.EpubHtml:
+        if item.get_type() == ebooklib.ITEM_DOCUMENT:
             soup = BeautifulSoup(item.get_content(), 'html.parser')
             text_content.append(soup.get_text())
 
     return "\n".join(text_content)
+
+
+def extract_text_from_html(data: bytes) -> str:
+    """Extract plain text from an HTML document."""
+    return BeautifulSoup(data, 'html.parser').get_text()